@@ -0,0 +1,167 @@
+import sys
+import argparse
+import numpy as np
+import pandas as pd
+
+from emission_factors import ACTIVITY_COLUMNS, DEFAULT_REGION, FACTORS_PATH, load_emission_factors
+from table_stream import CHUNK_ROWS, read_table_chunks, write_table_chunks
+
+# Emission sources of the ACTIVITY_COLUMNS, as labelled in breakdowns
+SOURCE_LABELS = ['Electricity', 'Natural Gas', 'Personal Car', 'Public Transit', 'Flights']
+
+# Optional per-row columns of an activity table selecting its factors
+REGION_COLUMN = 'region'
+YEAR_COLUMN = 'year'
+
+# Emission tiers: below 50 kg, below 100, below 200, below 500, above
+PERSONALITY_BOUNDS = np.array([50, 100, 200, 500])
+PERSONALITIES = np.array([
+    "🌱 Earth Whisperer (Low Emission)",
+    "🍃 Green Guardian",
+    "🌍 Climate Conscious Citizen",
+    "🏭 Industrial Impact Maker",
+    "🔥 Carbon Volcano (High Emission)"
+])
+
+
+def personality_tiers(emissions):
+    """Tier index (0-4) of each emission total"""
+    return np.searchsorted(PERSONALITY_BOUNDS, emissions, side='right')
+
+
+def carbon_personality(emissions):
+    """Carbon emission personality of one total"""
+    return str(PERSONALITIES[personality_tiers(emissions)])
+
+
+def carbon_footprint(activities, factors, tax_rate):
+    """
+    Footprints of many entities in one vectorized pass
+
+    Args:
+        activities (np.ndarray): (entities, activity types) amounts in ACTIVITY_COLUMNS order
+        factors (np.ndarray): kg CO2 per unit of each activity type, shared
+            (activities,) or per entity (entities, activities)
+        tax_rate: ₹ per kg CO2, shared or per entity
+
+    Returns:
+        dict: breakdown (entities, sources) kg CO2, total, carbon_tax and
+        tier (personality index) per entity
+    """
+    breakdown = np.asarray(activities, dtype=np.float64) * factors
+    total = breakdown.sum(axis=1)
+    return {
+        'breakdown': breakdown,
+        'total': total,
+        'carbon_tax': total * tax_rate,
+        'tier': personality_tiers(total),
+    }
+
+
+def regional_footprint(activities, regions=DEFAULT_REGION, years=None, table=None):
+    """
+    carbon_footprint with factors gathered from the emission factor registry
+
+    Args:
+        regions: Region name, or one per entity
+        years: Year, or one per entity; the table's latest year if None
+        table (EmissionFactorTable): Defaults to the process-wide table of FACTORS_PATH
+
+    Returns:
+        dict: carbon_footprint's result plus the factor `version`
+    """
+    table = table or load_emission_factors()
+    factors, tax_rates = table.lookup(regions, table.latest_year if years is None else years)
+    footprint = carbon_footprint(activities, factors, tax_rates)
+    footprint['version'] = table.version
+    return footprint
+
+
+def activity_matrix(chunk):
+    """
+    (rows, 5) activity amounts of a table chunk
+
+    Columns named like ACTIVITY_COLUMNS are used wherever they sit;
+    otherwise the first five columns are taken in that order. Blank or
+    non-numeric amounts count as zero, like an untouched input on the page.
+    """
+    if set(ACTIVITY_COLUMNS) <= set(chunk.columns):
+        activities = chunk[ACTIVITY_COLUMNS]
+    elif chunk.shape[1] >= len(ACTIVITY_COLUMNS):
+        activities = chunk.iloc[:, :len(ACTIVITY_COLUMNS)]
+    else:
+        raise ValueError(f"Activity table needs the columns {', '.join(ACTIVITY_COLUMNS)}")
+    return activities.apply(pd.to_numeric, errors='coerce').fillna(0).to_numpy(np.float64)
+
+
+def footprint_chunks(source, chunk_rows=CHUNK_ROWS, table=None):
+    """
+    Yield each chunk of an activity table with per-source emissions, total,
+    tax, personality and factor version appended
+
+    Rows are costed with the factors of their `region` and `year` columns
+    where the table has them, else the default region's latest factors.
+    The factor table is fixed for the whole run.
+    """
+    table = table or load_emission_factors()
+    for chunk in read_table_chunks(source, chunk_rows):
+        regions = chunk[REGION_COLUMN].to_numpy(object) if REGION_COLUMN in chunk else table.default_region
+        years = pd.to_numeric(chunk[YEAR_COLUMN], errors='coerce').fillna(table.latest_year).to_numpy() if YEAR_COLUMN in chunk else None
+        footprint = regional_footprint(activity_matrix(chunk), regions, years, table)
+        result = chunk.reset_index(drop=True)
+        for i, source_label in enumerate(SOURCE_LABELS):
+            result[f'{source_label} kg CO2'] = footprint['breakdown'][:, i]
+        result['total_emissions'] = footprint['total']
+        result['carbon_tax'] = footprint['carbon_tax']
+        result['personality'] = PERSONALITIES[footprint['tier']]
+        result['factor_version'] = footprint['version']
+        yield result
+
+
+def carbon_footprint_file(source, output, chunk_rows=CHUNK_ROWS, factor_path=FACTORS_PATH, report=None):
+    """
+    Stream an activity table (rows = households/organizations) into a footprint file
+
+    Returns:
+        dict: rows, seconds, rows_per_sec, total_emissions, carbon_tax,
+        personality_counts over the whole table and factor_version
+    """
+    table = load_emission_factors(factor_path)
+    totals = {'total_emissions': 0.0, 'carbon_tax': 0.0, 'personality_counts': np.zeros(len(PERSONALITIES), int)}
+
+    def tallied(chunks):
+        for result in chunks:
+            totals['total_emissions'] += result['total_emissions'].sum()
+            totals['carbon_tax'] += result['carbon_tax'].sum()
+            totals['personality_counts'] += pd.Categorical(result['personality'], PERSONALITIES).value_counts().to_numpy()
+            yield result
+
+    stats = write_table_chunks(tallied(footprint_chunks(source, chunk_rows, table)), output, report)
+    stats.update(totals)
+    stats['factor_version'] = table.version
+    stats['personality_counts'] = dict(zip(PERSONALITIES.tolist(), totals['personality_counts'].tolist()))
+    return stats
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Carbon footprints of many households or organizations')
+    parser.add_argument('activities', help=f"CSV or Parquet with columns {', '.join(ACTIVITY_COLUMNS)}")
+    parser.add_argument('output', help='Result file (.csv or .parquet)')
+    parser.add_argument('--chunk-rows', type=int, default=CHUNK_ROWS, help='Rows per step')
+    parser.add_argument('--factors', default=FACTORS_PATH, help='Emission factor file (region, year, activity, factor)')
+    args = parser.parse_args(argv)
+
+    def report(rows, rate):
+        print(f"{rows:,} rows, {rate:,.0f} rows/sec", flush=True)
+
+    stats = carbon_footprint_file(args.activities, args.output, args.chunk_rows, args.factors, report)
+    print(
+        f"{stats['rows']:,} rows in {stats['seconds']:.2f}s ({stats['rows_per_sec']:,.0f} rows/sec): "
+        f"{stats['total_emissions']:,.0f} kg CO2, ₹{stats['carbon_tax']:,.0f} carbon tax, factors {stats['factor_version']}"
+    )
+    for personality, count in stats['personality_counts'].items():
+        print(f"{personality}: {count:,}")
+
+
+if __name__ == '__main__':
+    sys.exit(main())
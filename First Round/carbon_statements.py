@@ -0,0 +1,280 @@
+import sys
+import time
+import argparse
+import numpy as np
+import pandas as pd
+
+from carbon_engine import ACTIVITY_COLUMNS, SOURCE_LABELS, regional_footprint
+from emission_factors import DEFAULT_REGION, FACTORS_PATH, load_emission_factors
+from table_stream import read_table_chunks
+
+# Statement lines read per step; a 1 GB export is never loaded whole
+STATEMENT_CHUNK_ROWS = 100_000
+
+# Merchant names and keywords per activity; two-word entries win over single words
+CATEGORY_KEYWORDS = {
+    'Electricity': [
+        'electricity', 'electric', 'power bill', 'bescom', 'msedcl', 'mseb', 'bses', 'tneb', 'tangedco',
+        'kseb', 'cesc', 'tata power', 'adani electricity', 'torrent power', 'uppcl', 'wbsedcl',
+    ],
+    'Natural Gas': [
+        'lpg', 'indane', 'hp gas', 'bharat gas', 'bharatgas', 'png', 'mahanagar gas', 'igl',
+        'gas bill', 'gail', 'cylinder',
+    ],
+    'Personal Car': [
+        'petrol', 'diesel', 'fuel', 'indian oil', 'iocl', 'bharat petroleum', 'bpcl', 'hpcl',
+        'hp petrol', 'nayara', 'shell', 'fastag', 'uber', 'ola', 'rapido',
+    ],
+    'Public Transit': [
+        'metro', 'dmrc', 'bmrcl', 'bmtc', 'ksrtc', 'msrtc', 'irctc', 'railway', 'railways', 'bus', 'redbus',
+    ],
+    'Flight Miles': [
+        'indigo', 'air india', 'vistara', 'spicejet', 'akasa', 'airlines', 'airways', 'airline', 'flight',
+    ],
+}
+
+# ₹ per unit of each activity, used when a line has an amount but no quantity:
+# ₹/kWh, ₹/kg of gas, ₹/car km, ₹/transit km, ₹/flight km
+RUPEES_PER_UNIT = np.array([8.0, 80.0, 7.0, 2.0, 5.0])
+
+# Accepted header names, compared in lower case
+DATE_COLUMNS = ('date', 'transaction date', 'txn date', 'value date', 'posting date', 'bill date')
+DESCRIPTION_COLUMNS = ('description', 'narration', 'merchant', 'details', 'particulars', 'remarks')
+AMOUNT_COLUMNS = ('amount', 'debit', 'withdrawal', 'withdrawal amt.', 'debit amount', 'amount (inr)', 'bill amount')
+QUANTITY_COLUMNS = ('units', 'kwh', 'quantity', 'consumption', 'km')
+# Debit/credit marker ("Dr"/"Cr", "Debit"/"Credit") and separate credit amount columns.
+# A generic "Type" column often holds the payment method (UPI, NEFT, POS), so a
+# candidate is used only if its values are all debit/credit markers
+DIRECTION_COLUMNS = ('dr/cr', 'cr/dr', 'debit/credit', 'type', 'transaction type', 'txn type')
+CREDIT_COLUMNS = ('credit', 'deposit', 'deposit amt.', 'credit amount')
+DEBIT_MARKERS = ('d', 'dr', 'dr.', 'debit')
+CREDIT_MARKERS = ('c', 'cr', 'cr.', 'credit')
+
+TOKEN_PATTERN = r'[a-z0-9]+'
+
+
+def compile_keywords(category_keywords=CATEGORY_KEYWORDS):
+    """
+    Hashed lookups from keyword to activity index
+
+    Returns:
+        tuple: (single-word dict, two-word dict) keyed by normalized text
+    """
+    words, phrases = {}, {}
+    for category, keywords in category_keywords.items():
+        index = ACTIVITY_COLUMNS.index(category)
+        for keyword in keywords:
+            tokens = pd.Series([keyword]).str.lower().str.findall(TOKEN_PATTERN)[0]
+            (phrases if len(tokens) > 1 else words)[' '.join(tokens)] = index
+    return words, phrases
+
+
+WORD_INDEX, PHRASE_INDEX = compile_keywords()
+
+
+def classify_descriptions(descriptions, words=WORD_INDEX, phrases=PHRASE_INDEX):
+    """
+    Activity index of each description, -1 where nothing matches
+
+    Each distinct description is tokenized once. Its adjacent word pairs
+    and then its single words are looked up in the hashed keyword tables,
+    and the first hit wins.
+    """
+    codes, uniques = pd.factorize(pd.Series(descriptions, dtype=object).fillna(''))
+    tokens = pd.Series(uniques, dtype=object).str.lower().str.findall(TOKEN_PATTERN).explode().dropna()
+
+    following = tokens.groupby(level=0).shift(-1)
+    by_phrase = (tokens + ' ' + following).map(phrases)
+    by_word = tokens.map(words)
+
+    # First phrase hit per description, else first word hit
+    found = by_phrase.groupby(level=0).first().combine_first(by_word.groupby(level=0).first())
+    categories = found.reindex(range(len(uniques))).fillna(-1).to_numpy(np.int64)
+    return categories[codes] if len(codes) else np.empty(0, dtype=np.int64)
+
+
+def _find_columns(columns, candidates):
+    """Columns matching any candidate name, in candidate order"""
+    lookup = {str(column).strip().lower(): column for column in columns}
+    return [lookup[candidate] for candidate in candidates if candidate in lookup]
+
+
+def _find_column(columns, candidates):
+    found = _find_columns(columns, candidates)
+    return found[0] if found else None
+
+
+def is_direction_column(values):
+    """True when every non-blank value is a debit or credit marker"""
+    markers = pd.Series(values).dropna().astype(str).str.strip().str.lower()
+    markers = markers[markers != '']
+    return len(markers) > 0 and bool(markers.isin(DEBIT_MARKERS + CREDIT_MARKERS).all())
+
+
+def statement_columns(chunk):
+    """
+    (date, description, amount, quantity, direction, credit) column names of a statement export
+
+    Column names are matched by header; a debit/credit marker column must
+    also hold only Dr/Cr/Debit/Credit values in `chunk` (the first chunk of
+    the export). Without one, credits are told apart by a credit amount
+    column or by the sign of the amounts.
+
+    Raises:
+        ValueError: No date, description or amount column was recognized
+    """
+    columns = chunk.columns
+    found = [_find_column(columns, names) for names in (DATE_COLUMNS, DESCRIPTION_COLUMNS, AMOUNT_COLUMNS)]
+    missing = [label for label, column in zip(('date', 'description', 'amount'), found) if column is None]
+    if missing:
+        raise ValueError(f"Statement has no {', '.join(missing)} column")
+    direction = next(
+        (column for column in _find_columns(columns, DIRECTION_COLUMNS) if is_direction_column(chunk[column])),
+        None
+    )
+    return (*found, _find_column(columns, QUANTITY_COLUMNS), direction, _find_column(columns, CREDIT_COLUMNS))
+
+
+def parse_dates(values, date_format=None):
+    """
+    Dates of a statement column, NaT where unparseable
+
+    Without `date_format`, ISO dates (2024-01-05) are read first; only the
+    remaining strings are parsed one distinct value at a time, day first
+    (05/01/2024 is 5 January).
+    """
+    values = pd.Series(values)
+    if date_format is not None:
+        return pd.to_datetime(values, errors='coerce', format=date_format)
+    dates = pd.to_datetime(values, errors='coerce', format='ISO8601')
+    retry = dates.isna() & values.notna()
+    if retry.any():
+        uniques = values[retry].astype(str).unique()
+        parsed = pd.Series(pd.to_datetime(uniques, errors='coerce', format='mixed', dayfirst=True), index=uniques)
+        dates[retry] = values[retry].astype(str).map(parsed)
+    return dates
+
+
+def debit_lines(chunk, columns, amounts, debits_negative=False):
+    """
+    Whether each line is money out
+
+    A debit/credit marker column decides when present, then a separate
+    credit amount column (lines with a credit and no debit amount). Otherwise
+    the sign of `amounts` does: positive is a debit (bills, debit columns),
+    or negative with `debits_negative` (bank exports of signed amounts).
+    Refunds, reversals and utility credits are therefore never counted.
+    """
+    direction_column, credit_column = columns[4:]
+    if direction_column is not None:
+        marker = chunk[direction_column].astype(str).str.strip().str.lower()
+        return ~marker.isin(CREDIT_MARKERS).to_numpy()
+    if credit_column is not None:
+        credits = pd.to_numeric(chunk[credit_column], errors='coerce').fillna(0).to_numpy()
+        return ~((credits > 0) & ~(amounts > 0)) & ~(amounts < 0)
+    return amounts < 0 if debits_negative else ~(amounts < 0)
+
+
+def statement_activities(chunk, columns, rupees_per_unit=RUPEES_PER_UNIT, date_format=None, debits_negative=False):
+    """
+    Monthly activity amounts of one statement chunk
+
+    Each classified debit line adds its quantity (kWh, kg, km) when the
+    export has one, else its amount converted at `rupees_per_unit`, to its
+    activity. Credit lines and lines without a readable date are counted,
+    not costed.
+
+    Returns:
+        tuple: (DataFrame of ACTIVITY_COLUMNS by month, dict of lines,
+        classified, credits and undated counts)
+    """
+    date_column, description_column, amount_column, quantity_column = columns[:4]
+    category = classify_descriptions(chunk[description_column].to_numpy())
+    classified = category >= 0
+
+    amounts = pd.to_numeric(chunk[amount_column], errors='coerce').to_numpy(np.float64)
+    debit = debit_lines(chunk, columns, amounts, debits_negative)
+    units = np.abs(amounts) / rupees_per_unit[np.maximum(category, 0)]
+    if quantity_column is not None:
+        quantity = pd.to_numeric(chunk[quantity_column], errors='coerce').abs().to_numpy()
+        units = np.where(np.isnan(quantity), units, quantity)
+
+    dates = parse_dates(chunk[date_column].reset_index(drop=True), date_format)
+    months = dates.dt.to_period('M').to_numpy()
+    dated = dates.notna().to_numpy()
+    keep = classified & debit & dated & ~np.isnan(units)
+
+    activities = np.zeros((int(keep.sum()), len(ACTIVITY_COLUMNS)))
+    activities[np.arange(len(activities)), category[keep]] = units[keep]
+    monthly = pd.DataFrame(activities, columns=ACTIVITY_COLUMNS).groupby(months[keep]).sum()
+    counts = {
+        'lines': len(chunk),
+        'classified': int(classified.sum()),
+        'credits': int((~debit).sum()),
+        'undated': int((~dated).sum()),
+    }
+    return monthly, counts
+
+
+def statement_emissions(source, chunk_rows=STATEMENT_CHUNK_ROWS, region=DEFAULT_REGION, factor_path=FACTORS_PATH,
+                        date_format=None, debits_negative=False):
+    """
+    Stream a bank/utility export and yield running monthly emissions after each chunk
+
+    Each month is costed with the region's factors for its own year.
+
+    Yields:
+        tuple: (DataFrame of SOURCE_LABELS kg CO2 plus Total by month, stats
+        dict with lines, classified, credits, undated, seconds, lines_per_sec
+        and factor_version)
+    """
+    table = load_emission_factors(factor_path)
+    activities = pd.DataFrame(columns=ACTIVITY_COLUMNS, dtype=float)
+    stats = {'lines': 0, 'classified': 0, 'credits': 0, 'undated': 0, 'factor_version': table.version}
+    columns = None
+    start = time.perf_counter()
+    for chunk in read_table_chunks(source, chunk_rows):
+        columns = columns or statement_columns(chunk)
+        monthly, counts = statement_activities(chunk, columns, date_format=date_format, debits_negative=debits_negative)
+        activities = activities.add(monthly, fill_value=0) if len(activities) else monthly
+        for key, count in counts.items():
+            stats[key] += count
+        stats['seconds'] = time.perf_counter() - start
+        stats['lines_per_sec'] = stats['lines'] / stats['seconds'] if stats['seconds'] > 0 else float('inf')
+
+        years = [month.year for month in activities.index]
+        footprint = regional_footprint(activities.to_numpy(), region, years, table)
+        emissions = pd.DataFrame(footprint['breakdown'], index=activities.index.astype(str), columns=SOURCE_LABELS)
+        emissions['Total'] = footprint['total']
+        yield emissions.sort_index(), dict(stats)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Monthly emissions estimated from a bank or utility statement export')
+    parser.add_argument('statement', help='CSV or Parquet export with date, description and amount columns')
+    parser.add_argument('--chunk-rows', type=int, default=STATEMENT_CHUNK_ROWS, help='Lines per step')
+    parser.add_argument('--region', default=DEFAULT_REGION, help='Region whose emission factors apply')
+    parser.add_argument('--factors', default=FACTORS_PATH, help='Emission factor file (region, year, activity, factor)')
+    parser.add_argument('--date-format', help='strftime format of the date column; ISO, then day-first, if omitted')
+    parser.add_argument('--debits-negative', action='store_true', help='Money out is negative in a signed amount column')
+    parser.add_argument('--output', help='Optional CSV file for the monthly emissions')
+    args = parser.parse_args(argv)
+
+    emissions, stats = pd.DataFrame(), {}
+    chunks = statement_emissions(
+        args.statement, args.chunk_rows, args.region, args.factors, args.date_format, args.debits_negative
+    )
+    for emissions, stats in chunks:
+        print(f"{stats['lines']:,} lines, {stats['lines_per_sec']:,.0f} lines/sec", flush=True)
+    print(emissions.round(1).to_string())
+    if stats:
+        print(
+            f"{stats['classified']:,} of {stats['lines']:,} lines classified, {stats['credits']:,} credits skipped, "
+            f"{stats['undated']:,} without a readable date; factors {stats['factor_version']}"
+        )
+    if args.output:
+        emissions.to_csv(args.output, index_label='month')
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,101 @@
+import sys
+import argparse
+import numpy as np
+import pandas as pd
+
+from model_registry import load_model
+from table_stream import CHUNK_ROWS, read_table_chunks, write_table_chunks
+
+# Feature columns of Crop_Recommendation.csv, in the order the model was trained on
+FEATURE_COLUMNS = ['Nitrogen', 'Phosphorus', 'Potassium', 'Temperature', 'Humidity', 'pH_Value', 'Rainfall']
+
+TOP_K = 3
+
+
+def survey_features(chunk):
+    """
+    (rows, 7) float32 feature matrix of a survey chunk
+
+    Columns named like Crop_Recommendation.csv are used wherever they sit;
+    otherwise the first seven columns are taken in that order.
+    """
+    if set(FEATURE_COLUMNS) <= set(chunk.columns):
+        features = chunk[FEATURE_COLUMNS]
+    elif chunk.shape[1] >= len(FEATURE_COLUMNS):
+        features = chunk.iloc[:, :len(FEATURE_COLUMNS)]
+    else:
+        raise ValueError(f"Survey needs the columns {', '.join(FEATURE_COLUMNS)}")
+    return features.apply(pd.to_numeric, errors='coerce').to_numpy(np.float32)
+
+
+def top_k_crops(model, features, k=TOP_K):
+    """
+    The k most probable crops per row from one vectorized predict_proba call
+
+    Rows with missing or non-numeric features get no recommendation.
+
+    Returns:
+        tuple: (crops (rows, k) object array, probabilities (rows, k) float32)
+    """
+    k = min(k, len(model.classes_))
+    crops = np.full((len(features), k), None, dtype=object)
+    probabilities = np.full((len(features), k), np.nan, dtype=np.float32)
+    valid = ~np.isnan(features).any(axis=1)
+    if valid.any():
+        proba = model.predict_proba(features[valid])
+        best = np.argpartition(-proba, k - 1, axis=1)[:, :k]
+        best_proba = np.take_along_axis(proba, best, axis=1)
+        order = np.argsort(-best_proba, axis=1, kind='stable')
+        crops[valid] = model.classes_[np.take_along_axis(best, order, axis=1)]
+        probabilities[valid] = np.take_along_axis(best_proba, order, axis=1)
+    return crops, probabilities
+
+
+def recommend_crops_chunks(model, source, k=TOP_K, chunk_rows=CHUNK_ROWS):
+    """Yield each survey chunk with crop_1..k and probability_1..k columns appended"""
+    for chunk in read_table_chunks(source, chunk_rows):
+        crops, probabilities = top_k_crops(model, survey_features(chunk), k)
+        result = chunk.reset_index(drop=True)
+        for rank in range(crops.shape[1]):
+            result[f'crop_{rank + 1}'] = crops[:, rank]
+            result[f'probability_{rank + 1}'] = probabilities[:, rank]
+        yield result
+
+
+def recommend_crops_file(model, source, output, k=TOP_K, chunk_rows=CHUNK_ROWS, report=None):
+    """
+    Stream a survey sheet through the model into a CSV or Parquet result file
+
+    Each chunk is written as soon as it is predicted, so only one chunk is
+    ever held in memory.
+
+    Args:
+        model: Fitted classifier with predict_proba and classes_
+        source: Survey path or uploaded file
+        output (str): Result path; `.parquet` writes Parquet, anything else CSV
+        report (callable): Optional progress callback(rows done, rows/sec)
+
+    Returns:
+        dict: rows, seconds, rows_per_sec
+    """
+    return write_table_chunks(recommend_crops_chunks(model, source, k, chunk_rows), output, report)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Top-k crop recommendations for a CSV/Parquet survey of soil tests')
+    parser.add_argument('survey', help='CSV or Parquet file with the seven Crop_Recommendation.csv feature columns')
+    parser.add_argument('output', help='Result file (.csv or .parquet)')
+    parser.add_argument('--model', default='model_storage/crop_random_forest.joblib', help='Crop recommendation model')
+    parser.add_argument('--top-k', type=int, default=TOP_K, help='Crops to report per row')
+    parser.add_argument('--chunk-rows', type=int, default=CHUNK_ROWS, help='Rows per prediction step')
+    args = parser.parse_args(argv)
+
+    def report(rows, rate):
+        print(f"{rows:,} rows, {rate:,.0f} rows/sec", flush=True)
+
+    stats = recommend_crops_file(load_model(args.model), args.survey, args.output, args.top_k, args.chunk_rows, report)
+    print(f"{stats['rows']:,} rows in {stats['seconds']:.2f}s ({stats['rows_per_sec']:,.0f} rows/sec) -> {args.output}")
+
+
+if __name__ == '__main__':
+    sys.exit(main())
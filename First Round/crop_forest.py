@@ -0,0 +1,217 @@
+import sys
+import time
+import argparse
+import threading
+import weakref
+import numpy as np
+import pandas as pd
+
+from model_registry import load_model
+
+# Rows evaluated together; bounds the (rows, trees) node index arrays
+EVAL_CHUNK_ROWS = 2048
+
+
+class FlatForest:
+    """
+    A fitted RandomForestClassifier flattened into contiguous node arrays
+
+    All trees share one set of arrays (split feature, threshold, children,
+    class distribution) with child indices offset into a common numbering,
+    and every (row, tree) pair descends one level per vectorized step.
+    Leaves point to themselves, and once a quarter of the pairs of a step
+    sit at their leaf they are dropped from the working set.
+
+    Leaf class distributions are read from each tree's own predict_proba at
+    one point inside every leaf, so they carry whatever normalization the
+    installed scikit-learn applies; predict_proba then sums trees in order
+    and divides by the tree count like the forest does. Probabilities and
+    predictions are bit-for-bit identical to the forest's own with n_jobs=1.
+    """
+
+    def __init__(self, forest):
+        """
+        Args:
+            forest: Fitted single-output sklearn RandomForestClassifier
+        """
+        if getattr(forest, 'n_outputs_', 1) != 1:
+            raise ValueError('Only single-output forests can be flattened')
+        trees = [estimator.tree_ for estimator in forest.estimators_]
+        offsets = np.cumsum([0] + [tree.node_count for tree in trees])
+
+        self.classes_ = forest.classes_
+        self.n_features_in_ = forest.n_features_in_
+        self.n_trees = len(trees)
+        self.roots = offsets[:-1].astype(np.int32)
+        self.max_depth = max(tree.max_depth for tree in trees)
+
+        feature, threshold, children = [], [], []
+        for tree, offset in zip(trees, offsets):
+            leaf = tree.children_left < 0
+            nodes = np.arange(tree.node_count) + offset
+            feature.append(np.where(leaf, 0, tree.feature))
+            threshold.append(tree.threshold)
+            children.append(np.column_stack([
+                np.where(leaf, nodes, tree.children_left + offset),
+                np.where(leaf, nodes, tree.children_right + offset),
+            ]))
+        self.feature = np.concatenate(feature).astype(np.int32)
+        self.children = np.ascontiguousarray(np.concatenate(children), dtype=np.int32)
+
+        # Features are float32, so x <= t (float64) is exactly x <= the largest float32 not above t
+        threshold = np.concatenate(threshold)
+        self.threshold = threshold.astype(np.float32)
+        above = self.threshold > threshold
+        self.threshold[above] = np.nextafter(self.threshold[above], np.float32(-np.inf))
+
+        # Class distribution per leaf, exactly as each tree's predict_proba reports it
+        leaf = self.children[:, 0] == np.arange(len(self.children))
+        points = self._leaf_points()
+        self.value = np.zeros((len(self.children), len(self.classes_)))
+        for estimator, start, end in zip(forest.estimators_, offsets[:-1], offsets[1:]):
+            leaves = start + np.flatnonzero(leaf[start:end])
+            self.value[leaves] = estimator.predict_proba(points[leaves])
+
+    def _leaf_points(self):
+        """A float32 point inside every node's region, found level by level from the roots"""
+        n_nodes = len(self.children)
+        lower = np.full((n_nodes, self.n_features_in_), -np.inf, dtype=np.float32)
+        upper = np.full((n_nodes, self.n_features_in_), np.inf, dtype=np.float32)
+        nodes = self.roots
+        while nodes.size:
+            nodes = nodes[self.children[nodes, 0] != nodes]
+            left, right, feature = self.children[nodes, 0], self.children[nodes, 1], self.feature[nodes]
+            lower[left], upper[left] = lower[nodes], upper[nodes]
+            lower[right], upper[right] = lower[nodes], upper[nodes]
+            # Left is x <= threshold, right the next float32 up
+            upper[left, feature] = np.minimum(upper[left, feature], self.threshold[nodes])
+            lower[right, feature] = np.maximum(
+                lower[right, feature], np.nextafter(self.threshold[nodes], np.float32(np.inf)))
+            nodes = np.concatenate((left, right))
+        return np.where(np.isfinite(lower), lower, np.where(np.isfinite(upper), upper, 0)).astype(np.float32)
+
+    def _check_input(self, X):
+        # Trees split on float32 features
+        X = np.ascontiguousarray(X, dtype=np.float32)
+        if X.ndim == 1:
+            X = X[np.newaxis, :]
+        if X.shape[1] != self.n_features_in_:
+            raise ValueError(f"X has {X.shape[1]} features, but the forest expects {self.n_features_in_}")
+        if not np.isfinite(X).all():
+            raise ValueError('Input contains NaN or infinity')
+        return X
+
+    def _apply(self, X):
+        """(rows, trees) leaf index of every row in every tree"""
+        n_rows, n_features = X.shape
+        values = X.ravel()
+        children = self.children.ravel()
+        leaves = np.empty(n_rows * self.n_trees, dtype=np.int32)
+
+        # Working set: current node, slot in `leaves` and row offset into `values`
+        nodes = np.tile(self.roots, n_rows)
+        slots = np.arange(n_rows * self.n_trees, dtype=np.int32)
+        rows = np.repeat(np.arange(n_rows, dtype=np.int32) * n_features, self.n_trees)
+        while nodes.size:
+            go_right = values[rows + self.feature[nodes]] > self.threshold[nodes]
+            following = children[2 * nodes + go_right]
+            done = following == nodes
+            finished = np.count_nonzero(done)
+            if finished == done.size or 4 * finished > done.size:
+                leaves[slots[done]] = following[done]
+                keep = ~done
+                nodes, slots, rows = following[keep], slots[keep], rows[keep]
+            else:
+                nodes = following
+        return leaves.reshape(n_rows, self.n_trees)
+
+    def apply(self, X):
+        return self._apply(self._check_input(X))
+
+    def predict_proba(self, X):
+        X = self._check_input(X)
+        proba = np.zeros((len(X), len(self.classes_)))
+        for start in range(0, len(X), EVAL_CHUNK_ROWS):
+            leaves = self._apply(X[start:start + EVAL_CHUNK_ROWS])
+            # Summed tree by tree in order, like the forest's own accumulation
+            chunk = proba[start:start + EVAL_CHUNK_ROWS]
+            for tree in range(self.n_trees):
+                chunk += self.value[leaves[:, tree]]
+        proba /= self.n_trees
+        return proba
+
+    def predict(self, X):
+        return self.classes_.take(np.argmax(self.predict_proba(X), axis=1), axis=0)
+
+
+# Flattened forests by sklearn model; entries go when the registry swaps the model out
+_flattened = weakref.WeakKeyDictionary()
+_flatten_lock = threading.Lock()
+
+
+def flatten_forest(forest):
+    """FlatForest of a fitted forest, compiled once per model object"""
+    with _flatten_lock:
+        if forest not in _flattened:
+            _flattened[forest] = FlatForest(forest)
+        return _flattened[forest]
+
+
+def _median_latency(predict, row, repeats):
+    latencies = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        predict(row)
+        latencies.append(time.perf_counter() - start)
+    return float(np.median(latencies))
+
+
+def benchmark(model_path, data_path, rows=100_000, repeats=200):
+    """
+    Single-row and bulk latency of the joblib forest against its FlatForest
+
+    Bulk rows are resampled from `data_path` (Crop_Recommendation.csv layout).
+    Probabilities of both are compared exactly.
+    """
+    forest = load_model(model_path)
+    start = time.perf_counter()
+    flat = flatten_forest(forest)
+    compile_seconds = time.perf_counter() - start
+
+    features = pd.read_csv(data_path).iloc[:, :forest.n_features_in_].to_numpy(np.float32)
+    bulk = features[np.random.default_rng(0).integers(len(features), size=rows)]
+    row = bulk[:1]
+
+    single = {
+        'sklearn': _median_latency(forest.predict, row, repeats),
+        'flat': _median_latency(flat.predict, row, repeats),
+    }
+    bulk_seconds = {}
+    for name, model in (('sklearn', forest), ('flat', flat)):
+        start = time.perf_counter()
+        proba = model.predict_proba(bulk)
+        bulk_seconds[name] = time.perf_counter() - start
+        if name == 'sklearn':
+            reference = proba
+    identical = bool(np.array_equal(proba, reference))
+
+    print(f"{flat.n_trees} trees, {len(flat.feature):,} nodes, max depth {flat.max_depth}, compiled in {compile_seconds * 1000:.1f} ms")
+    print(f"{'':>8} {'1 row ms':>9} {f'{rows:,} rows s':>14} {'rows/s':>11}")
+    for name in ('sklearn', 'flat'):
+        print(f"{name:>8} {single[name] * 1000:>9.3f} {bulk_seconds[name]:>14.3f} {rows / bulk_seconds[name]:>11,.0f}")
+    print(f"probabilities identical: {identical}")
+    return {'single_seconds': single, 'bulk_seconds': bulk_seconds, 'identical': identical}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark the flattened crop forest against the joblib model')
+    parser.add_argument('--model', default='model_storage/crop_random_forest.joblib', help='Crop recommendation model')
+    parser.add_argument('--data', default='Crop_Recommendation.csv', help='Rows to resample for the bulk run')
+    parser.add_argument('--rows', type=int, default=100_000, help='Rows in the bulk run')
+    args = parser.parse_args(argv)
+    result = benchmark(args.model, args.data, args.rows)
+    return 0 if result['identical'] else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,325 @@
+import os
+import sys
+import json
+import time
+import argparse
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import numpy as np
+from PIL import Image
+
+from crop_batch import FEATURE_COLUMNS
+from model_registry import file_digest, load_model
+
+# GeoTIFF layers are read window by window when rasterio is available
+try:
+    import rasterio
+    from rasterio.warp import transform_bounds
+    from rasterio.windows import Window
+except ImportError:
+    rasterio = None
+
+RASTER_EXTENSIONS = ('.tif', '.tiff')
+
+# Cells per block side; a block is the unit of work and of resumption
+BLOCK_SIZE = 512
+
+# Class raster value of cells with a missing layer value
+NODATA_CLASS = 255
+
+# Output files inside the run directory
+CLASS_FILE = 'crop_class.npy'
+CONFIDENCE_FILE = 'crop_confidence.npy'
+PROGRESS_FILE = 'blocks_done.npy'
+METADATA_FILE = 'suitability.json'
+
+# Folder holding one subfolder per run; the dashboard only opens runs inside it
+RUNS_DIR = 'suitability_runs'
+
+# Largest side of the image sent to the browser for the map overlay
+MAX_OVERLAY_PIXELS = 2048
+
+
+class ArrayLayer:
+    """Layer held in an .npy file, memory-mapped so only read blocks are paged in"""
+
+    def __init__(self, path):
+        self.array = np.load(path, mmap_mode='r')
+        self.shape = self.array.shape[:2]
+        self.bounds = None
+
+    def read(self, top, left, height, width):
+        return np.asarray(self.array[top:top + height, left:left + width], dtype=np.float32)
+
+
+class RasterLayer:
+    """Single-band GeoTIFF read through rasterio in windows; nodata reads as NaN"""
+
+    def __init__(self, path):
+        self.dataset = rasterio.open(path)
+        self.shape = (self.dataset.height, self.dataset.width)
+        self.bounds = None
+        if self.dataset.crs is not None:
+            west, south, east, north = transform_bounds(self.dataset.crs, 'EPSG:4326', *self.dataset.bounds)
+            self.bounds = (south, west, north, east)
+
+    def read(self, top, left, height, width):
+        data = self.dataset.read(1, window=Window(left, top, width, height), masked=True)
+        return data.astype(np.float32).filled(np.nan)
+
+
+def open_layer(path):
+    """ArrayLayer for `.npy`, RasterLayer for GeoTIFF"""
+    if os.path.splitext(path)[1].lower() in RASTER_EXTENSIONS:
+        if rasterio is None:
+            raise ImportError('Reading GeoTIFF layers needs rasterio; convert them to .npy instead')
+        return RasterLayer(path)
+    return ArrayLayer(path)
+
+
+def block_grid(shape, block_size):
+    """(block rows, block columns) covering a raster of `shape`"""
+    return -(-shape[0] // block_size), -(-shape[1] // block_size)
+
+
+# Per-worker state, set up once by _init_worker
+_worker = {}
+
+
+def _init_worker(layer_paths, model_path, output_dir):
+    _worker['layers'] = [open_layer(path) for path in layer_paths]
+    _worker['model'] = load_model(model_path)
+    _worker['classes'] = np.load(os.path.join(output_dir, CLASS_FILE), mmap_mode='r+')
+    _worker['confidence'] = np.load(os.path.join(output_dir, CONFIDENCE_FILE), mmap_mode='r+')
+
+
+def _score_block(block_row, block_col, block_size):
+    """Score one block in a worker and write it straight into the output rasters"""
+    height, width = _worker['classes'].shape
+    top, left = block_row * block_size, block_col * block_size
+    rows, cols = min(block_size, height - top), min(block_size, width - left)
+
+    features = np.stack([layer.read(top, left, rows, cols).ravel() for layer in _worker['layers']], axis=1)
+    valid = ~np.isnan(features).any(axis=1)
+    classes = np.full(len(features), NODATA_CLASS, dtype=np.uint8)
+    confidence = np.full(len(features), np.nan, dtype=np.float32)
+    if valid.any():
+        proba = _worker['model'].predict_proba(features[valid])
+        classes[valid] = proba.argmax(axis=1)
+        confidence[valid] = proba.max(axis=1)
+
+    _worker['classes'][top:top + rows, left:left + cols] = classes.reshape(rows, cols)
+    _worker['confidence'][top:top + rows, left:left + cols] = confidence.reshape(rows, cols)
+    _worker['classes'].flush()
+    _worker['confidence'].flush()
+    return block_row, block_col, int(valid.sum())
+
+
+def _prepare_run(output_dir, layer_paths, model_path, block_size, bounds):
+    """Create the output rasters, or check that an existing run matches these inputs"""
+    layers = [open_layer(path) for path in layer_paths]
+    shape = layers[0].shape
+    for path, layer in zip(layer_paths, layers):
+        if layer.shape != shape:
+            raise ValueError(f"{path} is {layer.shape[0]}x{layer.shape[1]}, expected {shape[0]}x{shape[1]}")
+
+    model = load_model(model_path)
+    metadata = {
+        'shape': list(shape),
+        'block_size': block_size,
+        'layers': dict(zip(FEATURE_COLUMNS, (os.path.abspath(path) for path in layer_paths))),
+        'model_sha256': file_digest(model_path),
+        'classes': model.classes_.tolist(),
+        'bounds': list(bounds or layers[0].bounds or []) or None,
+    }
+
+    metadata_path = os.path.join(output_dir, METADATA_FILE)
+    if os.path.exists(metadata_path):
+        with open(metadata_path) as f:
+            previous = json.load(f)
+        for key in ('shape', 'block_size', 'layers', 'model_sha256'):
+            if previous[key] != metadata[key]:
+                raise ValueError(f"{output_dir} holds a run with a different {key}; use a new directory")
+        return previous
+
+    os.makedirs(output_dir, exist_ok=True)
+    np.lib.format.open_memmap(os.path.join(output_dir, CLASS_FILE), 'w+', np.uint8, shape).flush()
+    np.lib.format.open_memmap(os.path.join(output_dir, CONFIDENCE_FILE), 'w+', np.float32, shape).flush()
+    np.save(os.path.join(output_dir, PROGRESS_FILE), np.zeros(block_grid(shape, block_size), dtype=bool))
+    # Written last: its presence marks a directory whose rasters exist
+    with open(metadata_path, 'w') as f:
+        json.dump(metadata, f, indent=2)
+    return metadata
+
+
+def score_suitability(layer_paths, output_dir, model_path, block_size=BLOCK_SIZE, bounds=None, jobs=None, report=None):
+    """
+    Crop class and confidence for every cell of a stack of gridded layers
+
+    Layers are memory-mapped (.npy) or read in windows (GeoTIFF), and the
+    grid is scored in square blocks by a process pool, each worker writing
+    its block into memory-mapped output rasters. Memory per worker is one
+    block whatever the grid size. Finished blocks are recorded in
+    blocks_done.npy, so rerunning with the same directory resumes where an
+    interrupted run stopped.
+
+    Args:
+        layer_paths (list): Seven rasters in FEATURE_COLUMNS order (N, P, K,
+            temperature, humidity, pH, rainfall), all the same shape
+        output_dir (str): Run directory for crop_class.npy (class index,
+            255 where a layer has no data), crop_confidence.npy (top class
+            probability) and suitability.json (classes, bounds, inputs)
+        bounds (tuple): (south, west, north, east) when the layers carry no georeferencing
+        report (callable): Optional progress callback(blocks done, blocks total, cells/sec)
+
+    Returns:
+        dict: Run metadata
+    """
+    if len(layer_paths) != len(FEATURE_COLUMNS):
+        raise ValueError(f"Expected {len(FEATURE_COLUMNS)} layers ({', '.join(FEATURE_COLUMNS)})")
+    metadata = _prepare_run(output_dir, layer_paths, model_path, block_size, bounds)
+
+    progress_path = os.path.join(output_dir, PROGRESS_FILE)
+    done = np.load(progress_path, mmap_mode='r+')
+    pending = list(zip(*np.nonzero(~done)))
+    total = done.size
+    finished = total - len(pending)
+    cells = 0
+    start = time.perf_counter()
+
+    with ProcessPoolExecutor(jobs, initializer=_init_worker, initargs=(layer_paths, model_path, output_dir)) as pool:
+        futures = [pool.submit(_score_block, int(row), int(col), block_size) for row, col in pending]
+        for future in as_completed(futures):
+            block_row, block_col, scored = future.result()
+            done[block_row, block_col] = True
+            done.flush()
+            finished += 1
+            cells += scored
+            if report is not None:
+                report(finished, total, cells / (time.perf_counter() - start))
+    return metadata
+
+
+def run_path(name, runs_dir=RUNS_DIR):
+    """
+    Directory of the run `name` inside `runs_dir`
+
+    Raises:
+        ValueError: If the name resolves (through '..', an absolute path or
+            a symlink) to anywhere outside `runs_dir`
+    """
+    base = os.path.realpath(runs_dir)
+    path = os.path.realpath(os.path.join(base, name))
+    if path == base or os.path.commonpath([base, path]) != base:
+        raise ValueError(f"Suitability run {name!r} is not inside {runs_dir!r}")
+    return path
+
+
+def list_runs(runs_dir=RUNS_DIR):
+    """Names of the finished or resumable runs in `runs_dir`, sorted"""
+    if not os.path.isdir(runs_dir):
+        return []
+    names = []
+    for name in sorted(os.listdir(runs_dir)):
+        try:
+            path = run_path(name, runs_dir)
+        except ValueError:
+            continue
+        if os.path.exists(os.path.join(path, METADATA_FILE)):
+            names.append(name)
+    return names
+
+
+def load_suitability(output_dir):
+    """
+    Results of a run, memory-mapped
+
+    Returns:
+        tuple: (class raster, confidence raster, metadata dict)
+    """
+    with open(os.path.join(output_dir, METADATA_FILE)) as f:
+        metadata = json.load(f)
+    return (
+        np.load(os.path.join(output_dir, CLASS_FILE), mmap_mode='r'),
+        np.load(os.path.join(output_dir, CONFIDENCE_FILE), mmap_mode='r'),
+        metadata,
+    )
+
+
+def class_colors(n_classes):
+    """Distinct RGB colour per crop class, spread around the hue circle"""
+    hue = np.arange(n_classes) / max(n_classes, 1)
+    hsv = np.stack([hue, np.full(n_classes, 0.75), np.full(n_classes, 0.9)], axis=1)
+    image = Image.fromarray((hsv[np.newaxis] * 255).astype(np.uint8), 'HSV').convert('RGB')
+    return np.asarray(image)[0]
+
+
+def suitability_rgba(classes, confidence, n_classes, max_pixels=MAX_OVERLAY_PIXELS):
+    """
+    RGBA image of a class raster, opacity following confidence
+
+    Large grids are subsampled to at most `max_pixels` per side, reading
+    only the sampled cells of the memory-mapped rasters.
+    """
+    step = max(1, -(-max(classes.shape) // max_pixels))
+    classes = np.asarray(classes[::step, ::step])
+    confidence = np.nan_to_num(np.asarray(confidence[::step, ::step]))
+    palette = np.zeros((256, 4), dtype=np.uint8)
+    palette[:n_classes, :3] = class_colors(n_classes)
+    rgba = palette[classes]
+    rgba[..., 3] = np.where(classes == NODATA_CLASS, 0, (np.clip(confidence, 0, 1) * 220).astype(np.uint8))
+    return rgba
+
+
+def suitability_overlay(output_dir, opacity=1.0, name='Crop suitability'):
+    """folium ImageOverlay of a finished run, stretched over its bounds"""
+    import folium
+
+    classes, confidence, metadata = load_suitability(output_dir)
+    if not metadata['bounds']:
+        raise ValueError('The run has no bounds; pass --bounds when scoring ungeoreferenced layers')
+    south, west, north, east = metadata['bounds']
+    return folium.raster_layers.ImageOverlay(
+        image=suitability_rgba(classes, confidence, len(metadata['classes'])),
+        bounds=[[south, west], [north, east]],
+        opacity=opacity,
+        name=name,
+    )
+
+
+def class_shares(classes, class_names, sample_step=1):
+    """Share of scored cells per crop, largest first (optionally on a subsampled grid)"""
+    counts = np.bincount(np.asarray(classes[::sample_step, ::sample_step]).ravel(), minlength=256)
+    counts = counts[:len(class_names)]
+    order = np.argsort(-counts, kind='stable')
+    total = counts.sum() or 1
+    return [(class_names[i], counts[i] / total) for i in order if counts[i]]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Score gridded soil/climate layers with the crop model, block by block')
+    parser.add_argument('output_dir', help=f'Run directory, e.g. {RUNS_DIR}/<name> to show it in the dashboard; '
+                                           'rerun with the same one to resume')
+    parser.add_argument('layers', nargs=len(FEATURE_COLUMNS), metavar='LAYER',
+                        help=f"Seven .npy/GeoTIFF layers in order: {', '.join(FEATURE_COLUMNS)}")
+    parser.add_argument('--model', default='model_storage/crop_random_forest.joblib', help='Crop recommendation model')
+    parser.add_argument('--block-size', type=int, default=BLOCK_SIZE, help='Cells per block side')
+    parser.add_argument('--bounds', type=float, nargs=4, metavar=('SOUTH', 'WEST', 'NORTH', 'EAST'),
+                        help='Lat/lon bounds for layers without georeferencing')
+    parser.add_argument('--jobs', type=int, help='Worker processes (default: all CPUs)')
+    parser.add_argument('--png', help='Optional RGBA preview of the class raster')
+    args = parser.parse_args(argv)
+
+    def report(done, total, rate):
+        print(f"{done}/{total} blocks, {rate:,.0f} cells/sec", flush=True)
+
+    metadata = score_suitability(args.layers, args.output_dir, args.model, args.block_size, args.bounds, args.jobs, report)
+    classes, confidence, _ = load_suitability(args.output_dir)
+    if args.png:
+        Image.fromarray(suitability_rgba(classes, confidence, len(metadata['classes']))).save(args.png)
+    step = max(1, max(classes.shape) // 1000)
+    for crop, share in class_shares(classes, metadata['classes'], step)[:5]:
+        print(f"{crop}: {share:.1%} of cells")
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,222 @@
+import io
+import os
+import sys
+import json
+import time
+import argparse
+import itertools
+from concurrent.futures import ProcessPoolExecutor
+import joblib
+import numpy as np
+import pandas as pd
+import sklearn
+from sklearn.ensemble import ExtraTreesClassifier, RandomForestClassifier
+from sklearn.model_selection import StratifiedKFold, cross_val_score, train_test_split
+
+from crop_batch import FEATURE_COLUMNS
+from crop_forest import flatten_forest
+from model_registry import file_digest
+
+DATA_PATH = 'Crop_Recommendation.csv'
+TARGET_COLUMN = 'Crop'
+MODEL_DIR = 'model_storage'
+MODEL_NAME = 'crop_random_forest'
+
+# Split and seeds of crop_pred.ipynb, fixed so reruns on the same data give the same model
+TEST_SIZE = 0.2
+RANDOM_STATE = 42
+CV_FOLDS = 5
+
+# Budget of the served model: single-row latency of its flattened form and serialized size
+MAX_LATENCY_MS = 2.0
+MAX_SIZE_MB = 10.0
+
+# Estimator families of the notebook and the hyperparameters searched for each
+SEARCH_SPACE = {
+    'RandomForestClassifier': (RandomForestClassifier, {
+        'n_estimators': [25, 50, 100, 200],
+        'max_depth': [None, 12],
+        'min_samples_leaf': [1, 2],
+    }),
+    'ExtraTreesClassifier': (ExtraTreesClassifier, {
+        'n_estimators': [25, 50, 100, 200],
+        'max_depth': [None, 12],
+        'min_samples_leaf': [1, 2],
+    }),
+}
+
+LATENCY_REPEATS = 200
+LOAD_REPEATS = 3
+
+
+def candidates(search_space=SEARCH_SPACE):
+    """Every (family, params) combination of the search space"""
+    for family, (_, grid) in search_space.items():
+        for values in itertools.product(*grid.values()):
+            yield family, dict(zip(grid, values))
+
+
+def _fit_candidate(family, params, X_train, y_train, X_test, y_test, folds, random_state):
+    """Runs in a pool worker: CV accuracy, then a fit on the whole training split"""
+    estimator, _ = SEARCH_SPACE[family]
+    model = estimator(random_state=random_state, **params)
+    splitter = StratifiedKFold(folds, shuffle=True, random_state=random_state)
+    scores = cross_val_score(model, X_train, y_train, cv=splitter)
+    model.fit(X_train, y_train)
+
+    artifact = io.BytesIO()
+    joblib.dump(model, artifact)
+    return {
+        'family': family,
+        'params': params,
+        'cv_accuracy': float(scores.mean()),
+        'cv_std': float(scores.std()),
+        'test_accuracy': float(model.score(X_test, y_test)),
+        'artifact': artifact.getvalue(),
+    }
+
+
+def _median_seconds(function, repeats):
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        function()
+        timings.append(time.perf_counter() - start)
+    return float(np.median(timings))
+
+
+def measure_serving_cost(artifact, row):
+    """
+    Serialized size, load time and single-row latency of a pickled forest
+
+    Latency is that of the flattened forest the app predicts with, next to
+    scikit-learn's own for reference.
+    """
+    model = joblib.load(io.BytesIO(artifact))
+    flat = flatten_forest(model)
+    return {
+        'size_mb': len(artifact) / 2**20,
+        'load_ms': _median_seconds(lambda: joblib.load(io.BytesIO(artifact)), LOAD_REPEATS) * 1000,
+        'latency_ms': _median_seconds(lambda: flat.predict(row), LATENCY_REPEATS) * 1000,
+        'sklearn_latency_ms': _median_seconds(lambda: model.predict(row), LATENCY_REPEATS // 10) * 1000,
+    }
+
+
+def select_model(results, max_latency_ms=MAX_LATENCY_MS, max_size_mb=MAX_SIZE_MB):
+    """
+    Most accurate candidate (by CV accuracy) within the latency and size budget
+
+    Ties go to the faster, then the smaller model.
+
+    Raises:
+        ValueError: No candidate fits the budget
+    """
+    eligible = [
+        result for result in results
+        if result['latency_ms'] <= max_latency_ms and result['size_mb'] <= max_size_mb
+    ]
+    if not eligible:
+        raise ValueError(f"No candidate within {max_latency_ms} ms and {max_size_mb} MB")
+    return max(eligible, key=lambda result: (result['cv_accuracy'], -result['latency_ms'], -result['size_mb']))
+
+
+def train_crop_model(data_path=DATA_PATH, model_dir=MODEL_DIR, model_name=MODEL_NAME,
+                     max_latency_ms=MAX_LATENCY_MS, max_size_mb=MAX_SIZE_MB,
+                     folds=CV_FOLDS, jobs=None, random_state=RANDOM_STATE, report=print):
+    """
+    Search, measure, select and save the crop recommendation model
+
+    Candidates are cross-validated and fitted in parallel worker processes.
+    Size, load time and latency are then measured one candidate at a time in
+    this process, so timings are not skewed by workers competing for CPU.
+    The artifact is replaced atomically, which the model registry picks up
+    as a hot reload, and a JSON sidecar next to it records metrics, feature
+    order, classes and the hash of the training data.
+
+    Returns:
+        dict: Sidecar metadata of the saved model
+    """
+    data = pd.read_csv(data_path)
+    X = data[FEATURE_COLUMNS].to_numpy(np.float32)
+    y = data[TARGET_COLUMN].to_numpy()
+    X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=TEST_SIZE, random_state=random_state)
+
+    grid = list(candidates())
+    report(f"Searching {len(grid)} candidates with {folds}-fold CV on {len(X_train)} rows")
+    with ProcessPoolExecutor(jobs) as pool:
+        futures = [
+            pool.submit(_fit_candidate, family, params, X_train, y_train, X_test, y_test, folds, random_state)
+            for family, params in grid
+        ]
+        results = [future.result() for future in futures]
+
+    row = X_test[:1]
+    for result in results:
+        result.update(measure_serving_cost(result['artifact'], row))
+        report(
+            f"{result['family']} {result['params']}: cv {result['cv_accuracy']:.4f}, "
+            f"test {result['test_accuracy']:.4f}, {result['size_mb']:.1f} MB, "
+            f"load {result['load_ms']:.0f} ms, {result['latency_ms']:.2f} ms/row"
+        )
+
+    best = select_model(results, max_latency_ms, max_size_mb)
+    model = joblib.load(io.BytesIO(best['artifact']))
+    metrics = ('cv_accuracy', 'cv_std', 'test_accuracy', 'size_mb', 'load_ms', 'latency_ms', 'sklearn_latency_ms')
+    metadata = {
+        'model': best['family'],
+        'params': best['params'],
+        'metrics': {key: best[key] for key in metrics},
+        'feature_order': FEATURE_COLUMNS,
+        'classes': model.classes_.tolist(),
+        'data_path': os.path.basename(data_path),
+        'data_sha256': file_digest(data_path),
+        'data_rows': len(data),
+        'test_size': TEST_SIZE,
+        'cv_folds': folds,
+        'random_state': random_state,
+        'budget': {'max_latency_ms': max_latency_ms, 'max_size_mb': max_size_mb},
+        'sklearn_version': sklearn.__version__,
+        'trained_at': pd.Timestamp.now(tz='UTC').isoformat(),
+        'candidates': [
+            {'model': result['family'], 'params': result['params'], **{key: result[key] for key in metrics}}
+            for result in results
+        ],
+    }
+
+    os.makedirs(model_dir, exist_ok=True)
+    path = os.path.join(model_dir, f"{model_name}.joblib")
+    with open(path + '.tmp', 'wb') as f:
+        f.write(best['artifact'])
+    os.replace(path + '.tmp', path)
+    with open(os.path.join(model_dir, f"{model_name}.json"), 'w') as f:
+        json.dump(metadata, f, indent=2)
+
+    report(
+        f"Selected {best['family']} {best['params']}: cv {best['cv_accuracy']:.4f}, "
+        f"{best['size_mb']:.1f} MB, {best['latency_ms']:.2f} ms/row -> {path}"
+    )
+    return metadata
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Train and select the crop recommendation model')
+    parser.add_argument('--data', default=DATA_PATH, help='Training data in Crop_Recommendation.csv layout')
+    parser.add_argument('--model-dir', default=MODEL_DIR)
+    parser.add_argument('--name', default=MODEL_NAME, help='Artifact name; the app loads crop_random_forest')
+    parser.add_argument('--max-latency-ms', type=float, default=MAX_LATENCY_MS, help='Single-row latency budget')
+    parser.add_argument('--max-size-mb', type=float, default=MAX_SIZE_MB, help='Serialized size budget')
+    parser.add_argument('--folds', type=int, default=CV_FOLDS)
+    parser.add_argument('--jobs', type=int, help='Worker processes (default: all CPUs)')
+    parser.add_argument('--seed', type=int, default=RANDOM_STATE)
+    args = parser.parse_args(argv)
+
+    try:
+        train_crop_model(args.data, args.model_dir, args.name, args.max_latency_ms, args.max_size_mb,
+                         args.folds, args.jobs, args.seed)
+    except ValueError as e:
+        print(e, file=sys.stderr)
+        return 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,121 @@
+import os
+import threading
+import numpy as np
+import pandas as pd
+
+from model_registry import file_digest
+
+# Local factor file: one row per (region, year, activity) with the factor and its unit
+FACTORS_PATH = 'emission_factors.csv'
+
+# Activities in the order of the activity matrix columns, and the pseudo-activity holding the tax rate
+ACTIVITY_COLUMNS = ['Electricity', 'Natural Gas', 'Personal Car', 'Public Transit', 'Flight Miles']
+CARBON_TAX = 'Carbon Tax'
+
+# Region every other region falls back to for activities and years it does not define
+DEFAULT_REGION = 'India'
+
+
+class EmissionFactorTable:
+    """
+    Emission factors compiled into a dense (region, year, activity) array
+
+    Gaps are resolved once at compile time: a region inherits its own most
+    recent earlier year, then the default region. Lookups are therefore pure
+    index arithmetic: region codes through a pandas Index, years through
+    searchsorted (a year between or beyond the table's years uses the latest
+    one not after it, years before the first use the first), and factors by
+    fancy indexing.
+    """
+
+    def __init__(self, frame, version, default_region=DEFAULT_REGION):
+        """
+        Args:
+            frame (pd.DataFrame): region, year, activity, factor[, unit] rows
+            version (str): Identifies the data the table was built from
+        """
+        unknown = set(frame['activity']) - set(ACTIVITY_COLUMNS) - {CARBON_TAX}
+        if unknown:
+            raise ValueError(f"Unknown activities in emission factors: {', '.join(sorted(unknown))}")
+        if default_region not in set(frame['region']):
+            raise ValueError(f"Emission factors have no rows for the default region {default_region!r}")
+
+        self.version = version
+        self.default_region = default_region
+        self.regions = pd.Index([default_region] + sorted(set(frame['region']) - {default_region}))
+        self.years = np.array(sorted(frame['year'].unique()), dtype=np.int64)
+        self.activities = ACTIVITY_COLUMNS + [CARBON_TAX]
+        self.units = frame.drop_duplicates('activity').set_index('activity').get('unit')
+
+        values = np.full((len(self.regions), len(self.years), len(self.activities)), np.nan)
+        values[
+            self.regions.get_indexer(frame['region']),
+            np.searchsorted(self.years, frame['year']),
+            pd.Index(self.activities).get_indexer(frame['activity']),
+        ] = frame['factor'].to_numpy(np.float64)
+
+        # Carry each region's values forward to later years
+        for year in range(1, len(self.years)):
+            values[:, year] = np.where(np.isnan(values[:, year]), values[:, year - 1], values[:, year])
+        # The default region's earliest values also cover the years before them
+        default = values[0]
+        for year in range(len(self.years) - 2, -1, -1):
+            default[year] = np.where(np.isnan(default[year]), default[year + 1], default[year])
+        missing = [activity for activity, value in zip(self.activities, default[-1]) if np.isnan(value)]
+        if missing:
+            raise ValueError(f"Default region {default_region!r} lacks factors for {', '.join(missing)}")
+        values = np.where(np.isnan(values), default, values)
+
+        self.factors = np.ascontiguousarray(values[..., :len(ACTIVITY_COLUMNS)])
+        self.tax_rates = np.ascontiguousarray(values[..., -1])
+
+    @property
+    def latest_year(self):
+        return int(self.years[-1])
+
+    def indices(self, regions, years):
+        """(region, year) array indices; unknown regions map to the default region"""
+        regions = np.atleast_1d(np.asarray(regions, dtype=object))
+        years = np.atleast_1d(np.asarray(years, dtype=np.int64))
+        region_index = self.regions.get_indexer(regions)
+        region_index[region_index < 0] = 0
+        year_index = np.clip(np.searchsorted(self.years, years, side='right') - 1, 0, len(self.years) - 1)
+        return np.broadcast_arrays(region_index, year_index)
+
+    def lookup(self, regions, years):
+        """
+        Factors and tax rates for each (region, year) pair
+
+        Args:
+            regions: Region name or array of names
+            years: Year or array of years, broadcast against `regions`
+
+        Returns:
+            tuple: ((n, activities) kg CO2 per unit, (n,) ₹ per kg CO2)
+        """
+        region_index, year_index = self.indices(regions, years)
+        return self.factors[region_index, year_index], self.tax_rates[region_index, year_index]
+
+
+# Compiled tables by file, rebuilt when the file's size or mtime changes
+_tables = {}
+_tables_lock = threading.Lock()
+
+
+def load_emission_factors(path=FACTORS_PATH):
+    """
+    Process-wide EmissionFactorTable of a factor file
+
+    The version is the file name plus the start of its SHA-256, so every
+    result can name the exact factor data behind it.
+    """
+    path = os.path.abspath(path)
+    stat = os.stat(path)
+    signature = (stat.st_size, stat.st_mtime_ns)
+    with _tables_lock:
+        cached = _tables.get(path)
+        if cached is None or cached[0] != signature:
+            version = f"{os.path.basename(path)}@{file_digest(path)[:12]}"
+            cached = (signature, EmissionFactorTable(pd.read_csv(path), version))
+            _tables[path] = cached
+        return cached[1]
@@ -0,0 +1,204 @@
+import copy
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from fire_query import load_fire_engine
+from fire_store import source_signature
+
+# Map zoom levels that get precomputed cells; past the last one raw points are shown
+PYRAMID_ZOOMS = tuple(range(3, 10))
+
+# A cell is about 16 screen pixels wide: a 256px tile spans 360 / 2**zoom degrees
+CELL_DEGREES_AT_ZOOM_0 = 22.5
+
+STAT_COLUMNS = ['count', 'max_frp', 'sum_brightness']
+
+
+def cell_degrees(zoom):
+    """Edge length in degrees of the square cells used at a map zoom level"""
+    return CELL_DEGREES_AT_ZOOM_0 / 2 ** zoom
+
+
+def _grid_columns(zoom):
+    return int(np.ceil(360 / cell_degrees(zoom)))
+
+
+def cell_keys(latitude, longitude, zoom):
+    """Integer cell id of every point at the given zoom level"""
+    size = cell_degrees(zoom)
+    rows = np.floor((np.asarray(latitude, dtype=np.float64) + 90) / size).astype(np.int64)
+    cols = np.floor((np.asarray(longitude, dtype=np.float64) + 180) / size).astype(np.int64)
+    return rows * _grid_columns(zoom) + cols
+
+
+def cell_bounds(keys, zoom):
+    """(south, west, north, east) arrays for a set of cell ids"""
+    size = cell_degrees(zoom)
+    rows, cols = np.divmod(np.asarray(keys, dtype=np.int64), _grid_columns(zoom))
+    south = rows * size - 90
+    west = cols * size - 180
+    return south, west, south + size, west + size
+
+
+def _finish_cells(stats, zoom):
+    """Turn per-cell sums into the frame the map layer draws"""
+    south, west, north, east = cell_bounds(stats.index.to_numpy(), zoom)
+    return pd.DataFrame({
+        'cell': stats.index.to_numpy(),
+        'south': south,
+        'west': west,
+        'north': north,
+        'east': east,
+        'count': stats['count'].to_numpy(),
+        'max_frp': stats['max_frp'].to_numpy(),
+        'mean_brightness': (stats['sum_brightness'] / stats['count']).to_numpy(),
+    })
+
+
+def aggregate_detections(data, zoom):
+    """
+    Bin detections into the square cells of one zoom level
+
+    Returns:
+        pd.DataFrame: One row per occupied cell with its bounds, detection
+        count, max `frp` and mean `brightness`
+    """
+    keys = cell_keys(data['latitude'].to_numpy(), data['longitude'].to_numpy(), zoom)
+    stats = pd.DataFrame({
+        'cell': keys,
+        'frp': data['frp'].to_numpy(),
+        'brightness': data['brightness'].to_numpy(np.float64),
+    }).groupby('cell').agg(
+        count=('frp', 'size'),
+        max_frp=('frp', 'max'),
+        sum_brightness=('brightness', 'sum'),
+    )
+    return _finish_cells(stats, zoom)
+
+
+def coarsen_cells(cells, zoom):
+    """
+    Merge cells into the larger cells of a coarser zoom level
+
+    Cell grids of successive zooms nest exactly, so each cell falls wholly
+    inside one coarser cell; counts add up, max FRP takes the maximum and
+    mean brightness is re-weighted by count.
+    """
+    keys = cell_keys(
+        ((cells['south'] + cells['north']) / 2).to_numpy(),
+        ((cells['west'] + cells['east']) / 2).to_numpy(),
+        zoom
+    )
+    stats = pd.DataFrame({
+        'cell': keys,
+        'count': cells['count'].to_numpy(),
+        'max_frp': cells['max_frp'].to_numpy(),
+        'sum_brightness': (cells['mean_brightness'] * cells['count']).to_numpy(np.float64),
+    }).groupby('cell').agg(
+        count=('count', 'sum'),
+        max_frp=('max_frp', 'max'),
+        sum_brightness=('sum_brightness', 'sum'),
+    )
+    return _finish_cells(stats, zoom)
+
+
+class FireAggregationPyramid:
+    """Per-day, per-cell detection statistics at several zoom levels"""
+
+    def __init__(self, zooms=PYRAMID_ZOOMS):
+        self.zooms = tuple(zooms)
+        empty = pd.DataFrame({
+            'day': np.empty(0, dtype=np.int64),
+            'cell': np.empty(0, dtype=np.int64),
+            'count': np.empty(0, dtype=np.int64),
+            'max_frp': np.empty(0, dtype=np.float32),
+            'sum_brightness': np.empty(0, dtype=np.float64),
+        })
+        # One table per zoom, sorted by (day, cell)
+        self.levels = {zoom: empty.copy() for zoom in self.zooms}
+
+    def update(self, data):
+        """
+        Fold a batch of detections into every level
+
+        Only rows of days present in the batch are re-aggregated; the rest of
+        each level is reused as is, so a daily NRT drop touches one day's cells.
+
+        Args:
+            data (pd.DataFrame): Typed detections (see fire_store)
+        """
+        if len(data) == 0:
+            return
+        days = data['acq_datetime'].to_numpy().astype('datetime64[D]').astype(np.int64)
+        first_day, last_day = days.min(), days.max()
+
+        for zoom in self.zooms:
+            batch = pd.DataFrame({
+                'day': days,
+                'cell': cell_keys(data['latitude'].to_numpy(), data['longitude'].to_numpy(), zoom),
+                'count': 1,
+                'max_frp': data['frp'].to_numpy(),
+                'sum_brightness': data['brightness'].to_numpy(np.float64),
+            })
+
+            level = self.levels[zoom]
+            level_days = level['day'].to_numpy()
+            lo = np.searchsorted(level_days, first_day, side='left')
+            hi = np.searchsorted(level_days, last_day, side='right')
+
+            merged = pd.concat([level.iloc[lo:hi], batch]).groupby(['day', 'cell'], sort=True).agg(
+                count=('count', 'sum'),
+                max_frp=('max_frp', 'max'),
+                sum_brightness=('sum_brightness', 'sum'),
+            ).reset_index()
+            self.levels[zoom] = pd.concat([level.iloc[:lo], merged, level.iloc[hi:]], ignore_index=True)
+
+    def snapshot(self):
+        """Pyramid as of now; update() replaces level tables, so copying the dict is enough"""
+        view = copy.copy(self)
+        view.levels = dict(self.levels)
+        return view
+
+    def cells(self, zoom, start=None, end=None):
+        """
+        Cells of one zoom level for detections between two dates (inclusive)
+
+        Returns:
+            pd.DataFrame: Same layout as aggregate_detections
+        """
+        level = self.levels[zoom]
+        level_days = level['day'].to_numpy()
+        lo = 0 if start is None else np.searchsorted(level_days, np.datetime64(start, 'D').astype(np.int64), side='left')
+        hi = len(level) if end is None else np.searchsorted(level_days, np.datetime64(end, 'D').astype(np.int64), side='right')
+
+        stats = level.iloc[lo:hi].groupby('cell').agg(
+            count=('count', 'sum'),
+            max_frp=('max_frp', 'max'),
+            sum_brightness=('sum_brightness', 'sum'),
+        )
+        return _finish_cells(stats, zoom)
+
+
+def fire_cell_levels(pyramid, filtered_data, start, end, min_confidence=0):
+    """
+    Cells for every pyramid zoom matching the current map filters
+
+    The pyramid has no confidence dimension, so with a confidence threshold
+    the already filtered detections are binned directly instead.
+    """
+    if min_confidence > 0:
+        return {zoom: aggregate_detections(filtered_data, zoom) for zoom in pyramid.zooms}
+    return {zoom: pyramid.cells(zoom, start, end) for zoom in pyramid.zooms}
+
+
+@st.cache_resource(show_spinner=False, max_entries=8)
+def _build_fire_pyramid(path, signature):
+    pyramid = FireAggregationPyramid()
+    pyramid.update(load_fire_engine(path).data)
+    return pyramid
+
+
+def load_fire_pyramid(path):
+    """Shared aggregation pyramid over the detections in `path`"""
+    return _build_fire_pyramid(path, source_signature(path))
@@ -0,0 +1,311 @@
+import os
+import sys
+import json
+import time
+import argparse
+from datetime import date, datetime, timedelta
+import pandas as pd
+import streamlit as st
+
+from fire_aggregation import FireAggregationPyramid
+from fire_events import FireEventEngine
+from fire_ingest import DEDUP_COLUMNS, SeenDetections, detection_hashes
+from fire_query import FireQueryEngine
+from fire_spatial import FireSpatialIndex
+from fire_store import concat_fire_frames, read_fire_csv, source_signature
+
+CATALOG_NAME = '_catalog.json'
+
+# Columns every read needs for pruning and exact filtering
+FILTER_COLUMNS = ['acq_datetime', 'confidence', 'latitude', 'longitude']
+
+IMPORT_CHUNK_ROWS = 500_000
+
+# The map opens on the archive's last month, and wider selections are capped
+# so one date range cannot pull the whole multi-year archive into memory
+DEFAULT_WINDOW_DAYS = 30
+MAX_WINDOW_DAYS = 366
+
+
+def _time_window(start, end):
+    """[lo, hi) timestamps for inclusive start/end, a `date` end covering that whole day"""
+    lo = pd.Timestamp.min if start is None else pd.Timestamp(start)
+    if end is None:
+        hi = pd.Timestamp.max
+    elif isinstance(end, date) and not isinstance(end, datetime):
+        hi = pd.Timestamp(end + timedelta(days=1))
+    else:
+        hi = pd.Timestamp(end) + pd.Timedelta(1, unit='ns')
+    return lo, hi
+
+
+class FireArchive:
+    """
+    Multi-year fire detections stored as year/month (and instrument/satellite) Parquet partitions
+
+    A JSON catalog keeps per-partition row counts and min/max statistics for
+    time, confidence and coordinates, so queries open only the partitions
+    that can contain matching rows. Writes skip detections the archive
+    already holds, so re-importing an overlapping export adds nothing twice.
+    """
+
+    def __init__(self, root, by_source=True):
+        """
+        Args:
+            root (str): Archive directory
+            by_source (bool): Also partition by instrument and satellite
+        """
+        self.root = root
+        self.by_source = by_source
+        self.catalog_path = os.path.join(root, CATALOG_NAME)
+        self.partitions = []
+        # Detection hashes per partition folder, loaded the first time a write touches it
+        self._seen = {}
+        if os.path.exists(self.catalog_path):
+            with open(self.catalog_path) as f:
+                catalog = json.load(f)
+            self.by_source = catalog['by_source']
+            self.partitions = catalog['partitions']
+
+    def __len__(self):
+        return sum(partition['rows'] for partition in self.partitions)
+
+    def _save_catalog(self):
+        os.makedirs(self.root, exist_ok=True)
+        with open(self.catalog_path + '.tmp', 'w') as f:
+            json.dump({'by_source': self.by_source, 'partitions': self.partitions}, f, indent=1)
+        os.replace(self.catalog_path + '.tmp', self.catalog_path)
+
+    def _seen_in(self, folder):
+        """SeenDetections of every detection already stored in a partition folder"""
+        if folder not in self._seen:
+            seen = SeenDetections()
+            stored = [
+                pd.read_parquet(os.path.join(self.root, partition['path']), columns=DEDUP_COLUMNS)
+                for partition in self.partitions if os.path.dirname(partition['path']) == folder
+            ]
+            if stored:
+                seen.filter_new(detection_hashes(concat_fire_frames(stored)))
+            self._seen[folder] = seen
+        return self._seen[folder]
+
+    def write(self, frame):
+        """
+        Append typed detections, splitting them into their partitions
+
+        Rows whose (latitude, longitude, acq_datetime, satellite) is already
+        in their partition folder, or repeated within `frame`, are dropped.
+
+        Args:
+            frame (pd.DataFrame): Typed detections (see fire_store)
+
+        Returns:
+            int: Number of rows written
+        """
+        if len(frame) == 0:
+            return 0
+        written = 0
+        times = frame['acq_datetime']
+        keys = [times.dt.year.rename('year'), times.dt.month.rename('month')]
+        if self.by_source:
+            keys += [frame['instrument'].astype(str), frame['satellite'].astype(str)]
+
+        for key, part in frame.groupby(keys, sort=True, observed=True):
+            year, month = int(key[0]), int(key[1])
+            folder = os.path.join(f"year={year}", f"month={month:02d}")
+            if self.by_source:
+                folder = os.path.join(folder, f"instrument={key[2]}", f"satellite={key[3]}")
+            part = part[self._seen_in(folder).filter_new(detection_hashes(part))]
+            if len(part) == 0:
+                continue
+            os.makedirs(os.path.join(self.root, folder), exist_ok=True)
+
+            relative = os.path.join(folder, f"part-{time.time_ns()}.parquet")
+            part = part.sort_values('acq_datetime', kind='stable')
+            part.to_parquet(os.path.join(self.root, relative), index=False)
+
+            self.partitions.append({
+                'path': relative,
+                'year': year,
+                'month': month,
+                'instrument': key[2] if self.by_source else None,
+                'satellite': key[3] if self.by_source else None,
+                'rows': len(part),
+                'min_time': part['acq_datetime'].iloc[0].isoformat(),
+                'max_time': part['acq_datetime'].iloc[-1].isoformat(),
+                'min_confidence': int(part['confidence'].min()),
+                'max_confidence': int(part['confidence'].max()),
+                'south': float(part['latitude'].min()),
+                'north': float(part['latitude'].max()),
+                'west': float(part['longitude'].min()),
+                'east': float(part['longitude'].max()),
+            })
+            written += len(part)
+        if written:
+            self._save_catalog()
+        return written
+
+    def import_csv(self, path, chunk_rows=IMPORT_CHUNK_ROWS):
+        """
+        Stream a FIRMS CSV into the archive chunk by chunk
+
+        Returns:
+            tuple: (rows read, rows added); the rest were already archived
+        """
+        rows = added = 0
+        for chunk in read_fire_csv(path, chunksize=chunk_rows):
+            added += self.write(chunk)
+            rows += len(chunk)
+        return rows, added
+
+    def date_bounds(self):
+        """First and last acquisition date in the archive"""
+        if not self.partitions:
+            return None, None
+        return (
+            min(pd.Timestamp(partition['min_time']) for partition in self.partitions).date(),
+            max(pd.Timestamp(partition['max_time']) for partition in self.partitions).date(),
+        )
+
+    def prune(self, start=None, end=None, min_confidence=0, bbox=None, instruments=None, satellites=None):
+        """
+        Partitions whose statistics allow a match
+
+        Returns:
+            list: Catalog entries to read
+        """
+        lo, hi = _time_window(start, end)
+        selected = []
+        for partition in self.partitions:
+            if pd.Timestamp(partition['max_time']) < lo or pd.Timestamp(partition['min_time']) >= hi:
+                continue
+            if partition['max_confidence'] < min_confidence:
+                continue
+            if bbox is not None:
+                south, west, north, east = bbox
+                if partition['north'] < south or partition['south'] > north:
+                    continue
+                if partition['east'] < west or partition['west'] > east:
+                    continue
+            if instruments and partition['instrument'] not in instruments:
+                continue
+            if satellites and partition['satellite'] not in satellites:
+                continue
+            selected.append(partition)
+        return selected
+
+    def read(self, start=None, end=None, min_confidence=0, bbox=None, instruments=None, satellites=None, columns=None):
+        """
+        Detections matching the filters, reading only the pruned partitions
+
+        Inside each file Parquet row-group statistics skip the rest of the
+        time range, and only `columns` (plus those needed to filter) are read.
+
+        Returns:
+            pd.DataFrame: Matching rows sorted by acquisition time
+        """
+        partitions = self.prune(start, end, min_confidence, bbox, instruments, satellites)
+        if not partitions and self.partitions:
+            # Nothing can match, but read one file so the empty result keeps its dtypes
+            partitions = self.partitions[:1]
+        read_columns = None if columns is None else list(dict.fromkeys(list(columns) + FILTER_COLUMNS))
+        lo, hi = _time_window(start, end)
+        filters = []
+        if start is not None:
+            filters.append(('acq_datetime', '>=', lo))
+        if end is not None:
+            filters.append(('acq_datetime', '<', hi))
+        if min_confidence > 0:
+            filters.append(('confidence', '>=', min_confidence))
+
+        frames = [
+            pd.read_parquet(os.path.join(self.root, partition['path']), columns=read_columns, filters=filters or None)
+            for partition in partitions
+        ]
+        frame = concat_fire_frames(frames)
+        if len(frame) == 0:
+            return frame
+
+        result = FireQueryEngine(frame).query(start, end, min_confidence, bbox)
+        return result if columns is None else result[list(columns)]
+
+
+def default_window(min_date, max_date, days=DEFAULT_WINDOW_DAYS):
+    """The last `days` days of [min_date, max_date]"""
+    return max(min_date, max_date - timedelta(days=days)), max_date
+
+
+def cap_window(start, end, max_days=MAX_WINDOW_DAYS):
+    """
+    Limit a date window to its last `max_days` days
+
+    Returns:
+        tuple: (start, end, capped) with capped True when start was moved
+    """
+    if (end - start).days <= max_days:
+        return start, end, False
+    return end - timedelta(days=max_days), end, True
+
+
+def archive_signature(root):
+    """Changes whenever the catalog is rewritten, i.e. on every archive write"""
+    path = os.path.join(root, CATALOG_NAME)
+    return source_signature(path) if os.path.exists(path) else None
+
+
+def open_fire_archive(root):
+    """FireArchive at `root`, or None when no archive has been written there"""
+    if archive_signature(root) is None:
+        return None
+    return FireArchive(root)
+
+
+# Each entry holds a whole window's engine, index, pyramid and events
+@st.cache_resource(show_spinner=False, max_entries=2)
+def _load_fire_window(root, signature, start, end):
+    engine = FireQueryEngine(FireArchive(root).read(start, end))
+    data = engine.data
+    spatial_index = FireSpatialIndex(data['latitude'].to_numpy(), data['longitude'].to_numpy())
+    pyramid = FireAggregationPyramid()
+    pyramid.update(data)
+    events = FireEventEngine()
+    events.update(data)
+    return engine, spatial_index, pyramid, events
+
+
+def load_fire_window(root, start, end):
+    """
+    Query engine, spatial index, pyramid and fire events over one date window of the archive
+
+    Only the partitions overlapping [start, end] are loaded, so memory tracks
+    the selected window rather than the archive; callers cap the window
+    with cap_window. Confidence and viewport
+    filters then run on the window as usual.
+
+    Returns:
+        tuple: (FireQueryEngine, FireSpatialIndex, FireAggregationPyramid, FireEventEngine)
+    """
+    return _load_fire_window(root, archive_signature(root), start, end)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Import FIRMS CSV files into a partitioned fire archive')
+    parser.add_argument('root', help='Archive directory')
+    parser.add_argument('csv', nargs='+', help='FIRMS CSV files to import')
+    parser.add_argument('--no-source-partitions', action='store_true',
+                        help='Partition by year/month only, not instrument/satellite')
+    args = parser.parse_args(argv)
+
+    archive = FireArchive(args.root, by_source=not args.no_source_partitions)
+    for path in args.csv:
+        start = time.perf_counter()
+        rows, added = archive.import_csv(path)
+        print(
+            f"{os.path.basename(path)}: {rows} rows, {added} new, {rows - added} duplicates "
+            f"in {time.perf_counter() - start:.2f}s"
+        )
+    print(f"Archive now holds {len(archive)} rows in {len(archive.partitions)} partitions")
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,285 @@
+import io
+import os
+import sys
+import time
+import hashlib
+import argparse
+import threading
+from collections import OrderedDict
+import numpy as np
+import pandas as pd
+from PIL import Image
+
+# Input size and decision threshold of the fire detection CNN
+IMAGE_SIZE = (224, 224)
+FIRE_THRESHOLD = 0.5
+
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png')
+BATCH_SIZE = 32
+
+# Probabilities remembered by image content hash
+PREDICTION_CACHE_ENTRIES = 4096
+
+# 'keras' runs the .h5 model; the others its quantized TFLite exports (see fire_tflite)
+BACKENDS = ('keras', 'float16', 'int8')
+
+
+def fire_label(probability):
+    return 'Fire Detected' if probability > FIRE_THRESHOLD else 'No Fire'
+
+
+def fire_model_predictor(model):
+    """Batch predict function for the fire detection CNN: images -> fire probabilities"""
+    def predict_batch(images):
+        return model(images, training=False).numpy().reshape(len(images), -1)[:, 0]
+    return predict_batch
+
+
+def tflite_path(model_path, mode):
+    """Where the `mode` export of a Keras model lives: next to it, e.g. model.int8.tflite"""
+    return f"{os.path.splitext(model_path)[0]}.{mode}.tflite"
+
+
+class TFLitePredictor:
+    """Batch predict function over a TFLite model, interchangeable with fire_model_predictor"""
+
+    def __init__(self, path, num_threads=None):
+        # TensorFlow is imported by whatever first needs the model, not by importing this module
+        import tensorflow as tf
+
+        self.interpreter = tf.lite.Interpreter(model_path=path, num_threads=num_threads or os.cpu_count())
+        self.input_index = self.interpreter.get_input_details()[0]['index']
+        self.output_index = self.interpreter.get_output_details()[0]['index']
+        self.batch_size = None
+        # One interpreter serves every caller, but it is not thread-safe
+        self._lock = threading.Lock()
+
+    def __call__(self, images):
+        images = np.asarray(images, dtype=np.float32)
+        with self._lock:
+            if len(images) != self.batch_size:
+                self.interpreter.resize_tensor_input(self.input_index, images.shape)
+                self.interpreter.allocate_tensors()
+                self.batch_size = len(images)
+            self.interpreter.set_tensor(self.input_index, images)
+            self.interpreter.invoke()
+            return self.interpreter.get_tensor(self.output_index).reshape(len(images), -1)[:, 0].copy()
+
+
+def load_fire_predictor(model_path, backend='keras'):
+    """
+    Batch predict function (images -> fire probabilities) for a backend
+
+    Args:
+        model_path (str): Keras .h5 model; TFLite backends load its exports
+        backend (str): One of BACKENDS
+    """
+    if backend == 'keras':
+        import tensorflow as tf
+        return fire_model_predictor(tf.keras.models.load_model(model_path))
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown fire model backend {backend!r}, expected one of {BACKENDS}")
+    return TFLitePredictor(tflite_path(model_path, backend))
+
+
+# Warmed predictors shared by everything in the process, by (model path, backend)
+_shared_predictors = {}
+_shared_lock = threading.Lock()
+
+
+def shared_fire_predictor(model_path, backend='keras'):
+    """
+    Process-wide predictor for a model and backend, loaded and warmed once
+
+    The first call loads the model and runs a dummy batch through it, so
+    weight setup and kernel selection are paid before the first real image.
+    Callers arriving while a load is in progress wait for it rather than
+    loading a second copy.
+    """
+    key = (model_path, backend)
+    with _shared_lock:
+        if key not in _shared_predictors:
+            predict_batch = load_fire_predictor(model_path, backend)
+            predict_batch(np.zeros((1,) + IMAGE_SIZE + (3,), dtype=np.float32))
+            _shared_predictors[key] = predict_batch
+        return _shared_predictors[key]
+
+
+def decode_image(contents):
+    """
+    Decode and resize encoded image bytes the way load_img(target_size=224x224) does
+
+    Returns:
+        tf.Tensor: float32 image of IMAGE_SIZE with 3 channels, values 0-255
+    """
+    import tensorflow as tf
+
+    image = tf.io.decode_image(contents, channels=3, expand_animations=False)
+    image = tf.image.resize(image, IMAGE_SIZE, method='nearest')
+    return tf.cast(image, tf.float32)
+
+
+def read_image_bytes(image):
+    """Encoded bytes of an uploaded file (or any file-like object) or of an image path"""
+    if hasattr(image, 'getvalue'):
+        return image.getvalue()
+    if hasattr(image, 'read'):
+        return image.read()
+    with open(image, 'rb') as f:
+        return f.read()
+
+
+def decode_image_fast(contents):
+    """
+    Decode encoded image bytes straight to the 224x224 network input
+
+    For JPEGs, PIL's draft mode makes the decoder itself downscale by 1/2,
+    1/4 or 1/8 (DCT scaling) to the smallest size still at least 224x224,
+    so a multi-megapixel photo is never decoded at full resolution. The
+    final resize is nearest-neighbour like load_img.
+
+    Returns:
+        np.ndarray: float32 (224, 224, 3) image, values 0-255
+    """
+    with Image.open(io.BytesIO(contents)) as image:
+        size = IMAGE_SIZE[::-1]
+        image.draft('RGB', size)
+        return np.asarray(image.convert('RGB').resize(size, Image.NEAREST), dtype=np.float32)
+
+
+def image_digest(contents):
+    return hashlib.sha256(contents).hexdigest()
+
+
+class PredictionCache:
+    """Thread-safe LRU map from image SHA-256 to fire probability, with hit/miss counters"""
+
+    def __init__(self, max_entries=PREDICTION_CACHE_ENTRIES):
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.entries)
+
+    def get(self, key):
+        """Cached probability for `key`, or None"""
+        with self._lock:
+            if key in self.entries:
+                self.entries.move_to_end(key)
+                self.hits += 1
+                return self.entries[key]
+            self.misses += 1
+            return None
+
+    def put(self, key, probability):
+        with self._lock:
+            self.entries[key] = probability
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            'entries': len(self.entries),
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+        }
+
+
+def image_dataset(names, contents=None, batch_size=BATCH_SIZE):
+    """
+    Parallel read/decode/resize pipeline yielding (names, images) batches
+
+    Files are read and decoded on tf.data worker threads and the next
+    batches are prefetched while the model runs on the current one.
+    Images that fail to decode are dropped from the stream.
+
+    Args:
+        names (list): Image paths, or labels when `contents` is given
+        contents (list): Encoded image bytes (e.g. uploaded files), read from `names` if None
+        batch_size (int): Images per forward pass
+    """
+    import tensorflow as tf
+
+    if contents is None:
+        dataset = tf.data.Dataset.from_tensor_slices(list(names))
+        dataset = dataset.map(lambda name: (name, tf.io.read_file(name)), num_parallel_calls=tf.data.AUTOTUNE)
+    else:
+        dataset = tf.data.Dataset.from_tensor_slices((list(names), list(contents)))
+    dataset = dataset.map(lambda name, data: (name, decode_image(data)), num_parallel_calls=tf.data.AUTOTUNE)
+    dataset = dataset.ignore_errors()
+    return dataset.batch(batch_size).prefetch(tf.data.AUTOTUNE)
+
+
+def detect_fire_batches(predict_batch, dataset):
+    """
+    Run a batch predict function over a batched dataset, yielding results batch by batch
+
+    Args:
+        predict_batch (callable): From load_fire_predictor; the Keras model is
+            called directly instead of through model.predict, which sets up a
+            new prediction loop on every call
+
+    Yields:
+        list: (name, fire probability, label) for every image of the batch
+    """
+    for names, images in dataset:
+        probabilities = predict_batch(images)
+        yield [
+            (name.decode(), float(probability), fire_label(probability))
+            for name, probability in zip(names.numpy(), probabilities)
+        ]
+
+
+def image_files(directory):
+    """Image files directly inside `directory`, sorted by name"""
+    return sorted(
+        os.path.join(directory, name) for name in os.listdir(directory)
+        if name.lower().endswith(IMAGE_EXTENSIONS)
+    )
+
+
+def detect_fire_directory(predict_batch, directory, batch_size=BATCH_SIZE, report=print):
+    """
+    Classify every image in a directory, reporting throughput after each batch
+
+    Returns:
+        list: (path, fire probability, label) per decodable image
+    """
+    paths = image_files(directory)
+    results = []
+    start = time.perf_counter()
+    for batch in detect_fire_batches(predict_batch, image_dataset(paths, batch_size=batch_size)):
+        results.extend(batch)
+        elapsed = time.perf_counter() - start
+        report(f"{len(results)}/{len(paths)} images, {len(results) / elapsed:,.1f} images/sec")
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Detect fire in a directory of tower/camera-trap images')
+    parser.add_argument('model', help='Path to the Keras fire detection model (.h5)')
+    parser.add_argument('directory', help='Directory of .jpg/.jpeg/.png images')
+    parser.add_argument('--batch-size', type=int, default=BATCH_SIZE, help='Images per forward pass')
+    parser.add_argument('--backend', default='keras', choices=BACKENDS, help='Keras model or quantized TFLite export')
+    parser.add_argument('--output', help='Optional CSV file for the per-image results')
+    args = parser.parse_args(argv)
+
+    predict_batch = load_fire_predictor(args.model, args.backend)
+    start = time.perf_counter()
+    results = detect_fire_directory(predict_batch, args.directory, args.batch_size)
+    elapsed = time.perf_counter() - start
+
+    fires = sum(label == 'Fire Detected' for _, _, label in results)
+    print(f"{len(results)} images in {elapsed:.2f}s ({len(results) / max(elapsed, 1e-9):,.1f} images/sec), {fires} with fire")
+    if args.output:
+        pd.DataFrame(results, columns=['image', 'fire_probability', 'prediction']).to_csv(args.output, index=False)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
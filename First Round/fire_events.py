@@ -0,0 +1,399 @@
+import copy
+from datetime import date, datetime, timedelta
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from fire_query import load_fire_engine
+from fire_spatial import EARTH_RADIUS_KM, haversine_km, _gather_ranges
+from fire_store import source_signature
+
+# Two detections belong to the same fire if they are this close in space and time
+EVENT_RADIUS_KM = 2.0
+EVENT_GAP_HOURS = 48
+
+# Footprint is counted in cells of about 1 km (MODIS pixel size)
+FOOTPRINT_CELL_DEGREES = 0.01
+
+_EPOCH = np.datetime64('1970-01-01T00:00', 'm')
+
+
+def _connected_components(n, a, b):
+    """
+    Component label (smallest member index) of every node of an edge list
+
+    Min-label propagation with pointer jumping; each round is a couple of
+    vectorized passes and the number of rounds grows with log of the chain length.
+    """
+    labels = np.arange(n)
+    if len(a) == 0:
+        return labels
+    while True:
+        previous = labels
+        low = np.minimum(labels[a], labels[b])
+        labels = labels.copy()
+        np.minimum.at(labels, a, low)
+        np.minimum.at(labels, b, low)
+        while True:
+            jumped = labels[labels]
+            if np.array_equal(jumped, labels):
+                break
+            labels = jumped
+        if np.array_equal(labels, previous):
+            return labels
+
+
+class _GrowingArray:
+    """Append-only 1-D array whose buffer doubles when full, so appends cost O(1) per element on average"""
+
+    def __init__(self, dtype):
+        self._buffer = np.empty(0, dtype=dtype)
+        self._size = 0
+
+    def __len__(self):
+        return self._size
+
+    @property
+    def values(self):
+        """View of the filled part of the buffer"""
+        return self._buffer[:self._size]
+
+    def append(self, values):
+        end = self._size + len(values)
+        if end > len(self._buffer):
+            grown = np.empty(max(end, 2 * len(self._buffer)), dtype=self._buffer.dtype)
+            grown[:self._size] = self._buffer[:self._size]
+            self._buffer = grown
+        self._buffer[self._size:end] = values
+        self._size = end
+
+
+def _group_rows(keys, rows):
+    """{key: rows with that key} for parallel arrays"""
+    order = np.argsort(keys, kind='stable')
+    keys, rows = keys[order], rows[order]
+    boundaries = np.flatnonzero(keys[1:] != keys[:-1]) + 1
+    return dict(zip(keys[np.concatenate(([0], boundaries))].tolist(), np.split(rows, boundaries)))
+
+
+class FireEventEngine:
+    """
+    Groups fire detections into fire events, updated batch by batch
+
+    Detections within EVENT_RADIUS_KM and EVENT_GAP_HOURS of each other are
+    linked and every connected group is one event (DBSCAN with a minimum of
+    one point). Candidate pairs come only from neighbouring cells of a
+    space-time grid, and a new batch is linked only against detections still
+    within the time gap, so existing events are extended or merged instead
+    of re-clustering the archive.
+
+    Work per batch follows the batch and the events it touches, not the
+    stored points: points live in growing buffers, the points near the
+    batch in time are found through per-time-bin row lists, merged events
+    are recorded in a union-find alias table instead of relabelling every
+    point, and only touched events are summarized, from their own rows.
+    """
+
+    def __init__(self, radius_km=EVENT_RADIUS_KM, gap_hours=EVENT_GAP_HOURS):
+        self.radius_km = radius_km
+        self.gap_minutes = int(gap_hours * 60)
+        # Grid cells at least one radius wide, so linked points are in adjacent cells
+        self.cell_degrees = np.degrees(radius_km / EARTH_RADIUS_KM)
+
+        self._latitude = _GrowingArray(np.float32)
+        self._longitude = _GrowingArray(np.float32)
+        self._minutes = _GrowingArray(np.int64)
+        self._frp = _GrowingArray(np.float32)
+        # Event each point was given when added; merges are resolved through _parent
+        self._point_event = _GrowingArray(np.int64)
+        # Union-find over event ids: a merged event points at the event it joined
+        self._parent = _GrowingArray(np.int64)
+        self.next_event = 0
+
+        # Row arrays per live event, and per time bin of gap_minutes
+        self._members = {}
+        self._time_bins = {}
+
+        # Event table pieces, concatenated when the table is read
+        self._table = self._summarize(np.empty(0, dtype=np.int64))
+        self._pending = []
+        self._pending_rows = 0
+        self._merged = []
+
+    def __len__(self):
+        return len(self.events)
+
+    @property
+    def latitude(self):
+        return self._latitude.values
+
+    @property
+    def longitude(self):
+        return self._longitude.values
+
+    @property
+    def minutes(self):
+        return self._minutes.values
+
+    @property
+    def frp(self):
+        return self._frp.values
+
+    @property
+    def labels(self):
+        """Current event id of every stored point"""
+        return self._find(self._point_event.values)
+
+    @property
+    def events(self):
+        """One row per fire event, indexed by event id"""
+        if self._pending or self._merged:
+            self._flush()
+        return self._table
+
+    def snapshot(self):
+        """Read-only view of the current event table for events_between; not to be updated"""
+        view = copy.copy(self)
+        view._table = self.events
+        view._pending, view._pending_rows, view._merged = [], 0, []
+        return view
+
+    def _flush(self):
+        """Fold queued summaries into the event table; later summaries of an event replace earlier ones"""
+        table = pd.concat([self._table] + self._pending)
+        table = table[~table.index.duplicated(keep='last')]
+        if self._merged:
+            table = table.drop(index=np.concatenate(self._merged), errors='ignore')
+        self._table = table.sort_index()
+        self._pending, self._pending_rows, self._merged = [], 0, []
+
+    def _find(self, event_ids):
+        """Root event of each id, compressing the paths it walked"""
+        parent = self._parent.values
+        roots = parent[event_ids]
+        while True:
+            up = parent[roots]
+            if np.array_equal(up, roots):
+                break
+            roots = up
+        parent[event_ids] = roots
+        return roots
+
+    def _rows_near(self, lo, hi):
+        """Stored rows whose time bin overlaps [lo, hi] minutes"""
+        first, last = lo // self.gap_minutes, hi // self.gap_minutes
+        if last - first + 1 <= len(self._time_bins):
+            bins = [self._time_bins.get(b) for b in range(first, last + 1)]
+        else:
+            bins = [rows for b, rows in self._time_bins.items() if first <= b <= last]
+        chunks = [chunk for rows in bins if rows for chunk in rows]
+        return np.concatenate(chunks) if chunks else np.empty(0, dtype=np.int64)
+
+    def _cell_keys(self, latitude, longitude, minutes):
+        """Single int64 key per (time bin, lat cell, lon cell), plus the grid shape"""
+        # Longitude cells are widened for the highest latitude present so they still span a radius
+        max_lat = min(float(np.abs(latitude).max()) + self.cell_degrees, 89.9)
+        lon_degrees = self.cell_degrees / np.cos(np.radians(max_lat))
+        n_rows = int(np.ceil(180 / self.cell_degrees)) + 2
+        n_cols = int(np.ceil(360 / lon_degrees)) + 2
+        rows = np.floor((latitude.astype(np.float64) + 90) / self.cell_degrees).astype(np.int64) + 1
+        cols = np.floor((longitude.astype(np.float64) + 180) / lon_degrees).astype(np.int64) + 1
+        bins = minutes // self.gap_minutes
+        return (bins * n_rows + rows) * n_cols + cols, n_rows, n_cols
+
+    def _candidate_pairs(self, latitude, longitude, minutes, first_new):
+        """
+        Linked pairs (i, j) among the given points where j is a new point
+
+        Only neighbouring grid cells are compared, then the exact distance
+        and time gap are checked.
+        """
+        keys, n_rows, n_cols = self._cell_keys(latitude, longitude, minutes)
+        order = np.argsort(keys, kind='stable')
+        sorted_keys = keys[order]
+
+        # Occupied cells as runs [starts, ends) of the key-sorted points
+        boundaries = np.flatnonzero(sorted_keys[1:] != sorted_keys[:-1]) + 1
+        starts = np.concatenate(([0], boundaries))
+        ends = np.concatenate((boundaries, [len(keys)]))
+        cells = sorted_keys[starts]
+        cell_of = np.repeat(np.arange(len(cells)), ends - starts)
+
+        # New points in key order, with the cell each belongs to
+        is_new = order >= first_new
+        new = order[is_new]
+        new_cells = cell_of[is_new]
+
+        pairs_i, pairs_j = [], []
+        for dt in (-1, 0, 1):
+            for dy in (-1, 0, 1):
+                for dx in (-1, 0, 1):
+                    # Neighbour lookups are per occupied cell, not per point
+                    target = cells + (dt * n_rows + dy) * n_cols + dx
+                    at = np.minimum(np.searchsorted(cells, target), len(cells) - 1)
+                    found = cells[at] == target
+                    lo = np.where(found, starts[at], 0)[new_cells]
+                    hi = np.where(found, ends[at], 0)[new_cells]
+                    counts = hi - lo
+                    if counts.sum() == 0:
+                        continue
+                    pairs_j.append(np.repeat(new, counts))
+                    pairs_i.append(order[_gather_ranges(lo, hi)])
+
+        if not pairs_i:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+        i = np.concatenate(pairs_i)
+        j = np.concatenate(pairs_j)
+        linked = (
+            (i != j) &
+            (np.abs(minutes[i] - minutes[j]) <= self.gap_minutes) &
+            (haversine_km(latitude[i], longitude[i], latitude[j], longitude[j]) <= self.radius_km)
+        )
+        return i[linked], j[linked]
+
+    def update(self, data):
+        """
+        Cluster a batch of new detections into new or existing events
+
+        Args:
+            data (pd.DataFrame): Typed detections (see fire_store)
+
+        Returns:
+            np.ndarray: Event id of every row of `data`
+        """
+        n_new = len(data)
+        if n_new == 0:
+            return np.empty(0, dtype=np.int64)
+        latitude = data['latitude'].to_numpy(np.float32)
+        longitude = data['longitude'].to_numpy(np.float32)
+        minutes = (data['acq_datetime'].to_numpy().astype('datetime64[m]') - _EPOCH).astype(np.int64)
+        frp = data['frp'].to_numpy(np.float32)
+
+        # Existing detections close enough in time to link with the batch
+        lo, hi = minutes.min() - self.gap_minutes, minutes.max() + self.gap_minutes
+        active = np.sort(self._rows_near(lo, hi))
+        active = active[(self.minutes[active] >= lo) & (self.minutes[active] <= hi)]
+        points_lat = np.concatenate((self.latitude[active], latitude))
+        points_lon = np.concatenate((self.longitude[active], longitude))
+        points_min = np.concatenate((self.minutes[active], minutes))
+        i, j = self._candidate_pairs(points_lat, points_lon, points_min, len(active))
+
+        # Components over event ids: old points carry their event, new points a fresh id
+        ids = np.concatenate((self._find(self._point_event.values[active]), self.next_event + np.arange(n_new)))
+        unique_ids, compact = np.unique(ids, return_inverse=True)
+        components = _connected_components(len(unique_ids), compact[i], compact[j])
+        # unique_ids is sorted, so each component is named after its oldest event
+        final = unique_ids[components]
+
+        # Old events joined through the batch point at the event they joined
+        renamed = (unique_ids < self.next_event) & (final != unique_ids)
+        new_labels = final[compact[len(active):]]
+        first_row = len(self._point_event)
+
+        self._latitude.append(latitude)
+        self._longitude.append(longitude)
+        self._minutes.append(minutes)
+        self._frp.append(frp)
+        self._point_event.append(new_labels)
+        self._parent.append(new_labels)
+        self._parent.values[unique_ids[renamed]] = final[renamed]
+        self.next_event += n_new
+
+        # Merged events hand their rows to the surviving event
+        for old, new in zip(unique_ids[renamed].tolist(), final[renamed].tolist()):
+            self._members.setdefault(new, []).extend(self._members.pop(old))
+        rows = first_row + np.arange(n_new)
+        for event, event_rows in _group_rows(new_labels, rows).items():
+            self._members.setdefault(event, []).append(event_rows)
+        for time_bin, bin_rows in _group_rows(minutes // self.gap_minutes, rows).items():
+            self._time_bins.setdefault(time_bin, []).append(bin_rows)
+
+        # Re-summarize touched events only; the table is rebuilt when read,
+        # or once the queued summaries outgrow it
+        summary = self._summarize(np.unique(new_labels))
+        self._pending.append(summary)
+        self._pending_rows += len(summary)
+        if renamed.any():
+            self._merged.append(unique_ids[renamed])
+        if self._pending_rows > len(self._table):
+            self._flush()
+        return new_labels
+
+    def _summarize(self, event_ids):
+        """Footprint, duration, FRP and growth of the given events, read from their own rows"""
+        chunks = [chunk for event in np.asarray(event_ids).tolist() for chunk in self._members.get(event, [])]
+        rows = np.concatenate(chunks) if chunks else np.empty(0, dtype=np.int64)
+        frame = pd.DataFrame({
+            'event': self._find(self._point_event.values[rows]),
+            'latitude': self.latitude[rows].astype(np.float64),
+            'longitude': self.longitude[rows].astype(np.float64),
+            'minutes': self.minutes[rows],
+            'frp': self.frp[rows].astype(np.float64),
+        })
+        frame['cell'] = (
+            np.floor((frame['latitude'] + 90) / FOOTPRINT_CELL_DEGREES).astype(np.int64) * 100_000 +
+            np.floor((frame['longitude'] + 180) / FOOTPRINT_CELL_DEGREES).astype(np.int64)
+        )
+        grouped = frame.groupby('event')
+        events = grouped.agg(
+            detections=('frp', 'size'),
+            start_minutes=('minutes', 'min'),
+            end_minutes=('minutes', 'max'),
+            total_frp=('frp', 'sum'),
+            max_frp=('frp', 'max'),
+            latitude=('latitude', 'mean'),
+            longitude=('longitude', 'mean'),
+            south=('latitude', 'min'),
+            north=('latitude', 'max'),
+            west=('longitude', 'min'),
+            east=('longitude', 'max'),
+            cells=('cell', 'nunique'),
+        )
+
+        # Cells seen on the event's first day, for the growth rate
+        first_day = frame['minutes'] < frame['event'].map(events['start_minutes']) + 24 * 60
+        first_cells = frame[first_day].groupby('event')['cell'].nunique().reindex(events.index, fill_value=0)
+
+        cell_km2 = (FOOTPRINT_CELL_DEGREES * np.pi / 180 * EARTH_RADIUS_KM) ** 2 * np.cos(np.radians(events['latitude']))
+        duration_days = (events['end_minutes'] - events['start_minutes']) / (24 * 60)
+        events['start'] = _EPOCH + events['start_minutes'].to_numpy().astype('timedelta64[m]')
+        events['end'] = _EPOCH + events['end_minutes'].to_numpy().astype('timedelta64[m]')
+        events['duration_hours'] = duration_days * 24
+        events['footprint_km2'] = events['cells'] * cell_km2
+        events['growth_km2_per_day'] = np.where(
+            duration_days > 0, (events['cells'] - first_cells) * cell_km2 / np.maximum(duration_days, 1e-9), 0.0)
+        return events.drop(columns=['start_minutes', 'end_minutes', 'cells'])
+
+    def events_between(self, start, end, bbox=None):
+        """
+        Events active at any time between two dates/datetimes
+
+        A `date` end covers that whole day. With `bbox` (south, west, north,
+        east), only events whose footprint overlaps the box are kept.
+        """
+        lo = pd.Timestamp(start)
+        if isinstance(end, date) and not isinstance(end, datetime):
+            hi = pd.Timestamp(end + timedelta(days=1))
+        else:
+            hi = pd.Timestamp(end) + pd.Timedelta(1, unit='ns')
+        events = self.events
+        keep = (events['end'] >= lo) & (events['start'] < hi)
+        if bbox is not None:
+            south, west, north, east = bbox
+            keep &= (
+                (events['north'] >= south) & (events['south'] <= north) &
+                (events['east'] >= west) & (events['west'] <= east)
+            )
+        return events[keep]
+
+
+@st.cache_resource(show_spinner=False, max_entries=8)
+def _build_fire_events(path, signature):
+    events = FireEventEngine()
+    events.update(load_fire_engine(path).data)
+    return events
+
+
+def load_fire_events(path):
+    """Shared FireEventEngine over the detections in `path`"""
+    return _build_fire_events(path, source_signature(path))
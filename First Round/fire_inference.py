@@ -0,0 +1,239 @@
+import os
+import sys
+import time
+import queue
+import argparse
+import threading
+from collections import Counter, deque
+from concurrent.futures import Future
+from multiprocessing.connection import Client, Listener
+import numpy as np
+
+from fire_detection import BACKENDS, decode_image, fire_label, load_fire_predictor
+
+# A batch closes when it is full or its first request has waited this long
+MAX_BATCH_SIZE = 32
+MAX_WAIT_MS = 10
+
+# Latencies kept for the percentiles
+LATENCY_WINDOW = 10_000
+
+# The server only listens on the loopback interface
+SERVER_HOST = '127.0.0.1'
+DEFAULT_PORT = 6010
+DEFAULT_ADDRESS = (SERVER_HOST, DEFAULT_PORT)
+
+# Shared secret of server and clients; connections are pickled, so the
+# server refuses to start without it
+AUTHKEY_ENV = 'FIRE_INFERENCE_AUTHKEY'
+
+
+def inference_authkey():
+    """
+    Connection authkey from the FIRE_INFERENCE_AUTHKEY environment variable
+
+    Raises:
+        RuntimeError: The variable is unset or empty
+    """
+    authkey = os.environ.get(AUTHKEY_ENV, '')
+    if not authkey:
+        raise RuntimeError(f'Set {AUTHKEY_ENV} to a shared secret for the fire inference server and its clients')
+    return authkey.encode()
+
+
+class MicroBatchWorker:
+    """
+    Long-lived inference thread that merges concurrent requests into batches
+
+    Callers submit one preprocessed image each and get a Future back. The
+    worker takes the first waiting request, keeps collecting until
+    `max_batch_size` requests or `max_wait_ms` have passed, and runs a single
+    forward pass for all of them.
+    """
+
+    def __init__(self, predict_batch, max_batch_size=MAX_BATCH_SIZE, max_wait_ms=MAX_WAIT_MS):
+        """
+        Args:
+            predict_batch (callable): (n, ...) float32 array -> n scores
+            max_batch_size (int): Most requests per forward pass
+            max_wait_ms (float): Latency budget for filling a batch
+        """
+        self.predict_batch = predict_batch
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self.requests = queue.Queue()
+        self.batch_sizes = Counter()
+        self.latencies = deque(maxlen=LATENCY_WINDOW)
+        self.completed = 0
+        # Guards batch_sizes, latencies and completed between the worker and stats()
+        self._stats_lock = threading.Lock()
+        self._thread = threading.Thread(target=self._run, name='fire-inference', daemon=True)
+        self._thread.start()
+
+    def submit(self, image):
+        """Queue one image; the Future resolves to its score"""
+        future = Future()
+        self.requests.put((np.asarray(image, dtype=np.float32), future, time.perf_counter()))
+        return future
+
+    def predict(self, image, timeout=None):
+        """Blocking single-image prediction through the shared batches"""
+        return self.submit(image).result(timeout)
+
+    def _next_batch(self):
+        batch = [self.requests.get()]
+        deadline = time.perf_counter() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self.requests.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._next_batch()
+            try:
+                scores = self.predict_batch(np.stack([image for image, _, _ in batch]))
+            except Exception as e:
+                for _, future, _ in batch:
+                    future.set_exception(e)
+                continue
+
+            done = time.perf_counter()
+            with self._stats_lock:
+                self.latencies.extend(done - submitted for _, _, submitted in batch)
+                self.batch_sizes[len(batch)] += 1
+                self.completed += len(batch)
+            for (_, future, _), score in zip(batch, scores):
+                future.set_result(float(score))
+
+    def stats(self):
+        """
+        Queue depth, batch-size histogram and latency percentiles
+
+        Returns:
+            dict: requests, queue_depth, batches, batch_sizes {size: count}, p50_ms, p99_ms
+        """
+        with self._stats_lock:
+            latencies = np.array(self.latencies) * 1000
+            batch_sizes = dict(sorted(self.batch_sizes.items()))
+            completed = self.completed
+        return {
+            'requests': completed,
+            'queue_depth': self.requests.qsize(),
+            'batches': sum(batch_sizes.values()),
+            'batch_sizes': batch_sizes,
+            'p50_ms': float(np.percentile(latencies, 50)) if len(latencies) else None,
+            'p99_ms': float(np.percentile(latencies, 99)) if len(latencies) else None,
+        }
+
+
+def format_worker_stats(stats):
+    if stats['p50_ms'] is None:
+        return f"{stats['requests']} requests, queue depth {stats['queue_depth']}"
+    return (
+        f"{stats['requests']} requests in {stats['batches']} batches, queue depth {stats['queue_depth']}, "
+        f"p50 {stats['p50_ms']:.1f} ms, p99 {stats['p99_ms']:.1f} ms, batch sizes {stats['batch_sizes']}"
+    )
+
+
+def _serve_connection(connection, worker, decode):
+    """One client connection: ('predict', image bytes) or ('stats', None) messages"""
+    with connection:
+        while True:
+            try:
+                kind, payload = connection.recv()
+            except EOFError:
+                return
+            try:
+                if kind == 'predict':
+                    score = worker.predict(decode(payload))
+                    connection.send(('ok', (score, fire_label(score))))
+                elif kind == 'stats':
+                    connection.send(('ok', worker.stats()))
+                else:
+                    connection.send(('error', f'unknown request {kind!r}'))
+            except Exception as e:
+                connection.send(('error', str(e)))
+
+
+def serve(worker, decode, port=DEFAULT_PORT, authkey=None):
+    """
+    Accept local socket clients forever, one thread per connection
+
+    Every connection feeds the same worker, so requests from different
+    processes are batched together. Only loopback clients that pass the
+    authkey challenge get as far as sending a message.
+
+    Args:
+        authkey (bytes): Defaults to inference_authkey()
+    """
+    authkey = authkey or inference_authkey()
+    with Listener((SERVER_HOST, port), authkey=authkey) as listener:
+        while True:
+            connection = listener.accept()
+            threading.Thread(target=_serve_connection, args=(connection, worker, decode), daemon=True).start()
+
+
+class FireInferenceClient:
+    """Connection to a running fire inference server"""
+
+    def __init__(self, address=DEFAULT_ADDRESS, authkey=None):
+        self.connection = Client(address, authkey=authkey or inference_authkey())
+
+    def _call(self, kind, payload=None):
+        self.connection.send((kind, payload))
+        status, result = self.connection.recv()
+        if status != 'ok':
+            raise RuntimeError(result)
+        return result
+
+    def predict(self, contents):
+        """
+        Args:
+            contents (bytes): Encoded JPEG/PNG image
+
+        Returns:
+            tuple: (fire probability, label)
+        """
+        return self._call('predict', contents)
+
+    def stats(self):
+        return self._call('stats')
+
+    def close(self):
+        self.connection.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Serve the fire detection model with dynamic micro-batching')
+    parser.add_argument('model', help='Path to the Keras fire detection model (.h5)')
+    parser.add_argument('--backend', default='keras', choices=BACKENDS, help='Keras model or quantized TFLite export')
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT, help=f'Port on {SERVER_HOST}')
+    parser.add_argument('--max-batch-size', type=int, default=MAX_BATCH_SIZE)
+    parser.add_argument('--max-wait-ms', type=float, default=MAX_WAIT_MS)
+    parser.add_argument('--stats-interval', type=float, default=60.0, help='Seconds between stats lines')
+    args = parser.parse_args(argv)
+    try:
+        authkey = inference_authkey()
+    except RuntimeError as e:
+        parser.error(str(e))
+
+    worker = MicroBatchWorker(load_fire_predictor(args.model, args.backend), args.max_batch_size, args.max_wait_ms)
+
+    def report():
+        while True:
+            time.sleep(args.stats_interval)
+            print(format_worker_stats(worker.stats()), flush=True)
+
+    threading.Thread(target=report, daemon=True).start()
+    print(f"Serving fire detection on {SERVER_HOST}:{args.port}", flush=True)
+    serve(worker, lambda contents: decode_image(contents).numpy(), args.port, authkey)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
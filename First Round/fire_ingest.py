@@ -0,0 +1,287 @@
+import os
+import sys
+import glob
+import json
+import time
+import argparse
+import threading
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from fire_aggregation import FireAggregationPyramid
+from fire_events import FireEventEngine
+from fire_query import FireQueryEngine
+from fire_spatial import FireSpatialIndex
+from fire_store import concat_fire_frames, read_fire_csv
+
+# A detection is the same fire pixel if these match
+DEDUP_COLUMNS = ['latitude', 'longitude', 'acq_datetime', 'satellite']
+
+CHUNK_ROWS = 250_000
+
+# Files younger than this may still be being written by the downloader
+SETTLE_SECONDS = 2.0
+
+MANIFEST_NAME = 'ingested.json'
+
+# Store directory the ingest CLI writes by default and the dashboard reads
+LIVE_STORE_DIR = 'fire_live_store'
+
+
+def detection_hashes(frame):
+    """64-bit hash of the de-duplication key of every row"""
+    key = frame[DEDUP_COLUMNS].copy()
+    key['satellite'] = key['satellite'].astype(str)
+    return pd.util.hash_pandas_object(key, index=False).to_numpy()
+
+
+class SeenDetections:
+    """Sorted array of detection hashes; membership by binary search, merge by insertion"""
+
+    def __init__(self):
+        self.hashes = np.empty(0, dtype=np.uint64)
+
+    def __len__(self):
+        return len(self.hashes)
+
+    def filter_new(self, hashes):
+        """
+        Mask of hashes not seen before (first occurrence only within the batch),
+        recording them as seen
+        """
+        _, first = np.unique(hashes, return_index=True)
+        new = np.zeros(len(hashes), dtype=bool)
+        new[first] = True
+
+        if len(self.hashes):
+            at = np.minimum(np.searchsorted(self.hashes, hashes), len(self.hashes) - 1)
+            new &= self.hashes[at] != hashes
+
+        fresh = np.sort(hashes[new])
+        self.hashes = np.insert(self.hashes, np.searchsorted(self.hashes, fresh), fresh)
+        return new
+
+
+class LiveFireStore:
+    """
+    Fire detections that grow in place as NRT files arrive
+
+    Holds the query engine, spatial index, aggregation pyramid and fire
+    events together and updates all four per batch instead of rebuilding them. Each accepted
+    batch is also written to `store_dir` as a Parquet part so a restart only
+    reloads parts, never the source CSVs. A reader process (the dashboard)
+    picks up parts written by the ingest process with refresh().
+    """
+
+    def __init__(self, store_dir):
+        self.store_dir = store_dir
+        os.makedirs(store_dir, exist_ok=True)
+        self.engine = None
+        self.spatial_index = None
+        self.pyramid = FireAggregationPyramid()
+        self.events = FireEventEngine()
+        self.seen = SeenDetections()
+        self.loaded_parts = set()
+        self._lock = threading.Lock()
+        self.refresh()
+
+    def __len__(self):
+        return 0 if self.engine is None else len(self.engine)
+
+    def snapshot(self):
+        """
+        Engine, spatial index, pyramid and events as of the last completed batch
+
+        Taken under the store lock, so the four agree with each other and
+        keep doing so while later batches are appended.
+
+        Returns:
+            tuple: (FireQueryEngine, FireSpatialIndex, FireAggregationPyramid, FireEventEngine)
+        """
+        with self._lock:
+            return (
+                self.engine.snapshot(),
+                self.spatial_index.snapshot(),
+                self.pyramid.snapshot(),
+                self.events.snapshot(),
+            )
+
+    def refresh(self):
+        """
+        Fold in Parquet parts that appeared in `store_dir` since the last call
+
+        Returns:
+            int: Number of rows that were new
+        """
+        with self._lock:
+            parts = sorted(glob.glob(os.path.join(self.store_dir, 'part-*.parquet')))
+            new_parts = [part for part in parts if os.path.basename(part) not in self.loaded_parts]
+            if not new_parts:
+                return 0
+            frame = concat_fire_frames([pd.read_parquet(part) for part in new_parts])
+            self.loaded_parts.update(os.path.basename(part) for part in new_parts)
+            return self._append(frame, persist=False)
+
+    def append(self, frame, persist=True):
+        """
+        De-duplicate a typed batch and fold the new rows into every index
+
+        Returns:
+            int: Number of rows that were new
+        """
+        with self._lock:
+            return self._append(frame, persist)
+
+    def _append(self, frame, persist):
+        new_rows = frame[self.seen.filter_new(detection_hashes(frame))]
+        if len(new_rows) == 0:
+            return 0
+        new_rows = new_rows.sort_values('acq_datetime', kind='stable')
+
+        if self.engine is None:
+            self.engine = FireQueryEngine(new_rows)
+            data = self.engine.data
+            self.spatial_index = FireSpatialIndex(data['latitude'].to_numpy(), data['longitude'].to_numpy())
+        else:
+            first_new = len(self.engine)
+            if self.engine.append(new_rows):
+                # Old rows kept their positions; the new ones, in time order, follow them
+                self.spatial_index.insert(
+                    new_rows['latitude'].to_numpy(),
+                    new_rows['longitude'].to_numpy(),
+                    np.arange(first_new, len(self.engine))
+                )
+            else:
+                # Late data reshuffled row positions
+                data = self.engine.data
+                self.spatial_index = FireSpatialIndex(data['latitude'].to_numpy(), data['longitude'].to_numpy())
+        self.pyramid.update(new_rows)
+        self.events.update(new_rows)
+
+        if persist:
+            part = os.path.join(self.store_dir, f"part-{time.time_ns()}.parquet")
+            try:
+                new_rows.to_parquet(part + '.tmp', index=False)
+                os.replace(part + '.tmp', part)
+                self.loaded_parts.add(os.path.basename(part))
+            except ImportError:
+                pass
+        return len(new_rows)
+
+
+@st.cache_resource(show_spinner=False, max_entries=4)
+def _open_live_store(store_dir):
+    return LiveFireStore(store_dir)
+
+
+def load_live_fire_store(store_dir=LIVE_STORE_DIR):
+    """
+    Process-wide LiveFireStore over `store_dir`, or None if nothing was ingested there
+
+    Every call folds in the parts the ingest process wrote since the last
+    one, so the dashboard map, queries and spatial index follow the drops.
+    Readers should work on store.snapshot(), not the live attributes.
+    """
+    if not glob.glob(os.path.join(store_dir, 'part-*.parquet')):
+        return None
+    store = _open_live_store(os.path.abspath(store_dir))
+    store.refresh()
+    return store if len(store) else None
+
+
+class FireIngestor:
+    """Watches a drop directory and streams new FIRMS CSVs into a LiveFireStore"""
+
+    def __init__(self, drop_dir, store, chunk_rows=CHUNK_ROWS):
+        self.drop_dir = drop_dir
+        self.store = store
+        self.chunk_rows = chunk_rows
+        self.manifest_path = os.path.join(store.store_dir, MANIFEST_NAME)
+        self.manifest = {}
+        if os.path.exists(self.manifest_path):
+            with open(self.manifest_path) as f:
+                self.manifest = json.load(f)
+
+    def pending_files(self):
+        """CSV files in the drop directory that are new or changed and have settled"""
+        pending = []
+        now = time.time()
+        for path in sorted(glob.glob(os.path.join(self.drop_dir, '*.csv'))):
+            stat = os.stat(path)
+            if now - stat.st_mtime < SETTLE_SECONDS:
+                continue
+            if self.manifest.get(os.path.basename(path)) != [stat.st_size, stat.st_mtime_ns]:
+                pending.append(path)
+        return pending
+
+    def ingest_file(self, path):
+        """
+        Stream one CSV in chunks into the store
+
+        Returns:
+            dict: rows read, rows added, duplicates and rows/sec
+        """
+        start = time.perf_counter()
+        rows = added = 0
+        for chunk in read_fire_csv(path, chunksize=self.chunk_rows):
+            rows += len(chunk)
+            added += self.store.append(chunk)
+        elapsed = time.perf_counter() - start
+
+        stat = os.stat(path)
+        self.manifest[os.path.basename(path)] = [stat.st_size, stat.st_mtime_ns]
+        with open(self.manifest_path + '.tmp', 'w') as f:
+            json.dump(self.manifest, f)
+        os.replace(self.manifest_path + '.tmp', self.manifest_path)
+
+        return {
+            'file': os.path.basename(path),
+            'rows': rows,
+            'added': added,
+            'duplicates': rows - added,
+            'seconds': elapsed,
+            'rows_per_sec': rows / elapsed if elapsed > 0 else float('inf'),
+        }
+
+    def run_once(self, report=print):
+        """Ingest every pending file, reporting and returning one stats dict per file"""
+        results = []
+        for path in self.pending_files():
+            stats = self.ingest_file(path)
+            report(format_ingest_stats(stats, len(self.store)))
+            results.append(stats)
+        return results
+
+    def watch(self, interval=30.0, report=print):
+        """Poll the drop directory forever"""
+        while True:
+            self.run_once(report)
+            time.sleep(interval)
+
+
+def format_ingest_stats(stats, total_rows):
+    return (
+        f"{stats['file']}: {stats['rows']} rows, {stats['added']} new, "
+        f"{stats['duplicates']} duplicates in {stats['seconds']:.2f}s "
+        f"({stats['rows_per_sec']:,.0f} rows/sec), store now {total_rows} rows"
+    )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Ingest FIRMS NRT CSV drops into the fire store')
+    parser.add_argument('drop_dir', help='Directory the NRT CSV files are delivered to')
+    parser.add_argument('--store', default=LIVE_STORE_DIR, help='Directory for the ingested Parquet parts')
+    parser.add_argument('--interval', type=float, default=30.0, help='Polling interval in seconds')
+    parser.add_argument('--once', action='store_true', help='Ingest what is there and exit')
+    args = parser.parse_args(argv)
+
+    ingestor = FireIngestor(args.drop_dir, LiveFireStore(args.store))
+    if args.once:
+        ingestor.run_once()
+    else:
+        ingestor.watch(args.interval)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
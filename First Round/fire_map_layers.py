@@ -0,0 +1,420 @@
+import json
+import time
+import numpy as np
+import pandas as pd
+import folium
+from branca.element import Element, MacroElement
+from folium.map import Layer
+from jinja2 import Template
+
+from fire_aggregation import PYRAMID_ZOOMS, aggregate_detections, coarsen_cells
+
+# Same colour bands as the original per-marker loop: <50 green, <80 orange, else red
+CONFIDENCE_BINS = [50, 80]
+CONFIDENCE_COLORS = ['green', 'orange', 'red']
+
+# Aggregated cells are shaded by detection count
+CELL_COUNT_BINS = [3, 10, 30, 100]
+CELL_COLORS = ['#ffffb2', '#fecc5c', '#fd8d3c', '#f03b20', '#bd0026']
+
+# Fire events are outlined by total FRP
+EVENT_FRP_BINS = [100, 500, 2000]
+EVENT_COLORS = ['#fecc5c', '#fd8d3c', '#f03b20', '#bd0026']
+
+# Feature budget per layer sent to the browser
+MAX_MAP_POINTS = 20_000
+MAX_MAP_CELLS = 20_000
+MAX_MAP_EVENTS = 5_000
+MAX_ZOOM = 18
+
+
+def confidence_color_codes(confidence):
+    """Index into CONFIDENCE_COLORS for every detection, in one vectorized pass"""
+    return np.digitize(np.asarray(confidence), CONFIDENCE_BINS).astype(np.uint8)
+
+
+def _encode_labels(values):
+    """Factorize a column into (codes, labels) so repeated strings are sent once"""
+    codes, labels = pd.factorize(values, sort=True)
+    return codes.astype(np.int32), labels
+
+
+class _ColumnarLayer(Layer):
+    """Layer whose script embeds its data as `cols`, a JSON object of arrays"""
+
+    def render(self, **kwargs):
+        # MacroElement.render wraps the script in an Element, which compiles it
+        # as a Jinja template: seconds of work on megabytes of inline data.
+        # The script already adds the layer to its map, so it goes in verbatim.
+        figure = self.get_root()
+        script = self._template.module.__dict__['script']
+        figure.script.add_child(_RawScript(script(self, kwargs)), name=self.get_name())
+        for element in self._children.values():
+            element.render(**kwargs)
+
+
+class FirePointsLayer(_ColumnarLayer):
+    """
+    All fire detections as a single canvas-rendered Leaflet layer
+
+    Point attributes are shipped once as column arrays; the browser builds
+    each circle marker and its tooltip from those columns, instead of
+    receiving one marker object with its own tooltip HTML per detection.
+    """
+
+    _template = Template(u"""
+        {% macro script(this, kwargs) %}
+            var {{ this.get_name() }} = (function() {
+                var cols = {{ this.columns }};
+                var colors = {{ this.colors }};
+                var renderer = L.canvas({padding: 0.5});
+                var layer = L.featureGroup();
+
+                function tooltip(marker) {
+                    var i = marker.options.row;
+                    return '<b>Brightness:</b> ' + cols.brightness[i] + '<br>' +
+                        '<b>Latitude:</b> ' + cols.latitude[i] + '<br>' +
+                        '<b>Longitude:</b> ' + cols.longitude[i] + '<br>' +
+                        '<b>Date:</b> ' + cols.dates[cols.date[i]] + '<br>' +
+                        '<b>Confidence:</b> ' + cols.confidence[i] + '<br>' +
+                        '<b>FRP:</b> ' + cols.frp[i] + '<br>' +
+                        '<b>Day/Night:</b> ' + cols.daynights[cols.daynight[i]];
+                }
+
+                for (var i = 0; i < cols.latitude.length; i++) {
+                    L.circleMarker([cols.latitude[i], cols.longitude[i]], {
+                        renderer: renderer,
+                        row: i,
+                        radius: {{ this.radius }},
+                        color: colors[cols.color[i]],
+                        fill: true,
+                        fillOpacity: {{ this.fill_opacity }}
+                    }).bindTooltip(tooltip).addTo(layer);
+                }
+
+                layer.addTo({{ this._parent.get_name() }});
+                return layer;
+            })();
+        {% endmacro %}
+        """)
+
+    def __init__(self, data, radius=5, fill_opacity=0.7, name=None, overlay=True, control=True, show=True):
+        """
+        Args:
+            data (pd.DataFrame): Typed fire detections (see fire_store)
+            radius (int): Circle radius in pixels
+            fill_opacity (float): Circle fill opacity
+        """
+        super().__init__(name=name, overlay=overlay, control=control, show=show)
+        self._name = 'FirePointsLayer'
+        self.radius = radius
+        self.fill_opacity = fill_opacity
+        self.colors = json.dumps(CONFIDENCE_COLORS)
+        self.columns = self.encode_columns(data)
+
+    @staticmethod
+    def encode_columns(data):
+        """Column-oriented JSON payload for the detections in `data`"""
+        date_codes, dates = _encode_labels(data['acq_datetime'])
+        daynight_codes, daynights = _encode_labels(data['daynight'].astype(str))
+        # pandas' C JSON writer is far faster than json.dumps on long lists
+        arrays = {
+            'latitude': pd.Series(data['latitude'].to_numpy(np.float64)).to_json(orient='values', double_precision=4),
+            'longitude': pd.Series(data['longitude'].to_numpy(np.float64)).to_json(orient='values', double_precision=4),
+            'brightness': pd.Series(data['brightness'].to_numpy(np.float64)).to_json(orient='values', double_precision=1),
+            'frp': pd.Series(data['frp'].to_numpy(np.float64)).to_json(orient='values', double_precision=1),
+            'confidence': pd.Series(data['confidence'].to_numpy()).to_json(orient='values'),
+            'color': pd.Series(confidence_color_codes(data['confidence'])).to_json(orient='values'),
+            'date': pd.Series(date_codes).to_json(orient='values'),
+            'dates': json.dumps(pd.DatetimeIndex(dates).strftime('%Y-%m-%d %H:%M').tolist()),
+            'daynight': pd.Series(daynight_codes).to_json(orient='values'),
+            'daynights': json.dumps([str(label) for label in daynights]),
+        }
+        return '{' + ','.join(f'"{key}":{value}' for key, value in arrays.items()) + '}'
+
+
+class _RawScript(Element):
+    """Script text emitted verbatim, bypassing Jinja compilation"""
+
+    def __init__(self, text):
+        super().__init__()
+        self.text = text
+
+    def render(self, **kwargs):
+        return self.text
+
+
+class FireCellsLayer(_ColumnarLayer):
+    """Aggregated fire cells (see fire_aggregation) as one canvas-rendered layer"""
+
+    _template = Template(u"""
+        {% macro script(this, kwargs) %}
+            var {{ this.get_name() }} = (function() {
+                var cols = {{ this.columns }};
+                var colors = {{ this.colors }};
+                var renderer = L.canvas({padding: 0.5});
+                var layer = L.featureGroup();
+
+                function tooltip(cell) {
+                    var i = cell.options.row;
+                    return '<b>Detections:</b> ' + cols.count[i] + '<br>' +
+                        '<b>Max FRP:</b> ' + cols.max_frp[i] + '<br>' +
+                        '<b>Mean Brightness:</b> ' + cols.mean_brightness[i];
+                }
+
+                for (var i = 0; i < cols.south.length; i++) {
+                    L.rectangle([[cols.south[i], cols.west[i]], [cols.north[i], cols.east[i]]], {
+                        renderer: renderer,
+                        row: i,
+                        weight: 0.5,
+                        color: colors[cols.color[i]],
+                        fillOpacity: 0.6
+                    }).bindTooltip(tooltip).addTo(layer);
+                }
+
+                layer.addTo({{ this._parent.get_name() }});
+                return layer;
+            })();
+        {% endmacro %}
+        """)
+
+    def __init__(self, cells, name=None, overlay=True, control=True, show=True):
+        """
+        Args:
+            cells (pd.DataFrame): Output of fire_aggregation.aggregate_detections
+        """
+        super().__init__(name=name, overlay=overlay, control=control, show=show)
+        self._name = 'FireCellsLayer'
+        self.colors = json.dumps(CELL_COLORS)
+        self.columns = self.encode_columns(cells)
+
+    @staticmethod
+    def encode_columns(cells):
+        """Column-oriented JSON payload for the cells"""
+        arrays = {
+            column: pd.Series(cells[column].to_numpy(np.float64)).to_json(orient='values', double_precision=4)
+            for column in ['south', 'west', 'north', 'east']
+        }
+        arrays['count'] = pd.Series(cells['count'].to_numpy()).to_json(orient='values')
+        arrays['color'] = pd.Series(np.digitize(cells['count'].to_numpy(), CELL_COUNT_BINS)).to_json(orient='values')
+        arrays['max_frp'] = pd.Series(cells['max_frp'].to_numpy(np.float64)).to_json(orient='values', double_precision=1)
+        arrays['mean_brightness'] = pd.Series(cells['mean_brightness'].to_numpy(np.float64)).to_json(orient='values', double_precision=1)
+        return '{' + ','.join(f'"{key}":{value}' for key, value in arrays.items()) + '}'
+
+
+class FireEventsLayer(_ColumnarLayer):
+    """Fire event footprints (see fire_events) as one canvas-rendered layer of outlines"""
+
+    _template = Template(u"""
+        {% macro script(this, kwargs) %}
+            var {{ this.get_name() }} = (function() {
+                var cols = {{ this.columns }};
+                var colors = {{ this.colors }};
+                var renderer = L.canvas({padding: 0.5});
+                var layer = L.featureGroup();
+
+                function tooltip(event) {
+                    var i = event.options.row;
+                    return '<b>Fire Event</b><br>' +
+                        '<b>Detections:</b> ' + cols.detections[i] + '<br>' +
+                        '<b>Start:</b> ' + cols.start[i] + '<br>' +
+                        '<b>Duration:</b> ' + cols.duration_hours[i] + ' h<br>' +
+                        '<b>Total FRP:</b> ' + cols.total_frp[i] + '<br>' +
+                        '<b>Footprint:</b> ' + cols.footprint_km2[i] + ' km&sup2;<br>' +
+                        '<b>Growth:</b> ' + cols.growth_km2_per_day[i] + ' km&sup2;/day';
+                }
+
+                for (var i = 0; i < cols.south.length; i++) {
+                    L.rectangle([[cols.south[i], cols.west[i]], [cols.north[i], cols.east[i]]], {
+                        renderer: renderer,
+                        row: i,
+                        weight: 2,
+                        color: colors[cols.color[i]],
+                        fillOpacity: 0.1
+                    }).bindTooltip(tooltip).addTo(layer);
+                }
+
+                layer.addTo({{ this._parent.get_name() }});
+                return layer;
+            })();
+        {% endmacro %}
+        """)
+
+    def __init__(self, events, padding=0.005, name=None, overlay=True, control=True, show=True):
+        """
+        Args:
+            events (pd.DataFrame): Event table from fire_events.FireEventEngine
+            padding (float): Degrees added around each footprint so single pixels stay visible
+        """
+        super().__init__(name=name, overlay=overlay, control=control, show=show)
+        self._name = 'FireEventsLayer'
+        self.colors = json.dumps(EVENT_COLORS)
+        self.columns = self.encode_columns(events, padding)
+
+    @staticmethod
+    def encode_columns(events, padding=0.0):
+        """Column-oriented JSON payload for the events"""
+        bounds = {'south': -padding, 'west': -padding, 'north': padding, 'east': padding}
+        arrays = {
+            column: pd.Series(events[column].to_numpy(np.float64) + pad).to_json(orient='values', double_precision=4)
+            for column, pad in bounds.items()
+        }
+        arrays['detections'] = pd.Series(events['detections'].to_numpy()).to_json(orient='values')
+        arrays['color'] = pd.Series(np.digitize(events['total_frp'].to_numpy(), EVENT_FRP_BINS)).to_json(orient='values')
+        arrays['start'] = json.dumps(pd.DatetimeIndex(events['start']).strftime('%Y-%m-%d %H:%M').tolist())
+        for column in ['duration_hours', 'total_frp', 'footprint_km2', 'growth_km2_per_day']:
+            arrays[column] = pd.Series(events[column].to_numpy(np.float64)).to_json(orient='values', double_precision=1)
+        return '{' + ','.join(f'"{key}":{value}' for key, value in arrays.items()) + '}'
+
+
+class ZoomLevelSwitch(MacroElement):
+    """Show each layer only inside its [min_zoom, max_zoom] range"""
+
+    _template = Template(u"""
+        {% macro script(this, kwargs) %}
+            (function() {
+                var map = {{ this._parent.get_name() }};
+                var ranges = [
+                    {%- for layer, min_zoom, max_zoom in this.ranges %}
+                    [{{ layer.get_name() }}, {{ min_zoom }}, {{ max_zoom }}],
+                    {%- endfor %}
+                ];
+                function refresh() {
+                    var zoom = map.getZoom();
+                    ranges.forEach(function(range) {
+                        var visible = zoom >= range[1] && zoom <= range[2];
+                        if (visible && !map.hasLayer(range[0])) { map.addLayer(range[0]); }
+                        if (!visible && map.hasLayer(range[0])) { map.removeLayer(range[0]); }
+                    });
+                }
+                map.on('zoomend', refresh);
+                refresh();
+            })();
+        {% endmacro %}
+        """)
+
+    def __init__(self, ranges):
+        super().__init__()
+        self._name = 'ZoomLevelSwitch'
+        self.ranges = ranges
+
+
+def fit_cell_budget(cells, zoom, max_cells=MAX_MAP_CELLS):
+    """
+    Cells of `zoom`, merged into coarser levels until at most `max_cells` remain
+
+    If even zoom 0 is over the budget, the `max_cells` cells with the most
+    detections are kept.
+
+    Returns:
+        tuple: (cells frame, zoom level of its cells)
+    """
+    while len(cells) > max_cells and zoom > 0:
+        zoom -= 1
+        cells = coarsen_cells(cells, zoom)
+    if len(cells) > max_cells:
+        cells = cells.nlargest(max_cells, 'count')
+    return cells, zoom
+
+
+def add_fire_layers(fire_map, data, cell_levels, max_points=MAX_MAP_POINTS, max_cells=MAX_MAP_CELLS):
+    """
+    Add zoom-dependent fire layers: aggregated cells when zoomed out, points when zoomed in
+
+    Each cell level covers the zooms up to the next level. Levels with more
+    than `max_cells` cells are skipped (the coarser level stays on); when the
+    coarsest level itself is over, it is merged into coarser cells (see
+    fit_cell_budget). Raw points are only sent when there are at most
+    `max_points` of them, so the browser never receives more than a bounded
+    number of features; without cell levels, too many points are drawn as
+    cells of the coarsest pyramid zoom so the map is never left empty.
+
+    Args:
+        fire_map (folium.Map): Map to draw on
+        data (pd.DataFrame): Filtered typed detections
+        cell_levels (dict): {zoom: cells frame} from fire_aggregation.fire_cell_levels
+    """
+    if not cell_levels and len(data) > max_points:
+        cell_levels = {PYRAMID_ZOOMS[0]: aggregate_detections(data, PYRAMID_ZOOMS[0])}
+    zooms = sorted(cell_levels)
+    usable = [zoom for zoom in zooms if zoom == zooms[0] or len(cell_levels[zoom]) <= max_cells]
+    levels = {zoom: cell_levels[zoom] for zoom in usable}
+    if zooms:
+        levels[zooms[0]], _ = fit_cell_budget(cell_levels[zooms[0]], zooms[0], max_cells)
+
+    ranges = []
+    for i, zoom in enumerate(usable):
+        layer = FireCellsLayer(levels[zoom]).add_to(fire_map)
+        min_zoom = 0 if i == 0 else zoom
+        max_zoom = usable[i + 1] - 1 if i + 1 < len(usable) else MAX_ZOOM
+        ranges.append([layer, min_zoom, max_zoom])
+
+    if len(data) <= max_points:
+        points_from = zooms[-1] + 1 if zooms else 0
+        if ranges:
+            ranges[-1][2] = points_from - 1
+        ranges.append([FirePointsLayer(data).add_to(fire_map), points_from, MAX_ZOOM])
+
+    ZoomLevelSwitch(ranges).add_to(fire_map)
+    return fire_map
+
+
+def add_event_layer(fire_map, events, max_events=MAX_MAP_EVENTS):
+    """Outline the `max_events` events with the highest total FRP"""
+    if len(events) > max_events:
+        events = events.nlargest(max_events, 'total_frp')
+    return FireEventsLayer(events).add_to(fire_map)
+
+
+def _legacy_fire_map(data):
+    """The original per-row CircleMarker map, kept only as the benchmark baseline"""
+    india_map = folium.Map(location=[22.5937, 78.9629], zoom_start=5)
+    for _, row in data.iterrows():
+        tooltip = f"""
+        <b>Brightness:</b> {row['brightness']}<br>
+        <b>Latitude:</b> {row['latitude']}<br>
+        <b>Longitude:</b> {row['longitude']}<br>
+        <b>Date:</b> {row['acq_datetime']}<br>
+        <b>Confidence:</b> {row['confidence']}<br>
+        <b>FRP:</b> {row['frp']}<br>
+        <b>Day/Night:</b> {row['daynight']}
+        """
+        confidence = row['confidence']
+        color = 'red' if confidence >= 80 else 'orange' if confidence >= 50 else 'green'
+        folium.CircleMarker(
+            location=[row['latitude'], row['longitude']],
+            radius=5, color=color, fill=True, fill_opacity=0.7, tooltip=tooltip
+        ).add_to(india_map)
+    return india_map
+
+
+def _synthetic_detections(n, seed=0):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        'latitude': rng.uniform(8, 37, n).astype(np.float32),
+        'longitude': rng.uniform(68, 97, n).astype(np.float32),
+        'brightness': rng.uniform(300, 400, n).astype(np.float32),
+        'acq_datetime': pd.Timestamp('2020-01-01') + pd.to_timedelta(rng.integers(0, 31 * 24 * 60, n), unit='m'),
+        'confidence': rng.integers(0, 101, n).astype(np.uint8),
+        'frp': rng.uniform(0, 200, n).astype(np.float32),
+        'daynight': pd.Categorical(rng.choice(['D', 'N'], n)),
+    })
+
+
+def benchmark(sizes=(10_000, 100_000, 1_000_000), legacy_limit=10_000):
+    """Print map build time and rendered HTML size for the bulk and legacy paths"""
+    print(f"{'points':>10} {'path':>8} {'build s':>9} {'html MB':>9}")
+    for n in sizes:
+        data = _synthetic_detections(n)
+        builders = [('bulk', lambda: FirePointsLayer(data).add_to(folium.Map(location=[22.5937, 78.9629], zoom_start=5)))]
+        if n <= legacy_limit:
+            builders.append(('legacy', lambda: _legacy_fire_map(data)))
+        for label, build in builders:
+            start = time.perf_counter()
+            html = build().get_root().render()
+            elapsed = time.perf_counter() - start
+            print(f"{n:>10} {label:>8} {elapsed:>9.2f} {len(html) / 1e6:>9.2f}")
+
+
+if __name__ == '__main__':
+    benchmark()
@@ -0,0 +1,174 @@
+import copy
+import threading
+from datetime import date, datetime, timedelta
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from fire_store import concat_fire_frames, load_fire_data, source_signature
+
+
+class FireQueryEngine:
+    """Date-sorted fire detections answering range filters by binary search"""
+
+    def __init__(self, data, time_column='acq_datetime'):
+        """
+        Sort the detections by acquisition time once
+
+        Args:
+            data (pd.DataFrame): Typed frame from fire_store.load_fire_data
+            time_column (str): datetime64 column to index on
+        """
+        self.time_column = time_column
+        # In-order chunks appended since the last read, concatenated on first use
+        self._pending = []
+        self._pending_rows = 0
+        # Shared across sessions: guards the pending chunks, the flush and the state swap
+        self._lock = threading.RLock()
+        self._set_data(data)
+
+    def _set_data(self, data):
+        times = data[self.time_column].to_numpy()
+        if len(times) > 1 and not (times[1:] >= times[:-1]).all():
+            data = data.iloc[np.argsort(times, kind='stable')]
+        data = data.reset_index(drop=True)
+
+        # The frame and plain NumPy views of its hot columns, so filters never
+        # go through pandas; swapped in as one tuple so readers never mix versions
+        self._state = (
+            data,
+            data[self.time_column].to_numpy(),
+            data['confidence'].to_numpy(),
+            data['latitude'].to_numpy(),
+            data['longitude'].to_numpy(),
+        )
+        self._last_time = self._state[1][-1] if len(data) else None
+
+    def _current(self):
+        """(data, times, confidence, latitude, longitude) with pending chunks folded in by one concatenation"""
+        with self._lock:
+            if self._pending:
+                pending, self._pending, self._pending_rows = self._pending, [], 0
+                self._set_data(concat_fire_frames([self._state[0]] + pending))
+            return self._state
+
+    @property
+    def data(self):
+        """All detections in acquisition-time order"""
+        return self._current()[0]
+
+    def snapshot(self):
+        """Read-only engine over the rows appended so far; later appends do not change it"""
+        view = copy.copy(self)
+        view._state = self._current()
+        view._pending, view._pending_rows = [], 0
+        view._lock = threading.RLock()
+        return view
+
+    def append(self, rows):
+        """
+        Add new detections without re-sorting the archive when possible
+
+        NRT drops are normally newer than everything already loaded; those
+        rows are queued and concatenated once, at the next read, which keeps
+        every existing row at its position and makes an ingest of many chunks
+        linear overall. Late rows fall back to a stable re-sort.
+
+        Args:
+            rows (pd.DataFrame): Typed detections with the same columns
+
+        Returns:
+            bool: True if existing row positions are unchanged
+        """
+        if len(rows) == 0:
+            return True
+        rows = rows.sort_values(self.time_column, kind='stable')
+        times = rows[self.time_column].to_numpy()
+        with self._lock:
+            if self._last_time is not None and times[0] < self._last_time:
+                self._set_data(concat_fire_frames([self.data, rows]))
+                return False
+            self._pending.append(rows)
+            self._pending_rows += len(rows)
+            self._last_time = times[-1]
+            return True
+
+    def __len__(self):
+        with self._lock:
+            return len(self._state[0]) + self._pending_rows
+
+    @property
+    def min_time(self):
+        times = self._current()[1]
+        return pd.Timestamp(times[0]) if len(times) else None
+
+    @property
+    def max_time(self):
+        times = self._current()[1]
+        return pd.Timestamp(times[-1]) if len(times) else None
+
+    def _bounds(self, times, start, end):
+        lo = 0 if start is None else np.searchsorted(
+            times, np.datetime64(pd.Timestamp(start), 'ns'), side='left')
+        if end is None:
+            hi = len(times)
+        elif isinstance(end, date) and not isinstance(end, datetime):
+            next_day = np.datetime64(pd.Timestamp(end + timedelta(days=1)), 'ns')
+            hi = np.searchsorted(times, next_day, side='left')
+        else:
+            hi = np.searchsorted(times, np.datetime64(pd.Timestamp(end), 'ns'), side='right')
+        return int(lo), int(max(hi, lo))
+
+    def time_bounds(self, start, end):
+        """
+        Row positions [lo, hi) of detections between start and end
+
+        A `date` end covers that whole day; a `datetime` end is inclusive.
+        """
+        return self._bounds(self._current()[1], start, end)
+
+    def query(self, start, end, min_confidence=0, bbox=None):
+        """
+        Detections in a date range, above a confidence level and inside a box
+
+        Only the date slice found by binary search is scanned for the
+        confidence and bbox conditions. When no row of the slice is rejected
+        the slice itself is returned without copying.
+
+        Args:
+            start: First date/datetime to include (None for open start)
+            end: Last date/datetime to include (None for open end)
+            min_confidence (int): Minimum `confidence` value
+            bbox (tuple): Optional (south, west, north, east) in degrees
+
+        Returns:
+            pd.DataFrame: Matching rows in acquisition-time order
+        """
+        # One state for the whole query, even if an append lands meanwhile
+        data, times, confidence, latitude, longitude = self._current()
+        lo, hi = self._bounds(times, start, end)
+        window = data.iloc[lo:hi]
+
+        mask = None
+        if min_confidence > 0:
+            mask = confidence[lo:hi] >= min_confidence
+        if bbox is not None:
+            south, west, north, east = bbox
+            lat = latitude[lo:hi]
+            lon = longitude[lo:hi]
+            in_box = (lat >= south) & (lat <= north) & (lon >= west) & (lon <= east)
+            mask = in_box if mask is None else mask & in_box
+
+        if mask is None or mask.all():
+            return window
+        return window[mask]
+
+
+@st.cache_resource(show_spinner=False, max_entries=8)
+def _build_fire_engine(path, signature):
+    return FireQueryEngine(load_fire_data(path))
+
+
+def load_fire_engine(path):
+    """Shared FireQueryEngine over the detections in `path`, rebuilt when it changes"""
+    return _build_fire_engine(path, source_signature(path))
@@ -0,0 +1,233 @@
+import copy
+import numpy as np
+import streamlit as st
+
+from fire_query import load_fire_engine
+from fire_store import source_signature
+
+EARTH_RADIUS_KM = 6371.0088
+
+# Grid sizing: aim for a handful of detections per cell, capped in total cells
+POINTS_PER_CELL = 8
+MIN_CELL_DEGREES = 0.01
+MAX_CELLS = 4_000_000
+
+# Inserted points wait in a small unsorted buffer until it reaches this share of the index
+PENDING_FRACTION = 0.05
+MIN_PENDING = 10_000
+
+
+def haversine_km(lat1, lon1, lat2, lon2):
+    """Great-circle distance in km, broadcasting over NumPy arrays"""
+    lat1, lon1, lat2, lon2 = (np.radians(np.asarray(v, dtype=np.float64)) for v in (lat1, lon1, lat2, lon2))
+    a = (
+        np.sin((lat2 - lat1) / 2) ** 2 +
+        np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    )
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.minimum(a, 1.0)))
+
+
+def _gather_ranges(starts, ends):
+    """Concatenate np.arange(s, e) for every (s, e) pair without a Python loop"""
+    lengths = ends - starts
+    total = int(lengths.sum())
+    if total == 0:
+        return np.empty(0, dtype=np.int64)
+    shifts = starts - np.concatenate(([0], np.cumsum(lengths)[:-1]))
+    return np.repeat(shifts, lengths) + np.arange(total, dtype=np.int64)
+
+
+class FireSpatialIndex:
+    """Uniform lat/lon grid over fire detections for bbox, radius and k-nearest lookups"""
+
+    def __init__(self, latitude, longitude, cell_size=None):
+        """
+        Bucket points into grid cells stored contiguously in cell order
+
+        Args:
+            latitude (array): Detection latitudes in degrees
+            longitude (array): Detection longitudes in degrees
+            cell_size (float): Cell edge in degrees, chosen from the data if None
+        """
+        latitude = np.asarray(latitude)
+        longitude = np.asarray(longitude)
+        self.size = len(latitude)
+
+        self.lat0 = float(latitude.min()) if self.size else 0.0
+        self.lon0 = float(longitude.min()) if self.size else 0.0
+        span_lat = (float(latitude.max()) - self.lat0) if self.size else 0.0
+        span_lon = (float(longitude.max()) - self.lon0) if self.size else 0.0
+
+        if cell_size is None:
+            target_cells = max(self.size // POINTS_PER_CELL, 1)
+            cell_size = np.sqrt(max(span_lat, MIN_CELL_DEGREES) * max(span_lon, MIN_CELL_DEGREES) / target_cells)
+        cell_size = max(float(cell_size), MIN_CELL_DEGREES)
+        while (int(span_lat // cell_size) + 1) * (int(span_lon // cell_size) + 1) > MAX_CELLS:
+            cell_size *= 2
+        self.cell_size = cell_size
+        self.n_rows = int(span_lat // cell_size) + 1
+        self.n_cols = int(span_lon // cell_size) + 1
+
+        cell_ids = self._rows(latitude) * self.n_cols + self._cols(longitude)
+        self.order = np.argsort(cell_ids, kind='stable')
+        self.latitude = latitude[self.order]
+        self.longitude = longitude[self.order]
+
+        counts = np.bincount(cell_ids, minlength=self.n_rows * self.n_cols)
+        self.offsets = np.concatenate(([0], np.cumsum(counts)))
+
+        # Recently inserted points, scanned linearly until merged into the grid
+        self._pending_latitude = latitude[:0]
+        self._pending_longitude = longitude[:0]
+        self._pending_positions = np.empty(0, dtype=np.int64)
+
+    def insert(self, latitude, longitude, positions):
+        """
+        Add points without rebuilding the grid
+
+        New points are buffered and merged into their cells once the buffer
+        grows past PENDING_FRACTION of the index. Points outside the original
+        extent land in the edge cells, which keeps every query exact.
+
+        Args:
+            latitude (array): New latitudes
+            longitude (array): New longitudes
+            positions (array): Row positions the queries should return for them
+        """
+        self._pending_latitude = np.concatenate((self._pending_latitude, np.asarray(latitude, dtype=self.latitude.dtype)))
+        self._pending_longitude = np.concatenate((self._pending_longitude, np.asarray(longitude, dtype=self.longitude.dtype)))
+        self._pending_positions = np.concatenate((self._pending_positions, np.asarray(positions, dtype=np.int64)))
+        self.size += len(positions)
+        if len(self._pending_positions) > max(MIN_PENDING, PENDING_FRACTION * self.size):
+            self._merge_pending()
+
+    def snapshot(self):
+        """Index as of now; insert() rebinds arrays rather than writing into them, so a shallow copy is enough"""
+        return copy.copy(self)
+
+    def _merge_pending(self):
+        cell_ids = self._rows(self._pending_latitude) * self.n_cols + self._cols(self._pending_longitude)
+        order = np.argsort(cell_ids, kind='stable')
+        cell_ids = cell_ids[order]
+
+        # Each new point goes to the end of its cell's run
+        at = self.offsets[cell_ids + 1]
+        self.latitude = np.insert(self.latitude, at, self._pending_latitude[order])
+        self.longitude = np.insert(self.longitude, at, self._pending_longitude[order])
+        self.order = np.insert(self.order, at, self._pending_positions[order])
+        counts = np.bincount(cell_ids, minlength=self.n_rows * self.n_cols)
+        self.offsets = self.offsets + np.concatenate(([0], np.cumsum(counts)))
+
+        self._pending_latitude = self._pending_latitude[:0]
+        self._pending_longitude = self._pending_longitude[:0]
+        self._pending_positions = self._pending_positions[:0]
+
+    def _rows(self, latitude):
+        rows = np.floor((np.asarray(latitude, dtype=np.float64) - self.lat0) / self.cell_size)
+        return np.clip(rows, 0, self.n_rows - 1).astype(np.int64)
+
+    def _cols(self, longitude):
+        cols = np.floor((np.asarray(longitude, dtype=np.float64) - self.lon0) / self.cell_size)
+        return np.clip(cols, 0, self.n_cols - 1).astype(np.int64)
+
+    def _candidates(self, south, west, north, east):
+        """Positions (in cell order) of every point in cells touching the box"""
+        if len(self.order) == 0 or south > north or west > east:
+            return np.empty(0, dtype=np.int64)
+        rows = np.arange(self._rows(south), self._rows(north) + 1)
+        first_col, last_col = self._cols(west), self._cols(east)
+        starts = self.offsets[rows * self.n_cols + first_col]
+        ends = self.offsets[rows * self.n_cols + last_col + 1]
+        return _gather_ranges(starts, ends)
+
+    def _gather(self, south, west, north, east):
+        """(latitude, longitude, row position) of candidate points for a box, buffer included"""
+        candidates = self._candidates(south, west, north, east)
+        return (
+            np.concatenate((self.latitude[candidates], self._pending_latitude)),
+            np.concatenate((self.longitude[candidates], self._pending_longitude)),
+            np.concatenate((self.order[candidates], self._pending_positions)),
+        )
+
+    def query_bbox(self, south, west, north, east):
+        """
+        Detections inside a bounding box
+
+        Returns:
+            np.ndarray: Row positions into the indexed data
+        """
+        lat, lon, positions = self._gather(south, west, north, east)
+        inside = (lat >= south) & (lat <= north) & (lon >= west) & (lon <= east)
+        return positions[inside]
+
+    def query_radius(self, latitude, longitude, radius_km, return_distance=False):
+        """
+        Detections within `radius_km` of a point (haversine distance)
+
+        Returns:
+            np.ndarray: Row positions, plus distances in km if return_distance
+        """
+        dlat = np.degrees(radius_km / EARTH_RADIUS_KM)
+        south, north = latitude - dlat, latitude + dlat
+        if south <= -90 or north >= 90:
+            west, east = -180.0, 180.0
+        else:
+            # Widest longitude span of the circle is at the latitude closest to a pole
+            max_abs_lat = np.radians(max(abs(south), abs(north)))
+            dlon = np.degrees(radius_km / (EARTH_RADIUS_KM * np.cos(max_abs_lat)))
+            west, east = longitude - dlon, longitude + dlon
+
+        lat, lon, positions = self._gather(south, west, north, east)
+        distances = haversine_km(latitude, longitude, lat, lon)
+        inside = distances <= radius_km
+        positions = positions[inside]
+        if return_distance:
+            return positions, distances[inside]
+        return positions
+
+    def query_knn(self, latitude, longitude, k=10):
+        """
+        The k detections nearest to a point
+
+        Grows a square of cells around the point until it holds k detections,
+        then confirms with an exact radius query at the k-th distance found.
+
+        Returns:
+            tuple: (row positions, distances in km), nearest first
+        """
+        k = min(k, self.size)
+        if k <= 0:
+            return np.empty(0, dtype=np.int64), np.empty(0)
+
+        lat_end = self.lat0 + self.n_rows * self.cell_size
+        lon_end = self.lon0 + self.n_cols * self.cell_size
+        half = self.cell_size
+        while True:
+            south, west, north, east = latitude - half, longitude - half, latitude + half, longitude + half
+            lat, lon, _ = self._gather(south, west, north, east)
+            covers_grid = south <= self.lat0 and west <= self.lon0 and north >= lat_end and east >= lon_end
+            if len(lat) >= k or covers_grid:
+                break
+            half *= 2
+
+        distances = haversine_km(latitude, longitude, lat, lon)
+        kth = np.partition(distances, k - 1)[k - 1]
+
+        positions, distances = self.query_radius(latitude, longitude, kth, return_distance=True)
+        nearest = np.argsort(distances, kind='stable')[:k]
+        return positions[nearest], distances[nearest]
+
+
+@st.cache_resource(show_spinner=False, max_entries=8)
+def _build_fire_spatial_index(path, signature):
+    data = load_fire_engine(path).data
+    return FireSpatialIndex(data['latitude'].to_numpy(), data['longitude'].to_numpy())
+
+
+def load_fire_spatial_index(path):
+    """
+    Shared spatial index over the detections in `path`
+
+    Positions returned by its queries index rows of load_fire_engine(path).data.
+    """
+    return _build_fire_spatial_index(path, source_signature(path))
@@ -0,0 +1,147 @@
+import os
+import glob
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+# Parquet copies of the source CSVs live next to them in this folder
+CACHE_DIR = '.fire_cache'
+
+# Compact dtypes for the FIRMS NRT columns
+FLOAT_COLUMNS = ['latitude', 'longitude', 'brightness', 'scan', 'track', 'bright_t31', 'frp', 'bright_ti4', 'bright_ti5']
+CATEGORY_COLUMNS = ['satellite', 'instrument', 'version', 'daynight']
+CSV_DTYPES = {
+    **{column: 'float32' for column in FLOAT_COLUMNS},
+    **{column: 'category' for column in CATEGORY_COLUMNS},
+    'acq_date': 'str',
+}
+
+# VIIRS exports name their I-4/I-5 brightness temperatures differently
+VIIRS_COLUMNS = {'bright_ti4': 'brightness', 'bright_ti5': 'bright_t31'}
+
+# VIIRS reports confidence as a low/nominal/high class; each class maps into
+# the matching MODIS percentage band (low < 30, nominal 30-79, high >= 80)
+# so one confidence threshold filters both instruments
+CONFIDENCE_CLASSES = {'l': 20, 'n': 60, 'h': 90}
+
+
+def source_signature(path):
+    """Return (size, mtime) of the source file, used to invalidate stale caches"""
+    stat = os.stat(path)
+    return stat.st_size, stat.st_mtime_ns
+
+
+def confidence_values(confidence):
+    """MODIS 0-100 confidence as uint8, with VIIRS l/n/h classes mapped through CONFIDENCE_CLASSES"""
+    if pd.api.types.is_numeric_dtype(confidence):
+        return confidence.astype(np.uint8)
+    text = confidence.astype(str).str.strip().str.lower()
+    classes = text.map(CONFIDENCE_CLASSES)
+    return classes.fillna(pd.to_numeric(text.where(classes.isna()))).astype(np.uint8)
+
+
+def type_fire_frame(raw):
+    """
+    Convert a raw FIRMS frame into the typed layout used by the app
+
+    Args:
+        raw (pd.DataFrame): Frame read with CSV_DTYPES (acq_date as text)
+
+    Returns:
+        pd.DataFrame: Frame with float32 measurements, categorical labels and a
+        single `acq_datetime` column replacing `acq_date` + `acq_time`; MODIS
+        and VIIRS files come out with the same columns
+    """
+    raw = raw.rename(columns=VIIRS_COLUMNS)
+
+    # acq_time is HHMM in UTC, sometimes without leading zeros
+    hours, minutes = np.divmod(pd.to_numeric(raw['acq_time']).to_numpy(np.int64), 100)
+    offsets = pd.to_timedelta(hours * 60 + minutes, unit='m')
+    acq_datetime = pd.to_datetime(raw['acq_date'], format='%Y-%m-%d') + offsets
+
+    typed = raw.drop(columns=['acq_date', 'acq_time'])
+    typed.insert(raw.columns.get_loc('acq_date'), 'acq_datetime', acq_datetime.astype('datetime64[ns]'))
+    typed['confidence'] = confidence_values(typed['confidence'])
+    return typed
+
+
+def read_fire_csv(path, **kwargs):
+    """Parse a FIRMS CSV straight into typed columns (extra kwargs go to read_csv)"""
+    raw = pd.read_csv(path, dtype=CSV_DTYPES, **kwargs)
+    if 'chunksize' in kwargs:
+        return (type_fire_frame(chunk) for chunk in raw)
+    return type_fire_frame(raw)
+
+
+def concat_fire_frames(frames):
+    """Concatenate typed fire frames, keeping categorical columns categorical"""
+    non_empty = [frame for frame in frames if len(frame)]
+    if not non_empty:
+        # Keep the typed (empty) schema when there is one
+        return frames[0].reset_index(drop=True) if frames else pd.DataFrame()
+    frames = non_empty
+    if len(frames) == 1:
+        return frames[0].reset_index(drop=True)
+    frames = [frame.copy() for frame in frames]
+    for column in CATEGORY_COLUMNS:
+        if all(column in frame for frame in frames):
+            categories = pd.api.types.union_categoricals([frame[column] for frame in frames]).categories
+            for frame in frames:
+                frame[column] = frame[column].cat.set_categories(categories)
+    return pd.concat(frames, ignore_index=True)
+
+
+def cache_path(path, signature):
+    """Location of the Parquet copy for a given version of the source file"""
+    folder = os.path.join(os.path.dirname(os.path.abspath(path)), CACHE_DIR)
+    stem = os.path.splitext(os.path.basename(path))[0]
+    size, mtime = signature
+    return os.path.join(folder, f"{stem}-{size}-{mtime}.parquet")
+
+
+def build_fire_cache(path, signature):
+    """Parse the CSV and persist it as Parquet, dropping copies of older versions"""
+    frame = read_fire_csv(path)
+    target = cache_path(path, signature)
+    os.makedirs(os.path.dirname(target), exist_ok=True)
+
+    stem = os.path.splitext(os.path.basename(path))[0]
+    for stale in glob.glob(os.path.join(os.path.dirname(target), f"{stem}-*.parquet")):
+        os.remove(stale)
+
+    try:
+        # Write to a temp name first so a concurrent reader never sees half a file
+        frame.to_parquet(target + '.tmp', index=False)
+        os.replace(target + '.tmp', target)
+    except ImportError:
+        # No Parquet engine installed: keep serving from memory only
+        pass
+    return frame
+
+
+@st.cache_resource(show_spinner=False, max_entries=8)
+def _load_fire_frame(path, signature, columns):
+    target = cache_path(path, signature)
+    if os.path.exists(target):
+        return pd.read_parquet(target, columns=list(columns) if columns else None)
+
+    frame = build_fire_cache(path, signature)
+    return frame[list(columns)] if columns else frame
+
+
+def load_fire_data(path, columns=None):
+    """
+    Load FIRMS fire detections once per process and share them across sessions
+
+    The CSV is parsed only the first time a given version of the file is seen;
+    afterwards the typed Parquet copy is read back, projected to `columns`.
+    Editing or replacing the CSV changes its signature and forces a rebuild.
+
+    Args:
+        path (str): Path to the FIRMS CSV
+        columns (list): Optional subset of columns to load
+
+    Returns:
+        pd.DataFrame: Shared typed frame, treat it as read-only
+    """
+    return _load_fire_frame(path, source_signature(path), tuple(columns) if columns else None)
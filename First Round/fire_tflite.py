@@ -0,0 +1,158 @@
+import os
+import sys
+import time
+import argparse
+import resource
+import multiprocessing
+import numpy as np
+import tensorflow as tf
+
+from fire_detection import BACKENDS, FIRE_THRESHOLD, image_dataset, image_files, load_fire_predictor, tflite_path
+
+# Images used to calibrate int8 activation ranges
+REPRESENTATIVE_SAMPLES = 200
+
+
+def export_tflite(model_path, mode, representative_images=None, samples=REPRESENTATIVE_SAMPLES):
+    """
+    Convert the Keras fire model to a quantized TFLite flatbuffer
+
+    float16 stores weights as half floats. int8 also quantizes activations,
+    calibrated by running the model over `representative_images`; inputs and
+    outputs stay float32, so callers feed the same 0-255 images as the .h5.
+
+    Args:
+        model_path (str): Keras .h5 model
+        mode (str): 'float16' or 'int8'
+        representative_images (list): Image paths for int8 calibration
+
+    Returns:
+        str: Path of the written .tflite file
+    """
+    converter = tf.lite.TFLiteConverter.from_keras_model(tf.keras.models.load_model(model_path))
+    converter.optimizations = [tf.lite.Optimize.DEFAULT]
+    if mode == 'float16':
+        converter.target_spec.supported_types = [tf.float16]
+    elif mode == 'int8':
+        if not representative_images:
+            raise ValueError('int8 export needs representative images for calibration')
+        # Spread the calibration sample over the whole (sorted) image list
+        step = max(len(representative_images) // samples, 1)
+        calibration = image_dataset(representative_images[::step][:samples], batch_size=1)
+
+        def representative_dataset():
+            for _, image in calibration:
+                yield [image]
+
+        converter.representative_dataset = representative_dataset
+        converter.target_spec.supported_ops = [tf.lite.OpsSet.TFLITE_BUILTINS_INT8]
+    else:
+        raise ValueError(f"Unknown export mode {mode!r}")
+
+    path = tflite_path(model_path, mode)
+    with open(path, 'wb') as f:
+        f.write(converter.convert())
+    return path
+
+
+def _benchmark_backend(model_path, backend, images, latency_samples):
+    """Runs in a fresh process so resident memory is measured per backend"""
+    predictor = load_fire_predictor(model_path, backend)
+
+    # Per-image latency: one image per call, the interactive path
+    single = [image.numpy() for _, image in image_dataset(images[:latency_samples], batch_size=1)]
+    predictor(single[0])
+    latencies = []
+    for image in single:
+        start = time.perf_counter()
+        predictor(image)
+        latencies.append(time.perf_counter() - start)
+
+    # Throughput and accuracy over the whole held-out set in batches
+    start = time.perf_counter()
+    scores = {}
+    for names, batch in image_dataset(images):
+        scores.update(zip((name.decode() for name in names.numpy()), predictor(batch)))
+    elapsed = time.perf_counter() - start
+
+    # Images that failed to decode have no score and stay NaN
+    probabilities = np.array([scores.get(image, np.nan) for image in images], dtype=np.float64)
+    return {
+        'backend': backend,
+        'latency_ms': float(np.median(latencies) * 1000),
+        'images_per_sec': len(scores) / elapsed,
+        'max_rss_mb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+        'probabilities': probabilities,
+    }
+
+
+def benchmark(model_path, fire_dir, non_fire_dir, backends=BACKENDS, latency_samples=100):
+    """
+    Compare latency, throughput, memory and accuracy of the .h5 and its exports
+
+    Uses a held-out set laid out like the training notebook: one directory of
+    fire images and one of non-fire images. Images any backend failed to
+    decode are left out of every backend's accuracy, so all backends are
+    scored on the same images.
+    """
+    fire_images, non_fire_images = image_files(fire_dir), image_files(non_fire_dir)
+    images = fire_images + non_fire_images
+    labels = [1] * len(fire_images) + [0] * len(non_fire_images)
+
+    results = []
+    context = multiprocessing.get_context('spawn')
+    for backend in backends:
+        with context.Pool(1) as pool:
+            results.append(pool.apply(_benchmark_backend, (model_path, backend, images, latency_samples)))
+
+    # A NaN compared with the threshold reads as "no fire", so undecodable images are dropped first
+    scored = np.logical_and.reduce([np.isfinite(result['probabilities']) for result in results])
+    truth = np.asarray(labels, dtype=bool)[scored]
+    reference = results[0]['probabilities'][scored] > FIRE_THRESHOLD
+    print(
+        f"{len(images)} held-out images ({len(fire_images)} fire), "
+        f"{len(images) - int(scored.sum())} skipped as undecodable"
+    )
+    print(f"{'backend':>8} {'ms/image':>9} {'images/s':>9} {'RSS MB':>8} {'accuracy':>9} {'agrees':>7}")
+    for result in results:
+        predicted = result['probabilities'][scored] > FIRE_THRESHOLD
+        result['accuracy'] = float(np.mean(predicted == truth)) if scored.any() else float('nan')
+        result['skipped'] = int(len(images) - scored.sum())
+        agrees = np.mean(predicted == reference) if scored.any() else float('nan')
+        print(
+            f"{result['backend']:>8} {result['latency_ms']:>9.2f} {result['images_per_sec']:>9.1f} "
+            f"{result['max_rss_mb']:>8.0f} {result['accuracy']:>9.3f} {agrees:>7.3f}"
+        )
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Export and benchmark quantized TFLite fire detection models')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    export = commands.add_parser('export', help='Write float16/int8 .tflite files next to the .h5 model')
+    export.add_argument('model', help='Keras fire detection model (.h5)')
+    export.add_argument('--modes', nargs='+', default=['float16'], choices=BACKENDS[1:])
+    export.add_argument('--representative-dir', help='Images used to calibrate the int8 model (required for int8)')
+
+    bench = commands.add_parser('benchmark', help='Compare the .h5 and its exports on a held-out set')
+    bench.add_argument('model', help='Keras fire detection model (.h5)')
+    bench.add_argument('fire_dir', help='Held-out fire images')
+    bench.add_argument('non_fire_dir', help='Held-out non-fire images')
+    bench.add_argument('--backends', nargs='+', default=list(BACKENDS), choices=BACKENDS)
+    args = parser.parse_args(argv)
+
+    if args.command == 'export':
+        representative = image_files(args.representative_dir) if args.representative_dir else None
+        # Check before exporting anything, so int8 cannot fail after float16 already ran
+        if 'int8' in args.modes and not representative:
+            parser.error('int8 export needs --representative-dir with calibration images')
+        for mode in args.modes:
+            path = export_tflite(args.model, mode, representative)
+            print(f"{mode}: {path} ({os.path.getsize(path) / 1e6:.1f} MB)")
+    else:
+        benchmark(args.model, args.fire_dir, args.non_fire_dir, args.backends)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,227 @@
+import os
+import sys
+import time
+import argparse
+import numpy as np
+import folium
+from PIL import Image
+
+from fire_detection import BACKENDS, IMAGE_SIZE, load_fire_predictor
+
+# GeoTIFF orthomosaics are read window by window when rasterio is available
+try:
+    import rasterio
+    from rasterio.warp import transform_bounds
+    from rasterio.windows import Window
+except ImportError:
+    rasterio = None
+
+RASTER_EXTENSIONS = ('.tif', '.tiff')
+
+# Windows overlap by half a tile by default
+TILE_STRIDE = 112
+TILE_BATCH_SIZE = 32
+
+# Non-8-bit scenes are scaled so this percentile of rows sampled down the
+# scene maps to 255, the top of the range the model was trained on
+RANGE_SAMPLE_ROWS = 64
+RANGE_PERCENTILE = 99.5
+
+HEATMAP_COLOR = (255, 69, 0)
+HEATMAP_MAX_ALPHA = 200
+
+
+class ArrayScene:
+    """Scene held in an (H, W[, C]) array or np.memmap; only sliced rows are touched"""
+
+    def __init__(self, array, bounds=None):
+        self.array = array
+        self.height, self.width = array.shape[:2]
+        self.dtype = array.dtype
+        self.bounds = bounds
+
+    def read_rows(self, top, bottom):
+        """Rows [top, bottom) as an (rows, W, 3) array in the scene's own dtype"""
+        rows = np.asarray(self.array[top:bottom])
+        if rows.ndim == 2:
+            return np.repeat(rows[:, :, None], 3, axis=2)
+        return rows[:, :, :3]
+
+
+class RasterScene:
+    """GeoTIFF read through rasterio in row windows, never loaded whole"""
+
+    def __init__(self, source):
+        self.dataset = rasterio.open(source)
+        self.height, self.width = self.dataset.height, self.dataset.width
+        self.bands = [1, 2, 3] if self.dataset.count >= 3 else [1, 1, 1]
+        self.dtype = np.dtype(self.dataset.dtypes[0])
+        self.bounds = None
+        if self.dataset.crs is not None:
+            west, south, east, north = transform_bounds(self.dataset.crs, 'EPSG:4326', *self.dataset.bounds)
+            self.bounds = (south, west, north, east)
+
+    def read_rows(self, top, bottom):
+        data = self.dataset.read(self.bands, window=Window(0, top, self.width, bottom - top))
+        return np.moveaxis(data, 0, -1)
+
+
+def open_scene(source, bounds=None):
+    """
+    Open a large image for tiled scanning
+
+    `.npy` arrays are memory-mapped and GeoTIFFs are read in windows through
+    rasterio (which also supplies their lat/lon bounds); other formats are
+    decoded by PIL in full, so very large scenes should come as one of those.
+
+    Args:
+        source: Path or file-like object
+        bounds (tuple): (south, west, north, east) for scenes without georeferencing
+    """
+    name = source if isinstance(source, str) else getattr(source, 'name', '')
+    extension = os.path.splitext(name)[1].lower()
+    if extension == '.npy':
+        return ArrayScene(np.load(source, mmap_mode='r' if isinstance(source, str) else None), bounds)
+    if extension in RASTER_EXTENSIONS and rasterio is not None:
+        scene = RasterScene(source)
+        scene.bounds = scene.bounds or bounds
+        return scene
+    with Image.open(source) as image:
+        return ArrayScene(np.asarray(image.convert('RGB')), bounds)
+
+
+def window_origins(length, tile, stride):
+    """Window start offsets covering [0, length), the last window flush with the end"""
+    last = max(length - tile, 0)
+    origins = np.arange(0, last + 1, stride)
+    if origins[-1] != last:
+        origins = np.append(origins, last)
+    return origins
+
+
+def scene_scale(scene):
+    """
+    Factor taking a scene's pixel values into the model's 0-255 input range
+
+    8-bit scenes are left as they are. Other scenes (12/16-bit satellite
+    tiles stored as uint16, 0-1 float reflectances) are scaled so a high
+    percentile of rows sampled evenly down the scene lands on 255; one
+    factor per scene keeps every window comparable.
+    """
+    if scene.dtype == np.uint8:
+        return 1.0
+    rows = np.unique(np.linspace(0, scene.height - 1, min(RANGE_SAMPLE_ROWS, scene.height)).astype(np.int64))
+    sample = np.concatenate([scene.read_rows(row, row + 1).reshape(-1) for row in rows]).astype(np.float64)
+    sample = sample[np.isfinite(sample)]
+    high = np.percentile(sample, RANGE_PERCENTILE) if sample.size else 0.0
+    return 255.0 / high if high > 0 else 1.0
+
+
+def scan_scene(scene, predict_batch, stride=TILE_STRIDE, batch_size=TILE_BATCH_SIZE, report=None, scale=None):
+    """
+    Fire probability of every overlapping 224x224 window of a scene
+
+    The scene is read one strip of window rows at a time and windows are
+    sent through the model in batches, so peak memory is one strip plus one
+    batch whatever the scene size. Scenes smaller than a tile are edge-padded.
+    Pixel values are multiplied by `scale` (scene_scale by default) and
+    clipped to 0-255 before inference.
+
+    Args:
+        scene: ArrayScene or RasterScene from open_scene
+        predict_batch (callable): From fire_detection.load_fire_predictor
+        stride (int): Pixels between window origins
+        report (callable): Optional progress callback(windows done, windows total)
+        scale (float): Pixel value factor; scene_scale(scene) if None
+
+    Returns:
+        np.ndarray: (window rows, window columns) float32 heatmap
+    """
+    tile_height, tile_width = IMAGE_SIZE
+    tops = window_origins(scene.height, tile_height, stride)
+    lefts = window_origins(scene.width, tile_width, stride)
+    heatmap = np.empty((len(tops), len(lefts)), dtype=np.float32)
+    total = heatmap.size
+    scale = scene_scale(scene) if scale is None else scale
+
+    windows, slots = [], []
+
+    def flush():
+        batch = np.stack(windows).astype(np.float32)
+        if scale != 1.0:
+            batch = np.clip(batch * np.float32(scale), 0, 255)
+        heatmap.flat[slots] = predict_batch(batch)
+        if report is not None:
+            report(slots[-1] + 1, total)
+        windows.clear()
+        slots.clear()
+
+    for i, top in enumerate(tops):
+        strip = scene.read_rows(top, top + tile_height)
+        pad_rows = tile_height - strip.shape[0]
+        pad_cols = max(tile_width - strip.shape[1], 0)
+        if pad_rows or pad_cols:
+            strip = np.pad(strip, ((0, pad_rows), (0, pad_cols), (0, 0)), mode='edge')
+        for j, left in enumerate(lefts):
+            windows.append(strip[:, left:left + tile_width])
+            slots.append(i * len(lefts) + j)
+            if len(windows) == batch_size:
+                flush()
+    if windows:
+        flush()
+    return heatmap
+
+
+def heatmap_rgba(heatmap):
+    """Heatmap as an RGBA image: one colour, opacity rising with fire probability"""
+    rgba = np.zeros(heatmap.shape + (4,), dtype=np.uint8)
+    rgba[..., :3] = HEATMAP_COLOR
+    rgba[..., 3] = (np.clip(heatmap, 0, 1) * HEATMAP_MAX_ALPHA).astype(np.uint8)
+    return rgba
+
+
+def heatmap_overlay(heatmap, bounds, opacity=1.0, name='Fire probability'):
+    """
+    folium ImageOverlay of a heatmap stretched over the scene's bounds
+
+    Args:
+        bounds (tuple): (south, west, north, east) of the scanned scene
+    """
+    south, west, north, east = bounds
+    return folium.raster_layers.ImageOverlay(
+        image=heatmap_rgba(heatmap),
+        bounds=[[south, west], [north, east]],
+        opacity=opacity,
+        name=name,
+    )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Sliding-window fire detection over a large aerial/satellite scene')
+    parser.add_argument('model', help='Path to the Keras fire detection model (.h5)')
+    parser.add_argument('scene', help='GeoTIFF, .npy array or ordinary image')
+    parser.add_argument('--backend', default='keras', choices=BACKENDS, help='Keras model or quantized TFLite export')
+    parser.add_argument('--stride', type=int, default=TILE_STRIDE, help='Pixels between windows')
+    parser.add_argument('--batch-size', type=int, default=TILE_BATCH_SIZE, help='Windows per forward pass')
+    parser.add_argument('--output', default='fire_heatmap.npy', help='Where to save the heatmap array')
+    parser.add_argument('--png', help='Optional RGBA heatmap image')
+    args = parser.parse_args(argv)
+
+    predict_batch = load_fire_predictor(args.model, args.backend)
+    scene = open_scene(args.scene)
+    start = time.perf_counter()
+
+    def report(done, total):
+        elapsed = time.perf_counter() - start
+        print(f"{done}/{total} windows, {done / elapsed:,.1f} windows/sec", flush=True)
+
+    heatmap = scan_scene(scene, predict_batch, args.stride, args.batch_size, report)
+    np.save(args.output, heatmap)
+    if args.png:
+        Image.fromarray(heatmap_rgba(heatmap)).save(args.png)
+    print(f"{scene.width}x{scene.height} scene -> {heatmap.shape[1]}x{heatmap.shape[0]} heatmap, "
+          f"max fire probability {heatmap.max():.3f}, bounds {scene.bounds}")
+
+
+if __name__ == '__main__':
+    sys.exit(main())
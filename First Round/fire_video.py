@@ -0,0 +1,264 @@
+import os
+import sys
+import time
+import asyncio
+import argparse
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+import pandas as pd
+from PIL import Image
+
+from fire_detection import BACKENDS, FIRE_THRESHOLD, IMAGE_SIZE, image_files, load_fire_predictor
+
+# Video files are decoded with OpenCV when it is installed; frame directories need only PIL
+try:
+    import cv2
+except ImportError:
+    cv2 = None
+
+# Seconds between sampled frames: starts at the base, backs off on static
+# footage up to the maximum and drops back to the minimum on scene changes
+SAMPLE_INTERVAL = 0.5
+MIN_SAMPLE_INTERVAL = 0.25
+MAX_SAMPLE_INTERVAL = 2.0
+
+# 64-bit difference-hash distances: near-duplicate frames skip the model,
+# big jumps count as a scene change
+DUPLICATE_BITS = 4
+CHANGE_BITS = 16
+
+VIDEO_BATCH_SIZE = 16
+FRAME_QUEUE_SIZE = 64
+
+# Frame directories carry no timing of their own
+FRAME_DIRECTORY_FPS = 1.0
+
+
+class VideoFrames:
+    """Frames of a video file, read forward only"""
+
+    def __init__(self, path, temporary=False):
+        """
+        Args:
+            path (str): Video file
+            temporary (bool): Delete the file on close()
+        """
+        if cv2 is None:
+            raise ImportError('Reading video files needs OpenCV (opencv-python); use a frame directory instead')
+        self.capture = cv2.VideoCapture(path)
+        if not self.capture.isOpened():
+            raise ValueError(f"Cannot open video {path}")
+        self.fps = self.capture.get(cv2.CAP_PROP_FPS) or 25.0
+        self.position = 0
+        self.path = path
+        self.temporary = temporary
+
+    def read(self, after):
+        """
+        First frame at or after `after` seconds, as (timestamp, RGB array), or None at the end
+
+        Frames before it are only grabbed, not decoded.
+        """
+        target = int(np.ceil(after * self.fps))
+        while self.position < target:
+            if not self.capture.grab():
+                return None
+            self.position += 1
+        ok, frame = self.capture.read()
+        if not ok:
+            return None
+        self.position += 1
+        return (self.position - 1) / self.fps, cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+
+    def close(self):
+        self.capture.release()
+        if self.temporary:
+            os.remove(self.path)
+
+
+class FrameDirectory:
+    """Image files of a directory as frames at a fixed rate, in name order"""
+
+    def __init__(self, directory, fps=FRAME_DIRECTORY_FPS):
+        self.paths = image_files(directory)
+        self.fps = fps
+
+    def read(self, after):
+        index = int(np.ceil(after * self.fps))
+        if index >= len(self.paths):
+            return None
+        with Image.open(self.paths[index]) as image:
+            return index / self.fps, np.asarray(image.convert('RGB'))
+
+
+def open_frame_source(path, fps=None):
+    """VideoFrames for a video file, FrameDirectory for a directory of images"""
+    if os.path.isdir(path):
+        return FrameDirectory(path, fps or FRAME_DIRECTORY_FPS)
+    return VideoFrames(path)
+
+
+def open_video_upload(uploaded):
+    """VideoFrames over an uploaded video, spooled to a temporary file for OpenCV"""
+    with tempfile.NamedTemporaryFile(suffix=os.path.splitext(uploaded.name)[1], delete=False) as f:
+        f.write(uploaded.getvalue())
+    try:
+        return VideoFrames(f.name, temporary=True)
+    except Exception:
+        os.remove(f.name)
+        raise
+
+
+def frame_hash(frame):
+    """64-bit difference hash: brighter-than-right-neighbour bits of a 9x8 grayscale thumbnail"""
+    thumbnail = np.asarray(Image.fromarray(frame).convert('L').resize((9, 8), Image.BILINEAR), dtype=np.int16)
+    bits = (thumbnail[:, 1:] > thumbnail[:, :-1]).ravel()
+    return int(np.packbits(bits).view('>u8')[0])
+
+
+def hash_distance(a, b):
+    return bin(a ^ b).count('1')
+
+
+def frame_input(frame):
+    """Network input for a frame: 224x224 nearest-neighbour resize, like load_img"""
+    return np.asarray(Image.fromarray(frame).resize(IMAGE_SIZE[::-1], Image.NEAREST), dtype=np.float32)
+
+
+async def _produce(source, queue, skipped, executor, sample_interval):
+    """Decode sampled frames and queue the ones that differ from the last queued frame"""
+    loop = asyncio.get_running_loop()
+    interval = sample_interval
+    after = 0.0
+    last_hash = None
+    while True:
+        item = await loop.run_in_executor(executor, source.read, after)
+        if item is None:
+            break
+        timestamp, frame = item
+        current = await loop.run_in_executor(executor, frame_hash, frame)
+        distance = 64 if last_hash is None else hash_distance(current, last_hash)
+
+        if distance <= DUPLICATE_BITS:
+            # Static scene: reuse the previous verdict and sample less often
+            skipped.append(timestamp)
+            interval = min(interval * 2, MAX_SAMPLE_INTERVAL)
+        else:
+            await queue.put((timestamp, await loop.run_in_executor(executor, frame_input, frame)))
+            last_hash = current
+            if distance >= CHANGE_BITS:
+                interval = MIN_SAMPLE_INTERVAL
+            else:
+                interval = min(interval, sample_interval)
+        after = timestamp + interval
+    await queue.put(None)
+
+
+async def _consume(queue, predict_batch, scores, executor, batch_size, report):
+    """Run the model on whatever frames are queued, up to `batch_size` per pass"""
+    loop = asyncio.get_running_loop()
+    done = False
+    while not done:
+        batch = [await queue.get()]
+        while len(batch) < batch_size and not queue.empty():
+            batch.append(queue.get_nowait())
+        if batch[-1] is None:
+            batch.pop()
+            done = True
+        if not batch:
+            continue
+        images = np.stack([image for _, image in batch])
+        probabilities = await loop.run_in_executor(executor, predict_batch, images)
+        scores.update(zip((timestamp for timestamp, _ in batch), map(float, probabilities)))
+        if report is not None:
+            report(batch[-1][0], len(scores))
+
+
+async def _run_pipeline(source, predict_batch, sample_interval, batch_size, report):
+    queue = asyncio.Queue(maxsize=FRAME_QUEUE_SIZE)
+    skipped, scores = [], {}
+    # One thread decodes while another runs the model
+    with ThreadPoolExecutor(1) as decode_executor, ThreadPoolExecutor(1) as model_executor:
+        await asyncio.gather(
+            _produce(source, queue, skipped, decode_executor, sample_interval),
+            _consume(queue, predict_batch, scores, model_executor, batch_size, report),
+        )
+    return scores, skipped
+
+
+def fire_alerts(timeline, threshold=FIRE_THRESHOLD):
+    """Timestamps where the fire probability rises above the threshold"""
+    above = (timeline['fire_probability'] > threshold).to_numpy()
+    rising = above & ~np.concatenate(([False], above[:-1]))
+    return timeline['time_s'].to_numpy()[rising].tolist()
+
+
+def detect_fire_video(source, predict_batch, sample_interval=SAMPLE_INTERVAL, batch_size=VIDEO_BATCH_SIZE, report=None):
+    """
+    Fire probability timeline of a video or frame directory
+
+    Frames are sampled adaptively and near-duplicates (by difference hash)
+    skip the model, inheriting the previous probability. Decoding and
+    inference run as an asyncio producer/consumer pair on separate threads,
+    so the next frames decode while the current batch is in the model.
+
+    Args:
+        source: VideoFrames or FrameDirectory from open_frame_source
+        predict_batch (callable): From fire_detection.load_fire_predictor
+        report (callable): Optional progress callback(video seconds done, frames inferred)
+
+    Returns:
+        tuple: (timeline DataFrame with time_s, fire_probability, inferred;
+                alert timestamps; stats dict with realtime_factor)
+    """
+    start = time.perf_counter()
+    scores, skipped = asyncio.run(_run_pipeline(source, predict_batch, sample_interval, batch_size, report))
+    elapsed = time.perf_counter() - start
+
+    timeline = pd.DataFrame({
+        'time_s': list(scores) + skipped,
+        'fire_probability': list(scores.values()) + [np.nan] * len(skipped),
+        'inferred': [True] * len(scores) + [False] * len(skipped),
+    }).sort_values('time_s', kind='stable').reset_index(drop=True)
+    timeline['fire_probability'] = timeline['fire_probability'].ffill()
+
+    duration = float(timeline['time_s'].max()) if len(timeline) else 0.0
+    stats = {
+        'frames_sampled': len(timeline),
+        'frames_inferred': len(scores),
+        'frames_skipped': len(skipped),
+        'video_seconds': duration,
+        'seconds': elapsed,
+        'realtime_factor': duration / elapsed if elapsed > 0 else float('inf'),
+    }
+    return timeline, fire_alerts(timeline), stats
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Fire probability timeline for a video file or frame directory')
+    parser.add_argument('model', help='Path to the Keras fire detection model (.h5)')
+    parser.add_argument('source', help='Video file (needs OpenCV) or directory of frames')
+    parser.add_argument('--backend', default='keras', choices=BACKENDS, help='Keras model or quantized TFLite export')
+    parser.add_argument('--fps', type=float, help=f'Frame rate of a frame directory (default {FRAME_DIRECTORY_FPS})')
+    parser.add_argument('--sample-interval', type=float, default=SAMPLE_INTERVAL, help='Base seconds between sampled frames')
+    parser.add_argument('--batch-size', type=int, default=VIDEO_BATCH_SIZE, help='Most frames per forward pass')
+    parser.add_argument('--output', help='Optional CSV file for the timeline')
+    args = parser.parse_args(argv)
+
+    predict_batch = load_fire_predictor(args.model, args.backend)
+    source = open_frame_source(args.source, args.fps)
+    timeline, alerts, stats = detect_fire_video(source, predict_batch, args.sample_interval, args.batch_size)
+
+    print(
+        f"{stats['video_seconds']:.1f}s of video in {stats['seconds']:.1f}s ({stats['realtime_factor']:.1f}x realtime), "
+        f"{stats['frames_inferred']} frames inferred, {stats['frames_skipped']} near-duplicates skipped"
+    )
+    for timestamp in alerts:
+        print(f"ALERT: fire at {timestamp:.1f}s")
+    if args.output:
+        timeline.to_csv(args.output, index=False)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,106 @@
+from collections import namedtuple
+import numpy as np
+
+from fire_aggregation import aggregate_detections
+from fire_map_layers import FireCellsLayer, FirePointsLayer
+
+# Most points sent to the browser for one viewport
+DEFAULT_POINT_BUDGET = 5_000
+
+# Weight of log(1 + FRP) against confidence (0-100) when ranking points
+PRIORITY_FRP_WEIGHT = 10.0
+
+Viewport = namedtuple('Viewport', ['south', 'west', 'north', 'east', 'zoom', 'center'])
+
+# India at the map's opening zoom, used until the browser reports real bounds
+DEFAULT_VIEWPORT = Viewport(6.0, 68.0, 37.5, 98.0, 5, (22.5937, 78.9629))
+
+
+def parse_viewport(map_state, default=DEFAULT_VIEWPORT):
+    """
+    Viewport from the dict returned by streamlit_folium.st_folium
+
+    Args:
+        map_state (dict): Last st_folium return value (may be None)
+        default (Viewport): Used when bounds have not been reported yet
+    """
+    if not map_state or not map_state.get('bounds') or not map_state.get('zoom'):
+        return default
+    bounds = map_state['bounds']
+    south_west, north_east = bounds.get('_southWest') or {}, bounds.get('_northEast') or {}
+    if south_west.get('lat') is None or north_east.get('lat') is None:
+        return default
+
+    center = map_state.get('center') or {}
+    south, west = south_west['lat'], south_west['lng']
+    north, east = north_east['lat'], north_east['lng']
+    return Viewport(
+        south, west, north, east,
+        int(map_state['zoom']),
+        (center.get('lat', (south + north) / 2), center.get('lng', (west + east) / 2))
+    )
+
+
+def point_priority(data):
+    """Rank detections for downsampling: confident, intense fires first"""
+    confidence = data['confidence'].to_numpy().astype(np.float32)
+    frp = np.maximum(data['frp'].to_numpy(), 0)
+    return confidence + PRIORITY_FRP_WEIGHT * np.log1p(frp)
+
+
+def viewport_positions(engine, spatial_index, start, end, min_confidence, viewport):
+    """
+    Row positions in engine.data of the filtered detections inside the viewport
+
+    The spatial index culls to the viewport first; since engine.data is
+    sorted by time, the date range is then a bound check on the positions.
+    """
+    lo, hi = engine.time_bounds(start, end)
+    positions = spatial_index.query_bbox(viewport.south, viewport.west, viewport.north, viewport.east)
+    positions = positions[(positions >= lo) & (positions < hi)]
+    if min_confidence > 0:
+        confidence = engine.data['confidence'].to_numpy()
+        positions = positions[confidence[positions] >= min_confidence]
+    return positions
+
+
+def downsample_by_priority(data, budget):
+    """Keep at most `budget` rows of `data`, highest point_priority first, in original order"""
+    if len(data) <= budget:
+        return data
+    keep = np.argpartition(-point_priority(data), budget - 1)[:budget]
+    return data.iloc[np.sort(keep)]
+
+
+def add_viewport_layers(fire_map, engine, spatial_index, pyramid, start, end, min_confidence,
+                        viewport, budget=DEFAULT_POINT_BUDGET):
+    """
+    Add only what is visible at the current viewport and zoom
+
+    Below the finest pyramid zoom the visible aggregated cells are drawn;
+    above it the visible detections, downsampled to `budget` by priority.
+
+    Returns:
+        tuple: (features drawn, detections in view)
+    """
+    positions = viewport_positions(engine, spatial_index, start, end, min_confidence, viewport)
+    in_view = len(positions)
+
+    coarser = [zoom for zoom in pyramid.zooms if zoom <= viewport.zoom]
+    if viewport.zoom <= max(pyramid.zooms):
+        level = coarser[-1] if coarser else min(pyramid.zooms)
+        if min_confidence > 0:
+            cells = aggregate_detections(engine.data.iloc[positions], level)
+        else:
+            cells = pyramid.cells(level, start, end)
+            visible = (
+                (cells['north'] >= viewport.south) & (cells['south'] <= viewport.north) &
+                (cells['east'] >= viewport.west) & (cells['west'] <= viewport.east)
+            )
+            cells = cells[visible.to_numpy()]
+        FireCellsLayer(cells).add_to(fire_map)
+        return len(cells), in_view
+
+    points = downsample_by_priority(engine.data.iloc[np.sort(positions)], budget)
+    FirePointsLayer(points).add_to(fire_map)
+    return len(points), in_view
@@ -1,39 +1,81 @@
 import streamlit as st
 import os
+import time
 import numpy as np
-import tensorflow as tf
 import folium
 import pandas as pd
-from streamlit_folium import folium_static
+from streamlit_folium import folium_static, st_folium
+from fire_query import load_fire_engine
+from fire_aggregation import load_fire_pyramid, fire_cell_levels
+from fire_map_layers import add_fire_layers, add_event_layer
+from fire_spatial import load_fire_spatial_index
+from fire_viewport import parse_viewport, add_viewport_layers
+from fire_archive import MAX_WINDOW_DAYS, cap_window, default_window, open_fire_archive, load_fire_window
+from fire_events import load_fire_events
+from fire_ingest import load_live_fire_store
 
 # Load the fire detection model
 @st.cache_resource
 def load_fire_detection_model():
-    return tf.keras.models.load_model(r'new/fire_detection_model (1).h5')
+    from fire_detection import shared_fire_predictor
+    # FIRE_MODEL_BACKEND picks the .h5 model or a quantized TFLite export (float16, int8)
+    return shared_fire_predictor(
+        r'new/fire_detection_model (1).h5', 
+        os.environ.get('FIRE_MODEL_BACKEND', 'keras')
+    )
+
+# One inference worker per process, shared by every session
+@st.cache_resource
+def load_fire_inference_worker():
+    from fire_inference import MicroBatchWorker
+    return MicroBatchWorker(load_fire_detection_model())
+
+# Probabilities of images seen before, shared by every session
+@st.cache_resource
+def load_fire_prediction_cache():
+    from fire_detection import PredictionCache
+    return PredictionCache()
 
 # Image prediction function
 def predict_fire(image):
-    model = load_fire_detection_model()
-    img_height, img_width = 224, 224
+    from fire_detection import decode_image_fast, image_digest, read_image_bytes
+    contents = read_image_bytes(image)
     
-    # Convert uploaded file to image
-    img = tf.keras.preprocessing.image.load_img(
-        image, 
-        target_size=(img_height, img_width)
-    )
-    img_array = tf.keras.preprocessing.image.img_to_array(img)
-    img_array = tf.expand_dims(img_array, 0)
+    # Re-uploaded images are answered from the cache without running the model
+    cache = load_fire_prediction_cache()
+    key = image_digest(contents)
+    prediction = cache.get(key)
+    if prediction is None:
+        # Decode straight to the 224x224 input, downscaling inside the JPEG decoder
+        img_array = decode_image_fast(contents)
+        
+        # Batched with concurrent requests from other sessions
+        prediction = load_fire_inference_worker().predict(img_array)
+        cache.put(key, prediction)
     
-    prediction = model.predict(img_array)
-    prediction_result = 'Fire Detected' if prediction[0] > 0.5 else 'No Fire'
+    prediction_result = 'Fire Detected' if prediction > 0.5 else 'No Fire'
     return prediction_result
 
 # Mapping functions remain the same as in the previous implementation
+def load_archive():
+    archive_path = 'new/fire_archive'
+    return archive_path, open_fire_archive(archive_path)
+
 def load_data():
+    # Detections streamed in by fire_ingest when it has run, else the bundled NRT file
+    live_store = load_live_fire_store()
+    if live_store is not None:
+        return live_store.snapshot()
+    
     data_path = 'new/fire_nrt_M6_107977.csv'
-    return pd.read_csv(data_path)
+    return (
+        load_fire_engine(data_path), 
+        load_fire_spatial_index(data_path), 
+        load_fire_pyramid(data_path), 
+        load_fire_events(data_path)
+    )
 
-def create_fire_map(data):
+def create_fire_map(data, cell_levels, events):
     # Create a base map centered on India
     india_map = folium.Map(
         location=[22.5937, 78.9629], 
@@ -42,40 +84,43 @@ def create_fire_map(data):
         attr='Map data © OpenStreetMap contributors'
     )
 
-    # Iterate through the dataset and add markers to the map
-    for _, row in data.iterrows():
-        # Create tooltip text with key information
-        tooltip = f"""
-        <b>Brightness:</b> {row['brightness']}<br>
-        <b>Latitude:</b> {row['latitude']}<br>
-        <b>Longitude:</b> {row['longitude']}<br>
-        <b>Date:</b> {row['acq_date']}<br>
-        <b>Confidence:</b> {row['confidence']}<br>
-        <b>FRP:</b> {row['frp']}<br>
-        <b>Day/Night:</b> {row['daynight']}
-        """
-    
-        # Determine marker color based on confidence level
-        confidence = row['confidence']
-        if confidence >= 80:
-            color = 'red'
-        elif confidence >= 50:
-            color = 'orange'
-        else:
-            color = 'green'
+    # Aggregated cells when zoomed out, individual detections when zoomed in
+    add_fire_layers(india_map, data, cell_levels)
     
-        # Add marker to the map
-        folium.CircleMarker(
-            location=[row['latitude'], row['longitude']],
-            radius=5,
-            color=color,
-            fill=True,
-            fill_opacity=0.7,
-            tooltip=tooltip
-        ).add_to(india_map)
+    # Fire event footprints on top
+    add_event_layer(india_map, events)
     
     return india_map
 
+def create_viewport_fire_map(fire_engine, fire_index, fire_pyramid, fire_events, date_range, confidence_filter, viewport):
+    # Base map opened where the user last left it
+    viewport_map = folium.Map(
+        location=viewport.center, 
+        zoom_start=viewport.zoom, 
+        tiles='OpenStreetMap',
+        attr='Map data © OpenStreetMap contributors'
+    )
+
+    # Only the cells or points visible at this viewport and zoom
+    shown, in_view = add_viewport_layers(
+        viewport_map, 
+        fire_engine, 
+        fire_index, 
+        fire_pyramid, 
+        date_range[0], 
+        date_range[1], 
+        confidence_filter, 
+        viewport
+    )
+    
+    # Fire events overlapping the viewport
+    add_event_layer(
+        viewport_map, 
+        fire_events.events_between(date_range[0], date_range[1], bbox=viewport[:4])
+    )
+    
+    return viewport_map, shown, in_view
+
 def main():
     st.sidebar.title('Forest Fire Analysis')
     
@@ -89,11 +134,17 @@ def main():
         # Image Detection Mode
         st.title('Forest Fire Detection')
         
-        # File uploader
-        uploaded_file = st.file_uploader(
-            "Choose an image...", 
-            type=["jpg", "jpeg", "png"]
+        # File uploader: one image, or many for batch detection
+        uploaded_files = st.file_uploader(
+            "Choose images...", 
+            type=["jpg", "jpeg", "png"], 
+            accept_multiple_files=True
         )
+        uploaded_file = uploaded_files[0] if len(uploaded_files) == 1 else None
+        
+        # Detection modules load only in this mode, never for the map
+        from fire_detection import image_dataset, detect_fire_batches
+        from fire_inference import format_worker_stats
         
         if uploaded_file is not None:
             # Display uploaded image
@@ -108,16 +159,143 @@ def main():
                     st.error(f'🔥 {prediction}')
                 else:
                     st.success(f'✅ {prediction}')
+                
+                # Shared worker load: queue depth, batch sizes and latency
+                st.caption(format_worker_stats(load_fire_inference_worker().stats()))
+                cache_stats = load_fire_prediction_cache().stats()
+                st.caption(f"Prediction cache: {cache_stats['hits']} hits, {cache_stats['misses']} misses, "
+                           f"{cache_stats['entries']} images")
             
             except Exception as e:
                 st.error(f'An error occurred: {str(e)}')
+        
+        if len(uploaded_files) > 1:
+            # Batch mode: decode, resize and classify all uploads in a parallel pipeline
+            try:
+                predict_batch = load_fire_detection_model()
+                dataset = image_dataset(
+                    [uploaded.name for uploaded in uploaded_files], 
+                    [uploaded.getvalue() for uploaded in uploaded_files]
+                )
+                
+                # Results are shown as each batch completes
+                progress = st.progress(0.0)
+                results_table = st.empty()
+                results = []
+                start = time.perf_counter()
+                for batch in detect_fire_batches(predict_batch, dataset):
+                    results.extend(batch)
+                    progress.progress(len(results) / len(uploaded_files))
+                    results_table.dataframe(
+                        pd.DataFrame(results, columns=['Image', 'Fire Probability', 'Prediction']), 
+                        use_container_width=True
+                    )
+                elapsed = time.perf_counter() - start
+                
+                fires = sum(prediction == 'Fire Detected' for _, _, prediction in results)
+                if fires:
+                    st.error(f'🔥 Fire detected in {fires} of {len(results)} images')
+                else:
+                    st.success(f'✅ No fire in {len(results)} images')
+                st.caption(f'{len(results) / elapsed:,.1f} images/sec')
+            
+            except Exception as e:
+                st.error(f'An error occurred: {str(e)}')
+        
+        # Large aerial/satellite scenes: overlapping 224x224 windows scanned into a heatmap
+        with st.expander('Scan Large Scene'):
+            scene_file = st.file_uploader(
+                "Choose a scene (GeoTIFF, .npy or image)...", 
+                type=["tif", "tiff", "npy", "jpg", "jpeg", "png"], 
+                key='fire_scene'
+            )
+            
+            if scene_file is not None:
+                from fire_tiles import TILE_STRIDE, open_scene, scan_scene, heatmap_overlay
+                try:
+                    scene = open_scene(scene_file)
+                    
+                    # Map placement: the GeoTIFF's own bounds, else entered by hand
+                    default_bounds = scene.bounds or (22.0, 78.5, 22.5, 79.0)
+                    bound_cols = st.columns(4)
+                    bounds = tuple(
+                        col.number_input(label, value=float(value), format='%.5f')
+                        for col, label, value in zip(bound_cols, ['South', 'West', 'North', 'East'], default_bounds)
+                    )
+                    stride = st.slider(
+                        'Window Stride (px)', 
+                        min_value=56, 
+                        max_value=224, 
+                        value=TILE_STRIDE, 
+                        step=56
+                    )
+                    
+                    if st.button('Scan Scene'):
+                        progress = st.progress(0.0)
+                        heatmap = scan_scene(
+                            scene, 
+                            load_fire_detection_model(), 
+                            stride, 
+                            report=lambda done, total: progress.progress(done / total)
+                        )
+                        st.metric('Highest Window Fire Probability', f'{heatmap.max():.2f}')
+                        
+                        # Heatmap over the scene's footprint
+                        scene_map = folium.Map(
+                            location=[(bounds[0] + bounds[2]) / 2, (bounds[1] + bounds[3]) / 2], 
+                            zoom_start=12
+                        )
+                        scene_map.fit_bounds([[bounds[0], bounds[1]], [bounds[2], bounds[3]]])
+                        heatmap_overlay(heatmap, bounds).add_to(scene_map)
+                        folium_static(scene_map)
+                
+                except Exception as e:
+                    st.error(f'An error occurred: {str(e)}')
+        
+        # Watch-station video: sampled frames, near-duplicates skipped, fire probability over time
+        with st.expander('Video Detection'):
+            video_file = st.file_uploader(
+                "Choose a video...", 
+                type=["mp4", "avi", "mov", "mkv"], 
+                key='fire_video'
+            )
+            
+            if video_file is not None and st.button('Analyse Video'):
+                from fire_video import open_video_upload, detect_fire_video
+                try:
+                    source = open_video_upload(video_file)
+                    progress = st.empty()
+                    try:
+                        timeline, alerts, stats = detect_fire_video(
+                            source, 
+                            load_fire_detection_model(), 
+                            report=lambda seconds, frames: progress.caption(f'{seconds:.0f}s analysed, {frames} frames inferred')
+                        )
+                    finally:
+                        source.close()
+                    
+                    st.line_chart(timeline.set_index('time_s')['fire_probability'])
+                    for timestamp in alerts:
+                        st.error(f'🔥 Fire detected at {timestamp:.1f}s')
+                    if not alerts:
+                        st.success('✅ No fire detected')
+                    progress.caption(
+                        f"{stats['video_seconds']:.0f}s of video in {stats['seconds']:.1f}s "
+                        f"({stats['realtime_factor']:.1f}x realtime), {stats['frames_inferred']} frames inferred, "
+                        f"{stats['frames_skipped']} near-duplicates skipped"
+                    )
+                
+                except Exception as e:
+                    st.error(f'An error occurred: {str(e)}')
     
     else:
         # Fire Incidents Map Mode
         st.title('India Wildfire Map')
         
-        # Load data
-        data = load_data()
+        # Load data: the partitioned multi-year archive if one was built, else the NRT file
+        archive_path, fire_archive = load_archive()
+        if fire_archive is None:
+            fire_engine, fire_index, fire_pyramid, fire_events = load_data()
         
         # Sidebar filters
         st.sidebar.header('Map Filters')
@@ -131,30 +309,87 @@ def main():
         )
         
         # Date range filter
-        min_date = pd.to_datetime(data['acq_date']).min()
-        max_date = pd.to_datetime(data['acq_date']).max()
+        if fire_archive is None:
+            min_date = fire_engine.min_time.date()
+            max_date = fire_engine.max_time.date()
+            default_range = [min_date, max_date]
+        else:
+            # Archive mode opens on the last month rather than the whole archive
+            min_date, max_date = fire_archive.date_bounds()
+            default_range = list(default_window(min_date, max_date))
         
         date_range = st.sidebar.date_input(
             'Select Date Range', 
-            value=[min_date, max_date],
+            value=default_range,
             min_value=min_date,
             max_value=max_date
         )
         
+        # Archive mode: load only the partitions of the selected window
+        if fire_archive is not None:
+            start_date, end_date, capped = cap_window(date_range[0], date_range[1])
+            if capped:
+                st.sidebar.warning(
+                    f"Archive windows are limited to {MAX_WINDOW_DAYS} days; "
+                    f"showing {start_date} to {end_date}"
+                )
+            date_range = (start_date, end_date)
+            fire_engine, fire_index, fire_pyramid, fire_events = load_fire_window(
+                archive_path, 
+                date_range[0], 
+                date_range[1]
+            )
+        
         # Apply filters
-        filtered_data = data[
-            (pd.to_datetime(data['acq_date']).dt.date >= date_range[0]) & 
-            (pd.to_datetime(data['acq_date']).dt.date <= date_range[1]) & 
-            (data['confidence'] >= confidence_filter)
-        ]
+        filtered_data = fire_engine.query(
+            date_range[0], 
+            date_range[1], 
+            min_confidence=confidence_filter
+        )
+        
+        # Fire events: detections clustered across passes and days
+        events = fire_events.events_between(date_range[0], date_range[1])
+        
+        # Map mode: the full filtered map, or only what the current viewport shows
+        map_mode = st.sidebar.radio(
+            'Map Mode', 
+            ['Full Map', 'Follow Viewport'], 
+            horizontal=True
+        )
         
         # Create and display map
-        fire_map = create_fire_map(filtered_data)
-        folium_static(fire_map)
+        if map_mode == 'Follow Viewport':
+            viewport = parse_viewport(st.session_state.get('fire_viewport_map'))
+            fire_map, shown, in_view = create_viewport_fire_map(
+                fire_engine, 
+                fire_index, 
+                fire_pyramid, 
+                fire_events, 
+                date_range, 
+                confidence_filter, 
+                viewport
+            )
+            st_folium(
+                fire_map, 
+                key='fire_viewport_map', 
+                returned_objects=['bounds', 'zoom', 'center'], 
+                use_container_width=True
+            )
+            st.caption(f'Showing {shown} map features for {in_view} detections in view')
+        else:
+            cell_levels = fire_cell_levels(
+                fire_pyramid, 
+                filtered_data, 
+                date_range[0], 
+                date_range[1], 
+                min_confidence=confidence_filter
+            )
+            fire_map = create_fire_map(filtered_data, cell_levels, events)
+            folium_static(fire_map)
         
         # Display data summary
         st.subheader('Fire Incidents Summary')
-        col1, col2, col3 = st.columns(3)
+        col1, col2, col3, col_events = st.columns(4)
         
         with col1:
             st.metric('Total Incidents', len(filtered_data))
@@ -166,6 +401,20 @@ def main():
         with col3:
             st.metric('Date Range', 
                       f"{date_range[0]} to {date_range[1]}")
+        
+        with col_events:
+            st.metric('Fire Events', len(events))
+        
+        # Largest events by total fire radiative power
+        if len(events):
+            st.subheader('Largest Fire Events')
+            st.dataframe(
+                events.nlargest(10, 'total_frp')[[
+                    'start', 'duration_hours', 'detections', 'total_frp', 
+                    'footprint_km2', 'growth_km2_per_day', 'latitude', 'longitude'
+                ]].round(2), 
+                use_container_width=True
+            )
 
 if __name__ == '__main__':
     main()
\ No newline at end of file
@@ -1,15 +1,92 @@
 import streamlit as st
-import joblib
+import os
 import numpy as np
 import pandas as pd
-import plotly.express as px
-import plotly.graph_objs as go
 from datetime import datetime, timedelta
-import tensorflow as tf
-import folium
-from streamlit_folium import folium_static
+import time
+import threading
+import tempfile
 import random
 
+# TensorFlow, folium, plotly, the crop model (scikit-learn) and the carbon and
+# crop engines are imported inside the pages that use them, so a public user
+# opening the carbon calculator never loads the others
+
+# Fire detection model; FIRE_MODEL_BACKEND picks the .h5 model or a quantized TFLite export (float16, int8)
+FIRE_MODEL_PATH = r'C:\KNOWCODE HACKATHON\output folder\fire_detection_model (1).h5'
+
+# Crop recommendation random forest, served from the process-wide model registry
+CROP_MODEL_PATH = 'model_storage/crop_random_forest.joblib'
+
+
+def fire_model_backend():
+    return os.environ.get('FIRE_MODEL_BACKEND', 'keras')
+
+
+def write_session_file(key, write_output, suffix='.csv'):
+    """
+    Run a streaming writer into a temporary file kept for this session
+
+    Only the file's path and the writer's stats go into session state, so a
+    large result never sits in memory between reruns. A previous result
+    under the same key is deleted first, and the file is deleted if the
+    writer fails.
+
+    Args:
+        key (str): Session state key for (path, stats)
+        write_output (callable): Path -> stats dict
+    """
+    discard_session_file(key)
+    with tempfile.NamedTemporaryFile(suffix=suffix, delete=False) as f:
+        output = f.name
+    try:
+        stats = write_output(output)
+    except BaseException:
+        os.remove(output)
+        raise
+    st.session_state[key] = (output, stats)
+
+
+def discard_session_file(key):
+    """Forget the result kept under `key` and delete its file"""
+    output, _ = st.session_state.pop(key, (None, None))
+    if output is not None and os.path.exists(output):
+        os.remove(output)
+
+
+def session_file_download(key, label, file_name, mime='text/csv'):
+    """
+    Download button for a result kept by write_session_file
+
+    The file is read only when the button is clicked and is deleted once
+    served, so its contents are in memory just for the download itself.
+    """
+    output, _ = st.session_state[key]
+    
+    def contents():
+        try:
+            with open(output, 'rb') as f:
+                return f.read()
+        finally:
+            os.remove(output)
+    
+    st.download_button(
+        label, 
+        contents, 
+        file_name=file_name, 
+        mime=mime, 
+        # Clicking forgets the result; contents() removes the file once served
+        on_click=st.session_state.pop, 
+        args=(key, None)
+    )
+
+
+def _warm_fire_model():
+    # Runs off the script thread: imports TensorFlow, loads the model and traces it on a dummy batch
+    from fire_detection import shared_fire_predictor
+    shared_fire_predictor(FIRE_MODEL_PATH, fire_model_backend())
+
+
 class ComprehensiveSustainabilityPlatform:
     def __init__(self):
         """Initialize Comprehensive Sustainability Platform"""
@@ -18,9 +95,6 @@ class ComprehensiveSustainabilityPlatform:
         # Initialize session state variables
         self._initialize_session_state()
         
-        # Load crop recommendation model
-        self.load_crop_model()
-        
         # Add a new session state for user type
         if 'user_type' not in st.session_state:
             st.session_state.user_type = None
@@ -92,6 +166,7 @@ class ComprehensiveSustainabilityPlatform:
                 if username == 'admin' and password == 'admin':
                     st.session_state.government_logged_in = True
                     st.session_state.government_username = username
+                    self.start_fire_model_warmup()
                     st.rerun()
                 else:
                     st.error("Invalid Credentials. Default: username='admin', password='admin'")
@@ -127,14 +202,27 @@ class ComprehensiveSustainabilityPlatform:
             if key not in st.session_state:
                 st.session_state[key] = value
     
+    def start_fire_model_warmup(self):
+        """Load and warm the fire detection model in the background, once per session"""
+        if st.session_state.get('fire_model_warmup_started'):
+            return
+        st.session_state.fire_model_warmup_started = True
+        threading.Thread(target=_warm_fire_model, name='fire-model-warmup', daemon=True).start()
+    
     def load_crop_model(self):
         """Load pre-trained machine learning model for crop recommendation"""
+        from model_registry import load_model
+        from crop_forest import flatten_forest
         try:
-            self.crop_model = joblib.load('model_storage/crop_random_forest.joblib')
+            # Deserialized once per process and shared by every session; reloaded when the file changes
+            self.crop_model = load_model(CROP_MODEL_PATH)
+            # Array form of the forest for single-field predictions, compiled once per model
+            self.crop_forest = flatten_forest(self.crop_model)
             st.sidebar.success("Crop Recommendation Model loaded successfully!")
         except FileNotFoundError:
             st.sidebar.error("Crop Recommendation Model file not found.")
             self.crop_model = None
+            self.crop_forest = None
 
     def initial_user_selection(self):
         """Create an initial page with Public and Government user type selection"""
@@ -202,33 +290,81 @@ class ComprehensiveSustainabilityPlatform:
             """)
 
     def forest_department(self):
+        # Mapping modules load with this page; the detection sections import
+        # theirs when reached, and TensorFlow is usually imported already by
+        # the warm-up started at login
+        import folium
+        from streamlit_folium import folium_static, st_folium
+        from fire_query import load_fire_engine
+        from fire_aggregation import load_fire_pyramid, fire_cell_levels
+        from fire_map_layers import add_fire_layers, add_event_layer
+        from fire_spatial import load_fire_spatial_index
+        from fire_viewport import parse_viewport, add_viewport_layers
+        from fire_archive import MAX_WINDOW_DAYS, cap_window, default_window, open_fire_archive, load_fire_window
+        from fire_events import load_fire_events
+        from fire_ingest import load_live_fire_store
+        
+        # Sessions that skipped the login page (e.g. after a server restart) warm up here
+        self.start_fire_model_warmup()
+        
         @st.cache_resource
         def load_fire_detection_model():
-            return tf.keras.models.load_model(r'C:\KNOWCODE HACKATHON\output folder\fire_detection_model (1).h5')
+            from fire_detection import shared_fire_predictor
+            # Waits for the background warm-up if it is still running
+            return shared_fire_predictor(FIRE_MODEL_PATH, fire_model_backend())
+
+        # One inference worker per process, shared by every session
+        @st.cache_resource
+        def load_fire_inference_worker():
+            from fire_inference import MicroBatchWorker
+            return MicroBatchWorker(load_fire_detection_model())
+
+        # Probabilities of images seen before, shared by every session
+        @st.cache_resource
+        def load_fire_prediction_cache():
+            from fire_detection import PredictionCache
+            return PredictionCache()
 
         # Image prediction function
         def predict_fire(image):
-            model = load_fire_detection_model()
-            img_height, img_width = 224, 224
+            from fire_detection import decode_image_fast, image_digest, read_image_bytes
+            contents = read_image_bytes(image)
             
-            # Convert uploaded file to image
-            img = tf.keras.preprocessing.image.load_img(
-                image, 
-                target_size=(img_height, img_width)
-            )
-            img_array = tf.keras.preprocessing.image.img_to_array(img)
-            img_array = tf.expand_dims(img_array, 0)
+            # Re-uploaded images are answered from the cache without running the model
+            cache = load_fire_prediction_cache()
+            key = image_digest(contents)
+            prediction = cache.get(key)
+            if prediction is None:
+                # Decode straight to the 224x224 input, downscaling inside the JPEG decoder
+                img_array = decode_image_fast(contents)
+                
+                # Batched with concurrent requests from other sessions
+                prediction = load_fire_inference_worker().predict(img_array)
+                cache.put(key, prediction)
             
-            prediction = model.predict(img_array)
-            prediction_result = 'Fire Detected' if prediction[0] > 0.5 else 'No Fire'
+            prediction_result = 'Fire Detected' if prediction > 0.5 else 'No Fire'
             return prediction_result
 
         # Mapping functions remain the same as in the previous implementation
+        def load_archive():
+            archive_path = 'fire_archive'
+            return archive_path, open_fire_archive(archive_path)
+
         def load_data():
+            # Detections streamed in by fire_ingest when it has run, else the bundled NRT file
+            live_store = load_live_fire_store()
+            if live_store is not None:
+                return live_store.snapshot()
+            
             data_path = 'fire_nrt_M6_107977.csv'
-            return pd.read_csv(data_path)
+            return (
+                load_fire_engine(data_path), 
+                load_fire_spatial_index(data_path), 
+                load_fire_pyramid(data_path), 
+                load_fire_events(data_path)
+            )
 
-        def create_fire_map(data):
+        def create_fire_map(data, cell_levels, events):
             # Create a base map centered on India
             india_map = folium.Map(
                 location=[22.5937, 78.9629], 
@@ -237,48 +373,53 @@ class ComprehensiveSustainabilityPlatform:
                 attr='Map data © OpenStreetMap contributors'
             )
 
-            # Iterate through the dataset and add markers to the map
-            for _, row in data.iterrows():
-                # Create tooltip text with key information
-                tooltip = f"""
-                <b>Brightness:</b> {row['brightness']}<br>
-                <b>Latitude:</b> {row['latitude']}<br>
-                <b>Longitude:</b> {row['longitude']}<br>
-                <b>Date:</b> {row['acq_date']}<br>
-                <b>Confidence:</b> {row['confidence']}<br>
-                <b>FRP:</b> {row['frp']}<br>
-                <b>Day/Night:</b> {row['daynight']}
-                """
-            
-                # Determine marker color based on confidence level
-                confidence = row['confidence']
-                if confidence >= 80:
-                    color = 'red'
-                elif confidence >= 50:
-                    color = 'orange'
-                else:
-                    color = 'green'
-            
-                # Add marker to the map
-                folium.CircleMarker(
-                    location=[row['latitude'], row['longitude']],
-                    radius=5,
-                    color=color,
-                    fill=True,
-                    fill_opacity=0.7,
-                    tooltip=tooltip
-                ).add_to(india_map)
+            # Aggregated cells when zoomed out, individual detections when zoomed in
+            add_fire_layers(india_map, data, cell_levels)
+            
+            # Fire event footprints on top
+            add_event_layer(india_map, events)
             
             return india_map
 
+        def create_viewport_fire_map(fire_engine, fire_index, fire_pyramid, fire_events, date_range, confidence_filter, viewport):
+            # Base map opened where the user last left it
+            viewport_map = folium.Map(
+                location=viewport.center, 
+                zoom_start=viewport.zoom, 
+                tiles='OpenStreetMap',
+                attr='Map data © OpenStreetMap contributors'
+            )
+
+            # Only the cells or points visible at this viewport and zoom
+            shown, in_view = add_viewport_layers(
+                viewport_map, 
+                fire_engine, 
+                fire_index, 
+                fire_pyramid, 
+                date_range[0], 
+                date_range[1], 
+                confidence_filter, 
+                viewport
+            )
+            
+            # Fire events overlapping the viewport
+            add_event_layer(
+                viewport_map, 
+                fire_events.events_between(date_range[0], date_range[1], bbox=viewport[:4])
+            )
+            
+            return viewport_map, shown, in_view
+
         def main():
             st.title('Forest Fire Analysis')
             
             # India Wildfire Map Section
             st.header('India Wildfire Map')
             
-            # Load data
-            data = load_data()
+            # Load data: the partitioned multi-year archive if one was built, else the NRT file
+            archive_path, fire_archive = load_archive()
+            if fire_archive is None:
+                fire_engine, fire_index, fire_pyramid, fire_events = load_data()
             
             # Filters
             st.subheader('Map Filters')
@@ -292,30 +433,87 @@ class ComprehensiveSustainabilityPlatform:
             )
             
             # Date range filter
-            min_date = pd.to_datetime(data['acq_date']).min()
-            max_date = pd.to_datetime(data['acq_date']).max()
+            if fire_archive is None:
+                min_date = fire_engine.min_time.date()
+                max_date = fire_engine.max_time.date()
+                default_range = [min_date, max_date]
+            else:
+                # Archive mode opens on the last month rather than the whole archive
+                min_date, max_date = fire_archive.date_bounds()
+                default_range = list(default_window(min_date, max_date))
             
             date_range = st.date_input(
                 'Select Date Range', 
-                value=[min_date, max_date],
+                value=default_range,
                 min_value=min_date,
                 max_value=max_date
             )
             
+            # Archive mode: load only the partitions of the selected window
+            if fire_archive is not None:
+                start_date, end_date, capped = cap_window(date_range[0], date_range[1])
+                if capped:
+                    st.warning(
+                        f"Archive windows are limited to {MAX_WINDOW_DAYS} days; "
+                        f"showing {start_date} to {end_date}"
+                    )
+                date_range = (start_date, end_date)
+                fire_engine, fire_index, fire_pyramid, fire_events = load_fire_window(
+                    archive_path, 
+                    date_range[0], 
+                    date_range[1]
+                )
+            
             # Apply filters
-            filtered_data = data[
-                (pd.to_datetime(data['acq_date']).dt.date >= date_range[0]) & 
-                (pd.to_datetime(data['acq_date']).dt.date <= date_range[1]) & 
-                (data['confidence'] >= confidence_filter)
-            ]
+            filtered_data = fire_engine.query(
+                date_range[0],
+                date_range[1],
+                min_confidence=confidence_filter
+            )
+            
+            # Fire events: detections clustered across passes and days
+            events = fire_events.events_between(date_range[0], date_range[1])
+            
+            # Map mode: the full filtered map, or only what the current viewport shows
+            map_mode = st.radio(
+                'Map Mode', 
+                ['Full Map', 'Follow Viewport'], 
+                horizontal=True
+            )
             
             # Create and display map
-            fire_map = create_fire_map(filtered_data)
-            folium_static(fire_map)
+            if map_mode == 'Follow Viewport':
+                viewport = parse_viewport(st.session_state.get('fire_viewport_map'))
+                fire_map, shown, in_view = create_viewport_fire_map(
+                    fire_engine, 
+                    fire_index, 
+                    fire_pyramid, 
+                    fire_events, 
+                    date_range, 
+                    confidence_filter, 
+                    viewport
+                )
+                st_folium(
+                    fire_map, 
+                    key='fire_viewport_map', 
+                    returned_objects=['bounds', 'zoom', 'center'], 
+                    use_container_width=True
+                )
+                st.caption(f'Showing {shown} map features for {in_view} detections in view')
+            else:
+                cell_levels = fire_cell_levels(
+                    fire_pyramid, 
+                    filtered_data, 
+                    date_range[0], 
+                    date_range[1], 
+                    min_confidence=confidence_filter
+                )
+                fire_map = create_fire_map(filtered_data, cell_levels, events)
+                folium_static(fire_map)
             
             # Display data summary
             st.subheader('Fire Incidents Summary')
-            col_a, col_b, col_c = st.columns(3)
+            col_a, col_b, col_c, col_events = st.columns(4)
             
             with col_a:
                 st.metric('Total Incidents', len(filtered_data))
@@ -328,14 +526,34 @@ class ComprehensiveSustainabilityPlatform:
                 st.metric('Date Range', 
                         f"{date_range[0]} to {date_range[1]}")
             
+            with col_events:
+                st.metric('Fire Events', len(events))
+            
+            # Largest events by total fire radiative power
+            if len(events):
+                st.subheader('Largest Fire Events')
+                st.dataframe(
+                    events.nlargest(10, 'total_frp')[[
+                        'start', 'duration_hours', 'detections', 'total_frp', 
+                        'footprint_km2', 'growth_km2_per_day', 'latitude', 'longitude'
+                    ]].round(2), 
+                    use_container_width=True
+                )
+            
             # Forest Fire Image Detection Section
             st.header('Fire Detection')
             
-            # File uploader
-            uploaded_file = st.file_uploader(
-                "Choose an image...", 
-                type=["jpg", "jpeg", "png"]
+            # File uploader: one image, or many for batch detection
+            uploaded_files = st.file_uploader(
+                "Choose images...", 
+                type=["jpg", "jpeg", "png"], 
+                accept_multiple_files=True
             )
+            uploaded_file = uploaded_files[0] if len(uploaded_files) == 1 else None
+            
+            # Detection modules load with this section, after the map has rendered
+            from fire_detection import image_dataset, detect_fire_batches
+            from fire_inference import format_worker_stats
             
             if uploaded_file is not None:
                 # Display uploaded image
@@ -350,9 +568,134 @@ class ComprehensiveSustainabilityPlatform:
                         st.error(f'🔥 {prediction}')
                     else:
                         st.success(f'✅ {prediction}')
+                    
+                    # Shared worker load: queue depth, batch sizes and latency
+                    st.caption(format_worker_stats(load_fire_inference_worker().stats()))
+                    cache_stats = load_fire_prediction_cache().stats()
+                    st.caption(f"Prediction cache: {cache_stats['hits']} hits, {cache_stats['misses']} misses, "
+                               f"{cache_stats['entries']} images")
                 
                 except Exception as e:
                     st.error(f'An error occurred: {str(e)}')
+            
+            if len(uploaded_files) > 1:
+                # Batch mode: decode, resize and classify all uploads in a parallel pipeline
+                try:
+                    predict_batch = load_fire_detection_model()
+                    dataset = image_dataset(
+                        [uploaded.name for uploaded in uploaded_files], 
+                        [uploaded.getvalue() for uploaded in uploaded_files]
+                    )
+                    
+                    # Results are shown as each batch completes
+                    progress = st.progress(0.0)
+                    results_table = st.empty()
+                    results = []
+                    start = time.perf_counter()
+                    for batch in detect_fire_batches(predict_batch, dataset):
+                        results.extend(batch)
+                        progress.progress(len(results) / len(uploaded_files))
+                        results_table.dataframe(
+                            pd.DataFrame(results, columns=['Image', 'Fire Probability', 'Prediction']), 
+                            use_container_width=True
+                        )
+                    elapsed = time.perf_counter() - start
+                    
+                    fires = sum(prediction == 'Fire Detected' for _, _, prediction in results)
+                    if fires:
+                        st.error(f'🔥 Fire detected in {fires} of {len(results)} images')
+                    else:
+                        st.success(f'✅ No fire in {len(results)} images')
+                    st.caption(f'{len(results) / elapsed:,.1f} images/sec')
+                
+                except Exception as e:
+                    st.error(f'An error occurred: {str(e)}')
+            
+            # Large aerial/satellite scenes: overlapping 224x224 windows scanned into a heatmap
+            with st.expander('Scan Large Scene'):
+                scene_file = st.file_uploader(
+                    "Choose a scene (GeoTIFF, .npy or image)...", 
+                    type=["tif", "tiff", "npy", "jpg", "jpeg", "png"], 
+                    key='fire_scene'
+                )
+                
+                if scene_file is not None:
+                    from fire_tiles import TILE_STRIDE, open_scene, scan_scene, heatmap_overlay
+                    try:
+                        scene = open_scene(scene_file)
+                        
+                        # Map placement: the GeoTIFF's own bounds, else entered by hand
+                        default_bounds = scene.bounds or (22.0, 78.5, 22.5, 79.0)
+                        bound_cols = st.columns(4)
+                        bounds = tuple(
+                            col.number_input(label, value=float(value), format='%.5f')
+                            for col, label, value in zip(bound_cols, ['South', 'West', 'North', 'East'], default_bounds)
+                        )
+                        stride = st.slider(
+                            'Window Stride (px)', 
+                            min_value=56, 
+                            max_value=224, 
+                            value=TILE_STRIDE, 
+                            step=56
+                        )
+                        
+                        if st.button('Scan Scene'):
+                            progress = st.progress(0.0)
+                            heatmap = scan_scene(
+                                scene, 
+                                load_fire_detection_model(), 
+                                stride, 
+                                report=lambda done, total: progress.progress(done / total)
+                            )
+                            st.metric('Highest Window Fire Probability', f'{heatmap.max():.2f}')
+                            
+                            # Heatmap over the scene's footprint
+                            scene_map = folium.Map(
+                                location=[(bounds[0] + bounds[2]) / 2, (bounds[1] + bounds[3]) / 2], 
+                                zoom_start=12
+                            )
+                            scene_map.fit_bounds([[bounds[0], bounds[1]], [bounds[2], bounds[3]]])
+                            heatmap_overlay(heatmap, bounds).add_to(scene_map)
+                            folium_static(scene_map)
+                    
+                    except Exception as e:
+                        st.error(f'An error occurred: {str(e)}')
+            
+            # Watch-station video: sampled frames, near-duplicates skipped, fire probability over time
+            with st.expander('Video Detection'):
+                video_file = st.file_uploader(
+                    "Choose a video...", 
+                    type=["mp4", "avi", "mov", "mkv"], 
+                    key='fire_video'
+                )
+                
+                if video_file is not None and st.button('Analyse Video'):
+                    from fire_video import open_video_upload, detect_fire_video
+                    try:
+                        source = open_video_upload(video_file)
+                        progress = st.empty()
+                        try:
+                            timeline, alerts, stats = detect_fire_video(
+                                source, 
+                                load_fire_detection_model(), 
+                                report=lambda seconds, frames: progress.caption(f'{seconds:.0f}s analysed, {frames} frames inferred')
+                            )
+                        finally:
+                            source.close()
+                        
+                        st.line_chart(timeline.set_index('time_s')['fire_probability'])
+                        for timestamp in alerts:
+                            st.error(f'🔥 Fire detected at {timestamp:.1f}s')
+                        if not alerts:
+                            st.success('✅ No fire detected')
+                        progress.caption(
+                            f"{stats['video_seconds']:.0f}s of video in {stats['seconds']:.1f}s "
+                            f"({stats['realtime_factor']:.1f}x realtime), {stats['frames_inferred']} frames inferred, "
+                            f"{stats['frames_skipped']} near-duplicates skipped"
+                        )
+                    
+                    except Exception as e:
+                        st.error(f'An error occurred: {str(e)}')
 
         main()
     
@@ -460,6 +803,12 @@ class ComprehensiveSustainabilityPlatform:
 # The following methods should be the same as in the previous implementation:
     def carbon_footprint_calculator(self):
         """Advanced Carbon Footprint Calculation with Innovative Visualization"""
+        import plotly.express as px
+        import plotly.graph_objs as go
+        from carbon_engine import SOURCE_LABELS, carbon_footprint_file, regional_footprint
+        from carbon_statements import statement_emissions
+        from emission_factors import load_emission_factors
+        from scenario_sweep import LEVERS, SWEEP_STEPS, frontier_chart, scenario_frontier
         st.header("🌿 Carbon Footprint Calculator")
         
         col1, col2 = st.columns(2)
@@ -486,32 +835,29 @@ class ComprehensiveSustainabilityPlatform:
             transport_details['Public Transit'] = st.number_input("Public Transit in kms", min_value=0.0, value=0.0)
             transport_details['Flight Miles'] = st.number_input("Annual Flight Journey in kms", min_value=0.0, value=0.0)
         
+        # Emission factors and carbon tax of the chosen region for the current year
+        factor_table = load_emission_factors()
+        region = st.selectbox("Region", factor_table.regions, key='carbon_region')
+        
         if st.button("Calculate Carbon Footprint"):
-            # Enhanced Emission Calculation
-            total_emissions = (
-                energy_sources['Electricity'] * 0.475 +  # CO2 per kWh
-                energy_sources['Natural Gas'] * 2.75 +  # CO2 per therm
-                transport_details['Personal Car'] * 0.25 +  # CO2 per mile
-                transport_details['Public Transit'] * 0.100 +  # CO2 per mile
-                transport_details['Flight Miles'] * 0.15  # CO2 per mile
-            ) #* (1 - energy_sources['Renewable Energy %']/100)
-            
-            # Convert emissions to Carbon Tax
-            carbon_tax = total_emissions * 5  # ₹10 per ton of CO2
+            # One-row call into the bulk engine
+            footprint = regional_footprint([[
+                energy_sources['Electricity'], 
+                energy_sources['Natural Gas'], 
+                transport_details['Personal Car'], 
+                transport_details['Public Transit'], 
+                transport_details['Flight Miles']
+            ]], region, datetime.now().year, factor_table)
+            total_emissions = float(footprint['total'][0])
+            carbon_tax = float(footprint['carbon_tax'][0])
             
             st.session_state.total_personal_emissions = total_emissions
             st.session_state.carbon_tax = carbon_tax
             
             # Detailed Emissions Visualization
             emission_breakdown = pd.DataFrame({
-                'Source': ['Electricity', 'Natural Gas', 'Personal Car', 'Public Transit', 'Flights'],
-                'Emissions': [
-                    energy_sources['Electricity'] * 0.475,
-                    energy_sources['Natural Gas'] * 2.75,
-                    transport_details['Personal Car'] * 0.25,
-                    transport_details['Public Transit'] * 0.100,
-                    transport_details['Flight Miles'] * 0.15
-                ]
+                'Source': SOURCE_LABELS,
+                'Emissions': footprint['breakdown'][0]
             })
             
             # Emissions Comparison with Global Emissions
@@ -546,27 +892,108 @@ class ComprehensiveSustainabilityPlatform:
                 st.success(f"Total Carbon Footprint: {total_emissions:.2f} kg CO2")
                 st.warning(f"Calculated Carbon Tax: ₹{carbon_tax:.2f}")
                 st.info(f"Carbon Personality: {emission_personality}")
-    
-    def _get_carbon_personality(self, emissions):
-        """Assign a fun carbon emission personality"""
-        personalities = [
-            "🌱 Earth Whisperer (Low Emission)",
-            "🍃 Green Guardian",
-            "🌍 Climate Conscious Citizen",
-            "🏭 Industrial Impact Maker",
-            "🔥 Carbon Volcano (High Emission)"
-        ]
-        
-        if emissions < 50:
-            return personalities[0]
-        elif emissions < 100:
-            return personalities[1]
-        elif emissions < 200:
-            return personalities[2]
-        elif emissions < 500:
-            return personalities[3]
-        else:
-            return personalities[4]
+            st.caption(f"Emission factors: {footprint['version']}")
+        
+        # What-if analysis: every combination of reduction levers applied to the inputs above
+        with st.expander("What-if Scenarios"):
+            st.write(f"Levers: {', '.join(LEVERS)}")
+            steps = st.slider("Settings per lever", min_value=4, max_value=SWEEP_STEPS, value=SWEEP_STEPS)
+            if st.button("Run Scenario Sweep"):
+                activities = [
+                    energy_sources['Electricity'], 
+                    energy_sources['Natural Gas'], 
+                    transport_details['Personal Car'], 
+                    transport_details['Public Transit'], 
+                    transport_details['Flight Miles']
+                ]
+                frontier, stats = scenario_frontier(activities, region, datetime.now().year, steps, factor_table)
+                st.success(
+                    f"{stats['scenarios']:,} scenarios in {stats['seconds']:.3f}s, "
+                    f"{len(frontier):,} on the Pareto frontier"
+                )
+                st.plotly_chart(frontier_chart(frontier, stats['baseline']))
+                st.dataframe(frontier.round(2))
+                st.caption(f"Emission factors: {stats['factor_version']}")
+        
+        # Bulk mode for municipalities: one row per household or organization
+        with st.expander("Bulk Carbon Footprints"):
+            activity_file = st.file_uploader(
+                "Upload activities (CSV or Parquet) with columns Electricity, Natural Gas, "
+                "Personal Car, Public Transit, Flight Miles", 
+                type=['csv', 'parquet']
+            )
+            if activity_file is not None and st.button("Calculate Bulk Footprints"):
+                progress = st.empty()
+                
+                def report(rows, rate):
+                    progress.text(f"{rows:,} rows, {rate:,.0f} rows/sec")
+                
+                # Streamed through a per-session temporary file chunk by chunk
+                try:
+                    write_session_file(
+                        'bulk_footprint_result', 
+                        lambda output: carbon_footprint_file(activity_file, output, report=report)
+                    )
+                except ValueError as e:
+                    st.error(f"Cannot read activities: {e}")
+            
+            if 'bulk_footprint_result' in st.session_state:
+                _, stats = st.session_state.bulk_footprint_result
+                st.success(
+                    f"{stats['rows']:,} rows in {stats['seconds']:.2f}s ({stats['rows_per_sec']:,.0f} rows/sec): "
+                    f"{stats['total_emissions']:,.0f} kg CO2, ₹{stats['carbon_tax']:,.0f} carbon tax"
+                )
+                st.caption(f"Emission factors: {stats['factor_version']}")
+                st.dataframe(pd.DataFrame(
+                    stats['personality_counts'].items(), 
+                    columns=['Carbon Personality', 'Entities']
+                ))
+                session_file_download('bulk_footprint_result', "Download Footprints (CSV)", 'carbon_footprints.csv')
+        
+        # Activities estimated from bank or utility statement exports instead of typed totals
+        with st.expander("Estimate from Bank/Utility Statements"):
+            statement = st.file_uploader(
+                "Upload a statement export (CSV) with date, description and amount columns", 
+                type=['csv', 'parquet'], 
+                key='statement_upload'
+            )
+            debits_negative = st.checkbox("Money out is shown as negative amounts", key='statement_debits_negative')
+            if statement is not None and st.button("Estimate Emissions from Statement"):
+                progress = st.empty()
+                monthly_chart = st.empty()
+                breakdown_chart = st.empty()
+                emissions = None
+                try:
+                    # Charts are redrawn with the running totals after every chunk
+                    for emissions, stats in statement_emissions(statement, region=region, debits_negative=debits_negative):
+                        progress.text(
+                            f"{stats['lines']:,} lines ({stats['classified']:,} classified, "
+                            f"{stats['credits']:,} credits skipped, {stats['undated']:,} without a readable date), "
+                            f"{stats['lines_per_sec']:,.0f} lines/sec"
+                        )
+                        monthly = emissions[SOURCE_LABELS].reset_index(names='Month').melt(
+                            id_vars='Month', var_name='Source', value_name='Emissions'
+                        )
+                        monthly_chart.plotly_chart(px.bar(
+                            monthly, 
+                            x='Month', 
+                            y='Emissions', 
+                            color='Source', 
+                            title='Monthly Emissions from Statement'
+                        ))
+                        breakdown_chart.plotly_chart(px.bar(
+                            pd.DataFrame({'Source': SOURCE_LABELS, 'Emissions': emissions[SOURCE_LABELS].sum().to_numpy()}), 
+                            x='Source', 
+                            y='Emissions', 
+                            title='Your Carbon Emission Sources'
+                        ))
+                    if emissions is None or emissions.empty:
+                        st.warning("No dated debit lines in the statement matched an emission source")
+                    else:
+                        st.success(f"Estimated Carbon Footprint: {emissions['Total'].sum():.2f} kg CO2")
+                        st.caption(f"Emission factors: {stats['factor_version']} ({region})")
+                except (ValueError, pd.errors.ParserError, UnicodeDecodeError) as e:
+                    st.error(f"Cannot read statement: {e}")
     
     def carbon_credits_market(self):
         """Enhanced Carbon Credits Marketplace"""
@@ -657,6 +1084,7 @@ class ComprehensiveSustainabilityPlatform:
 
     def rewards_section(self):
         """Enhanced Rewards and Supercoin Redemption"""
+        import plotly.express as px
         st.header("🏆 Rewards Section")
         
         st.write(f"Total SuperCoins: {st.session_state.supercoins}")
@@ -729,6 +1157,8 @@ class ComprehensiveSustainabilityPlatform:
     
     def global_impact_dashboard(self):
         """Create a comprehensive global environmental impact dashboard with dynamic visualizations"""
+        import plotly.express as px
+        import plotly.graph_objs as go
         st.header("🌐 Global Environmental Impact Dashboard")
         
         # Historical CO2 Emissions Data (simulated with some real-world inspired values)
@@ -891,6 +1321,7 @@ class ComprehensiveSustainabilityPlatform:
     # Remaining methods from the previous implementation remain the same
     def environmental_contribution_tracker(self):
         """Track and visualize user's environmental contributions"""
+        import plotly.express as px
         st.header("🌍 Environmental Contribution Tracker")
         
         # Carbon Offset History
@@ -932,8 +1363,14 @@ class ComprehensiveSustainabilityPlatform:
             st.plotly_chart(contribution_fig)
     def crop_recommendation(self):
         """Advanced Crop Recommendation for Carbon Offset"""
+        from model_registry import registry_stats
+        from crop_batch import TOP_K, recommend_crops_file
+        from crop_suitability import RUNS_DIR, class_shares, list_runs, load_suitability, run_path, suitability_overlay
         st.header("🌾 Crop Recommendation System")
         
+        # Deserialized once per process on first use, so other pages never load scikit-learn
+        self.load_crop_model()
+        
         # Machine Learning Based Crop Recommendation
         st.subheader("ML-Powered Crop Recommendation")
         
@@ -968,8 +1405,8 @@ class ComprehensiveSustainabilityPlatform:
             
             # Check if model is loaded
             if self.crop_model:
-                # Predict Crop
-                crop = self.crop_model.predict([features])[0]
+                # Predict Crop; identical to the joblib model but without sklearn's per-call overhead
+                crop = self.crop_forest.predict([features])[0]
                 
                 # Crop-specific carbon absorption rates
                 crop_carbon_rates = {
@@ -1007,6 +1444,71 @@ class ComprehensiveSustainabilityPlatform:
             else:
                 st.error("Crop Recommendation Model not available. Please load the model.")
         
+        # Bulk mode for survey sheets with many soil tests
+        st.subheader("Bulk Crop Recommendation")
+        survey = st.file_uploader(
+            "Upload a survey sheet (CSV or Parquet) with the columns of Crop_Recommendation.csv", 
+            type=['csv', 'parquet']
+        )
+        top_k = st.slider("Crops per field", min_value=1, max_value=5, value=TOP_K)
+        
+        if survey is not None and st.button("Recommend Crops for Survey"):
+            if self.crop_model:
+                progress = st.empty()
+                
+                def report(rows, rate):
+                    progress.text(f"{rows:,} fields, {rate:,.0f} rows/sec")
+                
+                # Results are streamed through a per-session temporary file chunk by chunk
+                try:
+                    write_session_file(
+                        'crop_survey_result', 
+                        lambda output: recommend_crops_file(self.crop_model, survey, output, top_k, report=report)
+                    )
+                except ValueError as e:
+                    st.error(f"Cannot read survey: {e}")
+            else:
+                st.error("Crop Recommendation Model not available. Please load the model.")
+        
+        # Kept across reruns, as a file path, until downloaded
+        if 'crop_survey_result' in st.session_state:
+            recommendations, stats = st.session_state.crop_survey_result
+            st.success(
+                f"{stats['rows']:,} fields in {stats['seconds']:.2f}s ({stats['rows_per_sec']:,.0f} rows/sec)"
+            )
+            st.dataframe(pd.read_csv(recommendations, nrows=100))
+            session_file_download('crop_survey_result', "Download Recommendations (CSV)", 'crop_recommendations.csv')
+        
+        # State-wide map from a gridded run of crop_suitability.py
+        with st.expander("Crop Suitability Map"):
+            # Only runs under RUNS_DIR can be opened; the choice is never a free path
+            runs = list_runs()
+            run_name = st.selectbox("Suitability run", runs) if runs else None
+            if run_name is not None:
+                run_dir = run_path(run_name)
+                import folium
+                from streamlit_folium import folium_static
+                
+                classes, _, metadata = load_suitability(run_dir)
+                if metadata['bounds']:
+                    south, west, north, east = metadata['bounds']
+                    suitability_map = folium.Map(location=[(south + north) / 2, (west + east) / 2])
+                    suitability_map.fit_bounds([[south, west], [north, east]])
+                    suitability_overlay(run_dir).add_to(suitability_map)
+                    folium_static(suitability_map, width=1000, height=500)
+                
+                # Shares from a ~1000x1000 sample of the grid
+                step = max(1, max(classes.shape) // 1000)
+                st.dataframe(pd.DataFrame(
+                    class_shares(classes, metadata['classes'], step), 
+                    columns=['Crop', 'Share of Cells']
+                ))
+            else:
+                st.info(
+                    "Score gridded N/P/K, temperature, humidity, pH and rainfall layers with "
+                    f"`python crop_suitability.py {RUNS_DIR}/<run name> <7 layers>` to map suitability here."
+                )
+        
         # Additional Guidance
         st.markdown("### 🌱 Crop Selection Tips")
         st.write("""
@@ -1015,6 +1517,10 @@ class ComprehensiveSustainabilityPlatform:
         - Consult local agricultural experts
         - Rotate crops to maintain soil health
         """)
+        
+        # Loads, load time and memory of the models held by this server process
+        with st.expander("Model Registry"):
+            st.dataframe(pd.DataFrame(registry_stats()))
 
     def profile_section(self):
         """User Profile and Analytics"""
@@ -1057,26 +1563,11 @@ class ComprehensiveSustainabilityPlatform:
         base_score += min(st.session_state.supercoins / 100, 10)
         
         return min(max(base_score, 0), 100)
+    
     def _get_carbon_personality(self, emissions):
         """Assign a fun carbon emission personality"""
-        personalities = [
-            "🌱 Earth Whisperer (Low Emission)",
-            "🍃 Green Guardian",
-            "🌍 Climate Conscious Citizen",
-            "🏭 Industrial Impact Maker",
-            "🔥 Carbon Volcano (High Emission)"
-        ]
-        
-        if emissions < 50:
-            return personalities[0]
-        elif emissions < 100:
-            return personalities[1]
-        elif emissions < 200:
-            return personalities[2]
-        elif emissions < 500:
-            return personalities[3]
-        else:
-            return personalities[4]
+        from carbon_engine import carbon_personality
+        return carbon_personality(emissions)
 
 
 def main():
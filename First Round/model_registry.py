@@ -0,0 +1,124 @@
+import os
+import time
+import hashlib
+import threading
+
+# Resident memory is read from procfs where available
+STATM_PATH = '/proc/self/statm'
+
+
+def file_digest(path):
+    """SHA-256 of a file, read in 1 MB blocks"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def resident_bytes():
+    """Resident set size of this process, or None where procfs is missing"""
+    try:
+        with open(STATM_PATH) as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError):
+        return None
+
+
+class ModelRegistry:
+    """
+    Process-wide cache of joblib model artifacts, swapped when the file changes
+
+    Each path is loaded once and the same object is handed to every caller
+    (every Streamlit session of the process). NumPy arrays inside the pickle
+    are memory-mapped, so plain arrays stay shared with the page cache and
+    other processes; objects that copy arrays on unpickling (sklearn trees
+    do) still load without a second transient copy.
+
+    Every get() stats the file. A new size or mtime triggers a hash check,
+    and only a changed hash reloads the model; a file that briefly vanishes
+    mid-replace keeps the previous model in service.
+    """
+
+    def __init__(self, mmap_mode='r'):
+        self.mmap_mode = mmap_mode
+        self.entries = {}
+        self._lock = threading.Lock()
+
+    def get(self, path):
+        """
+        Model stored at `path`, loading or reloading it if needed
+
+        Raises:
+            FileNotFoundError: The file is missing and was never loaded
+        """
+        path = os.path.abspath(path)
+        with self._lock:
+            entry = self.entries.get(path)
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                if entry is None:
+                    raise
+                return entry['model']
+
+            signature = (stat.st_size, stat.st_mtime_ns)
+            if entry is not None and entry['signature'] == signature:
+                return entry['model']
+
+            digest = file_digest(path)
+            if entry is not None and entry['sha256'] == digest:
+                # Touched or copied over with identical content
+                entry['signature'] = signature
+                return entry['model']
+
+            entry = self._load(path, entry)
+            entry['signature'] = signature
+            entry['sha256'] = digest
+            self.entries[path] = entry
+            return entry['model']
+
+    def _load(self, path, previous):
+        # joblib (and the model's own imports) only load with the first model
+        import joblib
+
+        before = resident_bytes()
+        start = time.perf_counter()
+        model = joblib.load(path, mmap_mode=self.mmap_mode)
+        elapsed = time.perf_counter() - start
+        after = resident_bytes()
+        return {
+            'model': model,
+            'loads': (previous['loads'] if previous else 0) + 1,
+            'load_seconds': elapsed,
+            'total_load_seconds': (previous['total_load_seconds'] if previous else 0.0) + elapsed,
+            'resident_mb': (after - before) / 2**20 if before is not None and after is not None else None,
+            'file_mb': os.path.getsize(path) / 2**20,
+            'loaded_at': time.time(),
+        }
+
+    def stats(self):
+        """
+        Returns:
+            list: One dict per model with path, loads, load_seconds (last load),
+            total_load_seconds, resident_mb (RSS growth of the last load),
+            file_mb, sha256 and loaded_at
+        """
+        with self._lock:
+            return [
+                {'path': path, **{key: value for key, value in entry.items() if key not in ('model', 'signature')}}
+                for path, entry in self.entries.items()
+            ]
+
+
+# One registry per process, shared by every session and CLI in it
+REGISTRY = ModelRegistry()
+
+
+def load_model(path):
+    """Model at `path` from the process-wide registry"""
+    return REGISTRY.get(path)
+
+
+def registry_stats():
+    return REGISTRY.stats()
@@ -0,0 +1,181 @@
+import sys
+import time
+import argparse
+import numpy as np
+import pandas as pd
+
+from emission_factors import ACTIVITY_COLUMNS, DEFAULT_REGION, load_emission_factors
+
+# What-if levers, each a fraction from 0 to its maximum:
+# electricity saved, renewable share of the electricity still used, gas saved,
+# car km moved to public transit, flight km avoided
+LEVERS = ['Electricity Saved', 'Renewable Electricity', 'Natural Gas Saved', 'Car km to Transit', 'Flights Avoided']
+LEVER_MAX = np.array([0.5, 1.0, 0.5, 0.8, 1.0])
+
+# Effort points of taking each lever to 100%; effort grows with the square of
+# the fraction, so the last steps of a lever are the hardest
+EFFORT_WEIGHTS = np.array([3.0, 4.0, 2.0, 5.0, 6.0])
+
+# kg CO2 per kWh of renewable electricity
+RENEWABLE_FACTOR = 0.0
+
+# Settings per lever; 16 ** 5 = 1,048,576 scenarios
+SWEEP_STEPS = 16
+
+
+def lever_levels(steps=SWEEP_STEPS, lever_max=LEVER_MAX):
+    """Evenly spaced settings of each lever, from 0 to its maximum"""
+    return [np.linspace(0, top, steps) for top in lever_max]
+
+
+def _on_axis(values, axis, n_axes):
+    """`values` shaped to vary along `axis` of an n-dimensional grid"""
+    shape = [1] * n_axes
+    shape[axis] = len(values)
+    return np.asarray(values, dtype=np.float64).reshape(shape)
+
+
+def sweep_scenarios(activities, factors, levels=None, effort_weights=EFFORT_WEIGHTS):
+    """
+    Emissions and effort of every combination of lever settings
+
+    Each lever varies along its own axis of the scenario grid, so the whole
+    sweep is a handful of broadcast array operations with no Python loop
+    over scenarios.
+
+    Args:
+        activities: Monthly amounts in ACTIVITY_COLUMNS order
+        factors: kg CO2 per unit of each activity
+        levels (list): Settings of each lever in LEVERS order; lever_levels() if None
+
+    Returns:
+        dict: levels, baseline kg CO2, and emissions and effort grids with
+        one axis per lever
+    """
+    electricity, gas, car, transit, flights = np.asarray(activities, dtype=np.float64).reshape(-1)
+    f_electricity, f_gas, f_car, f_transit, f_flights = np.asarray(factors, dtype=np.float64).reshape(-1)
+    levels = lever_levels() if levels is None else levels
+    saved, renewable, gas_saved, car_shift, flights_avoided = (
+        _on_axis(values, axis, len(levels)) for axis, values in enumerate(levels)
+    )
+
+    # Small per-lever (or per lever pair) terms first; only the final sums span the full grid
+    electricity_kg = electricity * (1 - saved) * ((1 - renewable) * f_electricity + renewable * RENEWABLE_FACTOR)
+    gas_kg = gas * (1 - gas_saved) * f_gas
+    road_kg = car * ((1 - car_shift) * f_car + car_shift * f_transit) + transit * f_transit
+    flight_kg = flights * (1 - flights_avoided) * f_flights
+    emissions = electricity_kg + gas_kg + road_kg + flight_kg
+
+    effort = sum(
+        weight * _on_axis(values, axis, len(levels)) ** 2
+        for axis, (weight, values) in enumerate(zip(effort_weights, levels))
+    )
+    baseline = float(np.dot([electricity, gas, car, transit, flights], [f_electricity, f_gas, f_car, f_transit, f_flights]))
+    return {
+        'levels': levels,
+        'baseline': baseline,
+        'emissions': emissions,
+        'effort': np.broadcast_to(effort, emissions.shape),
+    }
+
+
+def pareto_frontier(emissions, effort):
+    """
+    Flat indices of the scenarios no other scenario beats on both emissions and effort
+
+    Scenarios are ordered by effort; a scenario is a candidate when it emits
+    strictly less than every cheaper one, and of candidates with equal
+    effort only the last (lowest emission) is kept. Returned in order of
+    increasing effort.
+    """
+    emissions = np.ravel(emissions)
+    effort = np.ravel(effort)
+    # One unstable argsort; ties are resolved among the few candidates instead of by a lexsort
+    order = np.argsort(effort)
+    ordered = emissions[order]
+    best_before = np.minimum.accumulate(ordered)
+    keep = np.empty(len(order), dtype=bool)
+    keep[:1] = True
+    keep[1:] = ordered[1:] < best_before[:-1]
+    candidates = order[keep]
+    candidate_effort = effort[candidates]
+    return candidates[np.append(candidate_effort[1:] != candidate_effort[:-1], True)]
+
+
+def frontier_table(sweep, frontier):
+    """Lever settings (%), emissions, reduction and effort of frontier scenarios"""
+    settings = np.unravel_index(frontier, sweep['emissions'].shape)
+    table = pd.DataFrame({
+        f'{lever} %': np.round(values[index] * 100, 1)
+        for lever, values, index in zip(LEVERS, sweep['levels'], settings)
+    })
+    emissions = sweep['emissions'].reshape(-1)[frontier]
+    table['Emissions'] = emissions
+    table['Reduction %'] = (1 - emissions / sweep['baseline']) * 100 if sweep['baseline'] > 0 else 0.0
+    table['Effort'] = np.asarray(sweep['effort']).reshape(-1)[frontier]
+    return table
+
+
+def frontier_chart(table, baseline):
+    """Interactive plotly chart of emission reduction against effort along the frontier"""
+    # plotly is only needed where the chart is drawn
+    import plotly.express as px
+
+    fig = px.line(
+        table,
+        x='Effort',
+        y='Reduction %',
+        markers=True,
+        hover_data=[f'{lever} %' for lever in LEVERS] + ['Emissions'],
+        title=f'Best Reduction for Each Level of Effort (baseline {baseline:,.1f} kg CO2)'
+    )
+    fig.update_layout(xaxis_title='Effort (points)', yaxis_title='Emission Reduction (%)')
+    return fig
+
+
+def scenario_frontier(activities, region=DEFAULT_REGION, year=None, steps=SWEEP_STEPS, table=None):
+    """
+    Sweep every lever combination for one household and keep the Pareto frontier
+
+    Returns:
+        tuple: (frontier DataFrame, stats dict with scenarios, seconds,
+        baseline and factor_version)
+    """
+    table = table or load_emission_factors()
+    factors, _ = table.lookup(region, table.latest_year if year is None else year)
+    start = time.perf_counter()
+    sweep = sweep_scenarios(activities, factors[0], lever_levels(steps))
+    frontier = pareto_frontier(sweep['emissions'], sweep['effort'])
+    seconds = time.perf_counter() - start
+    stats = {
+        'scenarios': sweep['emissions'].size,
+        'seconds': seconds,
+        'baseline': sweep['baseline'],
+        'factor_version': table.version,
+    }
+    return frontier_table(sweep, frontier), stats
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='What-if sweep of carbon reduction levers with its Pareto frontier')
+    for activity in ACTIVITY_COLUMNS:
+        parser.add_argument(f"--{activity.lower().replace(' ', '-')}", type=float, default=0.0,
+                            help=f'Monthly {activity} amount')
+    parser.add_argument('--region', default=DEFAULT_REGION, help='Region whose emission factors apply')
+    parser.add_argument('--steps', type=int, default=SWEEP_STEPS, help='Settings per lever')
+    parser.add_argument('--output', help='Optional CSV file for the frontier')
+    args = parser.parse_args(argv)
+
+    activities = [getattr(args, activity.lower().replace(' ', '_')) for activity in ACTIVITY_COLUMNS]
+    frontier, stats = scenario_frontier(activities, args.region, steps=args.steps)
+    print(
+        f"{stats['scenarios']:,} scenarios in {stats['seconds']:.3f}s, {len(frontier):,} on the frontier; "
+        f"baseline {stats['baseline']:,.1f} kg CO2, factors {stats['factor_version']}"
+    )
+    print(frontier.round(2).to_string(index=False))
+    if args.output:
+        frontier.to_csv(args.output, index=False)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
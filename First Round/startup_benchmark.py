@@ -0,0 +1,102 @@
+import os
+import sys
+import time
+import argparse
+import resource
+import multiprocessing
+
+# Heavy dependencies whose import the benchmark reports per page
+HEAVY_MODULES = ('tensorflow', 'plotly', 'folium', 'sklearn')
+
+# Seconds a single page may take to render before the run counts as failed
+RENDER_TIMEOUT = 600
+
+# Session state that puts the app past each user type's login
+SESSIONS = {
+    'selection': {'user_type': None},
+    'public': {'user_type': 'public', 'logged_in': True, 'username': 'benchmark'},
+    'government': {'user_type': 'government', 'government_logged_in': True, 'government_username': 'admin'},
+    'government login': {'user_type': 'government', 'government_logged_in': False},
+}
+
+
+def _render_page(script, session, page):
+    """
+    Runs in a fresh process: first render of the landing page, then of `page`
+
+    Returns:
+        dict: page, options, startup_s, render_s, max_rss_mb, heavy modules loaded, error
+    """
+    from streamlit.testing.v1 import AppTest
+
+    os.chdir(os.path.dirname(script))
+    start = time.perf_counter()
+    app = AppTest.from_file(script, default_timeout=RENDER_TIMEOUT)
+    for key, value in SESSIONS[session].items():
+        app.session_state[key] = value
+    app.run()
+    startup = time.perf_counter() - start
+
+    navigation = app.sidebar.radio
+    options = list(navigation[0].options) if len(navigation) else []
+    render = startup
+    if page is not None and page != options[0]:
+        start = time.perf_counter()
+        navigation[0].set_value(page).run()
+        render = time.perf_counter() - start
+
+    return {
+        'page': page or (options[0] if options else session),
+        'options': options,
+        'startup_s': startup,
+        'render_s': render,
+        'max_rss_mb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+        'modules': [name for name in HEAVY_MODULES if name in sys.modules],
+        'error': app.exception[0].message if len(app.exception) else None,
+    }
+
+
+def benchmark(script, sessions=tuple(SESSIONS)):
+    """
+    Time to first render of every page, each in a fresh interpreter
+
+    A page's time covers only the rerun that navigates to it, so it includes
+    whatever that page imports lazily but not the app's own startup, which is
+    reported separately as the landing page's time.
+    """
+    script = os.path.abspath(script)
+    context = multiprocessing.get_context('spawn')
+
+    def run(session, page=None):
+        with context.Pool(1) as pool:
+            return pool.apply(_render_page, (script, session, page))
+
+    results = []
+    for session in sessions:
+        landing = run(session)
+        results.append(landing)
+        for page in landing['options'][1:]:
+            results.append(run(session, page))
+
+    print(f"{'page':<36} {'startup s':>9} {'render s':>9} {'RSS MB':>7}  heavy modules")
+    for result in results:
+        line = (
+            f"{result['page']:<36} {result['startup_s']:>9.2f} {result['render_s']:>9.2f} "
+            f"{result['max_rss_mb']:>7.0f}  {', '.join(result['modules']) or '-'}"
+        )
+        if result['error']:
+            line += f"  (error: {result['error'][:60]})"
+        print(line)
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Time to first render of every page of the Streamlit app')
+    parser.add_argument('script', nargs='?', default='main9.py', help='Streamlit app to benchmark')
+    parser.add_argument('--sessions', nargs='+', default=list(SESSIONS), choices=SESSIONS, help='User types to visit')
+    args = parser.parse_args(argv)
+    benchmark(args.script, args.sessions)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
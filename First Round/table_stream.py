@@ -0,0 +1,71 @@
+import os
+import time
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+PARQUET_EXTENSIONS = ('.parquet', '.pq')
+
+# Rows read, processed and written per step
+CHUNK_ROWS = 50_000
+
+
+def is_parquet(source):
+    """Whether a path or uploaded file names a Parquet file"""
+    name = source if isinstance(source, str) else getattr(source, 'name', '')
+    return os.path.splitext(name)[1].lower() in PARQUET_EXTENSIONS
+
+
+def read_table_chunks(source, chunk_rows=CHUNK_ROWS):
+    """
+    Yield a CSV or Parquet table as DataFrames of at most `chunk_rows`
+
+    Parquet is read one record batch at a time and CSV through read_csv's
+    chunk iterator, so memory stays bounded whatever the file size.
+
+    Args:
+        source: Path or file-like object (e.g. an upload); `.parquet`/`.pq` by name is Parquet
+    """
+    if is_parquet(source):
+        for batch in pq.ParquetFile(source).iter_batches(batch_size=chunk_rows):
+            yield batch.to_pandas()
+    else:
+        yield from pd.read_csv(source, chunksize=chunk_rows)
+
+
+def write_table_chunks(chunks, output, report=None):
+    """
+    Write DataFrame chunks to one CSV or Parquet file as they arrive
+
+    Only the chunk being written is held in memory.
+
+    Args:
+        chunks: Iterable of DataFrames with the same columns
+        output (str): Result path; `.parquet` writes Parquet, anything else CSV
+        report (callable): Optional progress callback(rows done, rows/sec)
+
+    Returns:
+        dict: rows, seconds, rows_per_sec
+    """
+    parquet = is_parquet(output)
+    writer = None
+    rows = 0
+    start = time.perf_counter()
+    try:
+        for chunk in chunks:
+            if parquet:
+                table = pa.Table.from_pandas(chunk, preserve_index=False)
+                if writer is None:
+                    writer = pq.ParquetWriter(output, table.schema)
+                writer.write_table(table.cast(writer.schema))
+            else:
+                chunk.to_csv(output, mode='w' if rows == 0 else 'a', header=rows == 0, index=False)
+            rows += len(chunk)
+            if report is not None:
+                report(rows, rows / (time.perf_counter() - start))
+    finally:
+        if writer is not None:
+            writer.close()
+
+    elapsed = time.perf_counter() - start
+    return {'rows': rows, 'seconds': elapsed, 'rows_per_sec': rows / elapsed if elapsed > 0 else float('inf')}
@@ -0,0 +1,65 @@
+import pandas as pd
+
+from carbon_statements import RUPEES_PER_UNIT, statement_activities, statement_columns, statement_emissions
+
+ELECTRICITY_RATE = RUPEES_PER_UNIT[0]
+
+
+def _statement(**extra):
+    frame = pd.DataFrame({
+        'Date': ['2024-04-02', '2024-04-09', '2024-04-15', '2024-04-30'],
+        'Narration': ['BESCOM BILL APR', 'TATA POWER REFUND', 'SALARY APRIL', 'BESCOM LATE FEE'],
+        'Amount': [800.0, 400.0, 50000.0, 80.0],
+    })
+    for column, values in extra.items():
+        frame[column] = values
+    return frame
+
+
+def _electricity_kwh(frame, **kwargs):
+    monthly, counts = statement_activities(frame, statement_columns(frame), **kwargs)
+    return monthly['Electricity'].sum(), counts
+
+
+def test_payment_method_type_column_is_not_a_direction():
+    frame = _statement(Type=['UPI', 'NEFT', 'NEFT', 'POS'])
+    frame['Amount'] = [-800.0, 400.0, 50000.0, -80.0]
+    assert statement_columns(frame)[4] is None
+
+    kwh, counts = _electricity_kwh(frame, debits_negative=True)
+    assert kwh == (800 + 80) / ELECTRICITY_RATE
+    assert counts['credits'] == 2
+
+
+def test_dr_cr_values_in_type_column_decide_direction():
+    frame = _statement(Type=['DR', 'CR', 'Cr', 'Dr.'])
+    assert statement_columns(frame)[4] == 'Type'
+
+    kwh, counts = _electricity_kwh(frame)
+    assert kwh == (800 + 80) / ELECTRICITY_RATE
+    assert counts['credits'] == 2
+
+
+def test_marker_column_wins_over_payment_method_column():
+    frame = _statement(**{'Transaction Type': ['IMPS', 'IMPS', 'NEFT', 'UPI'], 'Dr/Cr': ['D', 'C', 'C', 'D']})
+    assert statement_columns(frame)[4] == 'Dr/Cr'
+
+
+def test_separate_credit_column_without_markers():
+    frame = _statement(Type=['UPI', 'NEFT', 'NEFT', 'POS'])
+    frame = frame.rename(columns={'Amount': 'Withdrawal Amt.'})
+    frame['Withdrawal Amt.'] = [800.0, None, None, 80.0]
+    frame['Deposit Amt.'] = [None, 400.0, 50000.0, None]
+
+    kwh, counts = _electricity_kwh(frame)
+    assert kwh == (800 + 80) / ELECTRICITY_RATE
+    assert counts['credits'] == 2
+
+
+def test_streamed_statement_skips_credits(tmp_path):
+    path = tmp_path / 'statement.csv'
+    _statement(Type=['UPI', 'NEFT', 'NEFT', 'POS']).assign(Amount=[-800.0, 400.0, 50000.0, -80.0]).to_csv(path, index=False)
+
+    *_, (emissions, stats) = statement_emissions(str(path), chunk_rows=2, debits_negative=True)
+    assert list(emissions.index) == ['2024-04']
+    assert stats['credits'] == 2 and stats['lines'] == 4
@@ -0,0 +1,71 @@
+import os
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.ensemble import ExtraTreesClassifier, RandomForestClassifier
+
+from crop_forest import EVAL_CHUNK_ROWS, FlatForest
+
+DATA_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'Crop_Recommendation.csv')
+
+
+@pytest.fixture(scope='module')
+def soil_tests():
+    frame = pd.read_csv(DATA_PATH)
+    return frame.iloc[:, :7].to_numpy(np.float64), frame.iloc[:, 7].to_numpy()
+
+
+def _threshold_rows(forest, X, n_rows=400, seed=0):
+    """Rows of X with one feature moved onto a split threshold or to either float32 neighbour of it"""
+    rng = np.random.default_rng(seed)
+    nodes = [
+        (node_feature, node_threshold)
+        for tree in (estimator.tree_ for estimator in forest.estimators_)
+        for node_feature, node_threshold in zip(tree.feature, tree.threshold)
+        if node_feature >= 0
+    ]
+    rows = X[rng.integers(len(X), size=n_rows)].copy()
+    for row, pick in zip(rows, rng.integers(len(nodes), size=n_rows)):
+        node_feature, node_threshold = nodes[pick]
+        on = np.float32(node_threshold)
+        row[node_feature] = rng.choice([
+            node_threshold,
+            on,
+            np.nextafter(on, np.float32(np.inf)),
+            np.nextafter(on, np.float32(-np.inf)),
+        ])
+    return rows
+
+
+@pytest.mark.parametrize('model', [
+    RandomForestClassifier(n_estimators=30, random_state=0),
+    ExtraTreesClassifier(n_estimators=30, random_state=0),
+    RandomForestClassifier(n_estimators=10, max_depth=4, bootstrap=False, random_state=1),
+], ids=['random-forest', 'extra-trees', 'shallow'])
+def test_flat_forest_matches_sklearn(model, soil_tests):
+    X, y = soil_tests
+    model.fit(X, y)
+    flat = FlatForest(model)
+
+    for rows in (X, _threshold_rows(model, X)):
+        np.testing.assert_array_equal(flat.predict_proba(rows), model.predict_proba(rows))
+        np.testing.assert_array_equal(flat.predict(rows), model.predict(rows))
+
+
+def test_chunked_evaluation_matches_one_pass(soil_tests):
+    X, y = soil_tests
+    model = RandomForestClassifier(n_estimators=8, random_state=2).fit(X, y)
+    rows = X[np.random.default_rng(3).integers(len(X), size=EVAL_CHUNK_ROWS * 2 + 17)]
+    np.testing.assert_array_equal(FlatForest(model).predict_proba(rows), model.predict_proba(rows))
+
+
+def test_single_row_and_bad_input(soil_tests):
+    X, y = soil_tests
+    model = RandomForestClassifier(n_estimators=5, random_state=4).fit(X, y)
+    flat = FlatForest(model)
+    np.testing.assert_array_equal(flat.predict_proba(X[0]), model.predict_proba(X[:1]))
+
+    with pytest.raises(ValueError):
+        flat.predict(X[:, :6])
+    with pytest.raises(ValueError):
+        flat.predict(np.full((1, 7), np.nan))
@@ -0,0 +1,36 @@
+import json
+import os
+import pytest
+
+from crop_suitability import METADATA_FILE, list_runs, run_path
+
+
+@pytest.fixture
+def runs_dir(tmp_path):
+    runs = tmp_path / 'suitability_runs'
+    for name in ('karnataka_2024', 'punjab'):
+        (runs / name).mkdir(parents=True)
+        (runs / name / METADATA_FILE).write_text(json.dumps({'bounds': None, 'classes': []}))
+    # Started but never scored: no metadata yet
+    (runs / 'empty').mkdir()
+    # A run folder that escapes through a symlink
+    outside = tmp_path / 'elsewhere'
+    outside.mkdir()
+    (outside / METADATA_FILE).write_text('{}')
+    os.symlink(outside, runs / 'linked')
+    return str(runs)
+
+
+def test_runs_with_metadata_are_listed(runs_dir):
+    assert list_runs(runs_dir) == ['karnataka_2024', 'punjab']
+    assert list_runs(os.path.join(runs_dir, 'missing')) == []
+
+
+def test_run_path_stays_inside_the_runs_dir(runs_dir):
+    assert run_path('punjab', runs_dir) == os.path.realpath(os.path.join(runs_dir, 'punjab'))
+
+
+@pytest.mark.parametrize('name', ['..', '../elsewhere', 'punjab/../../elsewhere', '/etc', '', '.', 'linked'])
+def test_paths_outside_the_runs_dir_are_rejected(runs_dir, name):
+    with pytest.raises(ValueError):
+        run_path(name, runs_dir)
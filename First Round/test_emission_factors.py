@@ -0,0 +1,102 @@
+import os
+import numpy as np
+import pandas as pd
+import pytest
+
+from emission_factors import ACTIVITY_COLUMNS, EmissionFactorTable, load_emission_factors
+
+FACTORS_CSV = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'emission_factors.csv')
+
+ELECTRICITY = ACTIVITY_COLUMNS.index('Electricity')
+TRANSIT = ACTIVITY_COLUMNS.index('Public Transit')
+
+
+def _rows(*rows):
+    return pd.DataFrame(rows, columns=['region', 'year', 'activity', 'factor'])
+
+
+def _national(year, electricity, tax=5.0):
+    rows = [('India', year, activity, electricity if activity == 'Electricity' else 1.0) for activity in ACTIVITY_COLUMNS]
+    return rows + [('India', year, 'Carbon Tax', tax)]
+
+
+@pytest.fixture
+def table():
+    frame = _rows(
+        *_national(2022, 0.50, tax=4.0),
+        *_national(2024, 0.45),
+        ('Goa', 2023, 'Electricity', 0.30),
+        ('Goa', 2024, 'Carbon Tax', 6.0),
+    )
+    return EmissionFactorTable(frame, 'test')
+
+
+@pytest.mark.parametrize('region, year, electricity, tax', [
+    ('India', 2022, 0.50, 4.0),
+    # A year the table skips uses the latest one before it; later years use the last
+    ('India', 2023, 0.50, 4.0),
+    ('India', 2030, 0.45, 5.0),
+    # Years before the first one use the first
+    ('India', 2015, 0.50, 4.0),
+    # A region's own values carry forward, gaps come from the default region of that year
+    ('Goa', 2022, 0.50, 4.0),
+    ('Goa', 2023, 0.30, 4.0),
+    ('Goa', 2024, 0.30, 6.0),
+    ('Goa', 2026, 0.30, 6.0),
+    ('Atlantis', 2024, 0.45, 5.0),
+])
+def test_year_and_region_fallback(table, region, year, electricity, tax):
+    factors, tax_rates = table.lookup(region, year)
+    assert factors[0, ELECTRICITY] == pytest.approx(electricity)
+    assert tax_rates[0] == pytest.approx(tax)
+
+
+def test_lookup_broadcasts_regions_against_years(table):
+    factors, tax_rates = table.lookup(np.array(['Goa', 'India', 'Nowhere']), 2024)
+    assert factors.shape == (3, len(ACTIVITY_COLUMNS))
+    assert factors[:, ELECTRICITY].tolist() == pytest.approx([0.30, 0.45, 0.45])
+    assert tax_rates.tolist() == pytest.approx([6.0, 5.0, 5.0])
+
+    factors, _ = table.lookup('Goa', [2022, 2023])
+    assert factors[:, ELECTRICITY].tolist() == pytest.approx([0.50, 0.30])
+
+
+def test_default_region_comes_first(table):
+    assert list(table.regions) == ['India', 'Goa']
+    assert table.latest_year == 2024
+
+
+@pytest.mark.parametrize('frame, message', [
+    (_rows(*_national(2024, 0.45), ('India', 2024, 'Bicycle', 0.0)), 'Unknown activities'),
+    (_rows(('Goa', 2024, 'Electricity', 0.3)), 'no rows for the default region'),
+    (_rows(*_national(2024, 0.45)[1:]), 'lacks factors for Electricity'),
+])
+def test_bad_factor_files_are_rejected(frame, message):
+    with pytest.raises(ValueError, match=message):
+        EmissionFactorTable(frame, 'test')
+
+
+def test_shipped_factors_have_several_regions_and_years():
+    table = EmissionFactorTable(pd.read_csv(FACTORS_CSV), 'shipped')
+    assert len(table.regions) > 1 and len(table.years) > 1
+    assert not np.isnan(table.factors).any() and not np.isnan(table.tax_rates).any()
+
+    # Karnataka sets its own grid and transit factors; everything else is national
+    factors, _ = table.lookup(['Karnataka', 'India'], 2024)
+    assert factors[0, ELECTRICITY] < factors[1, ELECTRICITY]
+    assert factors[0, TRANSIT] < factors[1, TRANSIT]
+    others = [i for i in range(len(ACTIVITY_COLUMNS)) if i not in (ELECTRICITY, TRANSIT)]
+    np.testing.assert_array_equal(factors[0, others], factors[1, others])
+
+
+def test_loaded_table_is_rebuilt_when_the_file_changes(tmp_path):
+    path = tmp_path / 'factors.csv'
+    _rows(*_national(2024, 0.45)).to_csv(path, index=False)
+    first = load_emission_factors(str(path))
+    assert load_emission_factors(str(path)) is first
+
+    _rows(*_national(2024, 0.40)).to_csv(path, index=False)
+    os.utime(path, ns=(0, os.stat(path).st_mtime_ns + 1))
+    second = load_emission_factors(str(path))
+    assert second is not first and second.version != first.version
+    assert second.lookup('India', 2024)[0][0, ELECTRICITY] == pytest.approx(0.40)
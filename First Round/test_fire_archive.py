@@ -0,0 +1,113 @@
+import os
+from datetime import date, datetime
+import pandas as pd
+import pytest
+
+from fire_archive import FireArchive, cap_window, default_window
+from fire_store import concat_fire_frames, read_fire_csv
+
+NRT_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fire_nrt_M6_107977.csv')
+
+
+@pytest.fixture(scope='module')
+def two_seasons():
+    # The NRT export (Jan-Feb 2020) plus the same detections a year earlier
+    nrt = read_fire_csv(NRT_PATH)
+    earlier = nrt.assign(acq_datetime=nrt['acq_datetime'] - pd.DateOffset(years=1))
+    return concat_fire_frames([earlier, nrt])
+
+
+@pytest.fixture(scope='module')
+def archive(tmp_path_factory, two_seasons):
+    archive = FireArchive(str(tmp_path_factory.mktemp('archive')))
+    archive.write(two_seasons)
+    return archive
+
+
+def _key(frame):
+    key = ['acq_datetime', 'latitude', 'longitude', 'satellite']
+    return frame.assign(satellite=frame['satellite'].astype(str))[key].sort_values(key).reset_index(drop=True)
+
+
+def test_partitions_by_month_and_source(archive, two_seasons):
+    assert len(archive) == len(two_seasons)
+    months = {(p['year'], p['month']) for p in archive.partitions}
+    assert months == {(2019, 1), (2019, 2), (2020, 1), (2020, 2)}
+    assert {p['satellite'] for p in archive.partitions} == set(two_seasons['satellite'].astype(str))
+    assert archive.date_bounds() == (date(2019, 1, 1), date(2020, 2, 1))
+
+
+def test_prune_skips_partitions_outside_the_window(archive):
+    january = archive.prune(date(2020, 1, 1), date(2020, 1, 31))
+    assert {(p['year'], p['month']) for p in january} == {(2020, 1)}
+    assert archive.prune(date(2018, 1, 1), date(2018, 12, 31)) == []
+
+    aqua = archive.prune(satellites=['Aqua'])
+    assert aqua and all(p['satellite'] == 'Aqua' for p in aqua)
+    assert all(p['max_confidence'] >= 95 for p in archive.prune(min_confidence=95))
+
+
+def test_prune_by_bbox_uses_partition_extents(archive):
+    bbox = (8.0, 76.0, 12.0, 78.0)
+    selected = archive.prune(bbox=bbox)
+    assert 0 < len(selected) <= len(archive.partitions)
+    for partition in archive.partitions:
+        overlaps = not (
+            partition['north'] < bbox[0] or partition['south'] > bbox[2] or
+            partition['east'] < bbox[1] or partition['west'] > bbox[3]
+        )
+        assert (partition in selected) == overlaps
+
+
+@pytest.mark.parametrize('start, end, min_confidence, bbox', [
+    (date(2019, 1, 15), date(2019, 2, 10), 0, None),
+    (date(2020, 1, 31), date(2020, 1, 31), 50, None),
+    (None, None, 80, (20.0, 75.0, 26.0, 85.0)),
+    (datetime(2020, 1, 5, 8, 0), datetime(2020, 1, 6, 8, 0), 0, None),
+])
+def test_read_matches_a_full_filter(archive, two_seasons, start, end, min_confidence, bbox):
+    result = archive.read(start, end, min_confidence, bbox)
+
+    times = two_seasons['acq_datetime']
+    keep = two_seasons['confidence'] >= min_confidence
+    if start is not None:
+        keep &= times >= pd.Timestamp(start)
+    if isinstance(end, datetime):
+        keep &= times <= pd.Timestamp(end)
+    elif end is not None:
+        keep &= times < pd.Timestamp(end) + pd.Timedelta(days=1)
+    if bbox is not None:
+        south, west, north, east = bbox
+        keep &= two_seasons['latitude'].between(south, north) & two_seasons['longitude'].between(west, east)
+
+    assert len(result) == int(keep.sum())
+    pd.testing.assert_frame_equal(_key(result), _key(two_seasons[keep]))
+    assert result['acq_datetime'].is_monotonic_increasing
+
+
+def test_read_selected_columns_and_empty_window(archive):
+    result = archive.read(date(2020, 1, 1), date(2020, 1, 2), columns=['latitude', 'frp'])
+    assert list(result.columns) == ['latitude', 'frp'] and len(result) > 0
+
+    empty = archive.read(date(2030, 1, 1), date(2030, 1, 2))
+    assert len(empty) == 0 and empty['confidence'].dtype == archive.read(date(2020, 1, 1))['confidence'].dtype
+
+
+def test_reimport_adds_nothing(tmp_path):
+    archive = FireArchive(str(tmp_path / 'archive'))
+    rows, added = archive.import_csv(NRT_PATH, chunk_rows=700)
+    assert rows == added > 0
+
+    assert archive.import_csv(NRT_PATH, chunk_rows=1_000) == (rows, 0)
+    # A fresh handle on the same root reads the catalog and the stored hashes
+    reopened = FireArchive(str(tmp_path / 'archive'))
+    assert reopened.import_csv(NRT_PATH) == (rows, 0)
+    assert len(reopened) == rows
+
+
+def test_default_and_capped_windows():
+    assert default_window(date(2019, 1, 1), date(2020, 2, 1)) == (date(2020, 1, 2), date(2020, 2, 1))
+    assert default_window(date(2020, 1, 20), date(2020, 2, 1)) == (date(2020, 1, 20), date(2020, 2, 1))
+
+    assert cap_window(date(2020, 1, 1), date(2020, 3, 1)) == (date(2020, 1, 1), date(2020, 3, 1), False)
+    assert cap_window(date(2015, 1, 1), date(2020, 2, 1), max_days=10) == (date(2020, 1, 22), date(2020, 2, 1), True)
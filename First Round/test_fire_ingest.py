@@ -0,0 +1,121 @@
+import os
+import numpy as np
+import pandas as pd
+import pytest
+
+from fire_ingest import FireIngestor, LiveFireStore, SeenDetections, detection_hashes
+from fire_store import read_fire_csv
+
+NRT_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fire_nrt_M6_107977.csv')
+
+
+@pytest.fixture(scope='module')
+def january():
+    frame = read_fire_csv(NRT_PATH)
+    return frame[frame['acq_datetime'] < '2020-01-11'].reset_index(drop=True)
+
+
+def _by_day(frame):
+    return [day for _, day in frame.groupby(frame['acq_datetime'].dt.date, sort=True)]
+
+
+def test_seen_detections_keeps_first_occurrence():
+    seen = SeenDetections()
+    assert seen.filter_new(np.array([5, 3, 5, 9, 3], dtype=np.uint64)).tolist() == [True, True, False, True, False]
+    assert seen.filter_new(np.array([9, 1, 12, 1, 0], dtype=np.uint64)).tolist() == [False, True, True, False, True]
+    assert seen.hashes.tolist() == [0, 1, 3, 5, 9, 12]
+    assert not seen.filter_new(seen.hashes.copy()).any()
+
+
+def test_seen_detections_against_a_python_set():
+    rng = np.random.default_rng(5)
+    seen, reference = SeenDetections(), set()
+    for _ in range(20):
+        batch = rng.integers(0, 500, size=60).astype(np.uint64)
+        expected = []
+        for value in batch.tolist():
+            expected.append(value not in reference)
+            reference.add(value)
+        assert seen.filter_new(batch).tolist() == expected
+    assert len(seen) == len(reference)
+    assert (np.diff(seen.hashes.astype(np.int64)) > 0).all()
+
+
+def test_hash_ignores_columns_outside_the_key(january):
+    rows = january.head(3)
+    changed = rows.assign(frp=rows['frp'] + 1, confidence=0)
+    np.testing.assert_array_equal(detection_hashes(rows), detection_hashes(changed))
+    assert (detection_hashes(rows) != detection_hashes(rows.assign(latitude=rows['latitude'] + 0.01))).all()
+
+
+def test_reingesting_adds_nothing(tmp_path, january):
+    store = LiveFireStore(str(tmp_path / 'store'))
+    added = [store.append(day) for day in _by_day(january)]
+    assert sum(added) == len(january)
+    assert all(store.append(day) == 0 for day in _by_day(january))
+    assert store.append(pd.concat([january.head(40), january.head(40)])) == 0
+    assert len(store) == len(january)
+
+
+def test_late_day_is_sorted_in(tmp_path, january):
+    days = _by_day(january)
+    store = LiveFireStore(str(tmp_path / 'store'))
+    for day in days[:3] + days[4:]:
+        store.append(day)
+    assert store.append(days[3]) == len(days[3])
+
+    engine, spatial_index, pyramid, events = store.snapshot()
+    data = engine.data
+    assert len(data) == len(january)
+    assert (data['acq_datetime'].diff().dropna() >= pd.Timedelta(0)).all()
+
+    # Positions the spatial index hands back must point at the right rows after the re-sort
+    south, west, north, east = 20.0, 78.0, 24.0, 84.0
+    expected = np.flatnonzero(
+        data['latitude'].between(south, north).to_numpy() & data['longitude'].between(west, east).to_numpy()
+    )
+    np.testing.assert_array_equal(np.sort(spatial_index.query_bbox(south, west, north, east)), expected)
+    assert pyramid.cells(min(pyramid.zooms))['count'].sum() == len(january)
+    assert events.events['detections'].sum() == len(january)
+
+
+def test_snapshot_does_not_follow_later_appends(tmp_path, january):
+    days = _by_day(january)
+    store = LiveFireStore(str(tmp_path / 'store'))
+    store.append(days[0])
+    engine, spatial_index, _, events = store.snapshot()
+
+    for day in days[1:]:
+        store.append(day)
+    assert len(engine) == len(engine.data) == len(days[0])
+    assert spatial_index.size == len(days[0])
+    assert events.events['detections'].sum() == len(days[0])
+    assert len(store.snapshot()[0]) == len(january)
+
+
+def test_restart_reloads_parts(tmp_path, january):
+    store_dir = str(tmp_path / 'store')
+    store = LiveFireStore(store_dir)
+    for day in _by_day(january):
+        store.append(day)
+
+    reopened = LiveFireStore(store_dir)
+    assert len(reopened) == len(january)
+    assert reopened.append(january) == 0
+
+
+def test_ingestor_skips_files_it_has_seen(tmp_path):
+    drops = tmp_path / 'drops'
+    drops.mkdir()
+    raw = pd.read_csv(NRT_PATH)
+    raw.head(500).to_csv(drops / 'first.csv', index=False)
+    raw.head(800).to_csv(drops / 'overlap.csv', index=False)
+    for path in drops.iterdir():
+        os.utime(path, (0, 0))
+
+    store = LiveFireStore(str(tmp_path / 'store'))
+    ingestor = FireIngestor(str(drops), store, chunk_rows=128)
+    stats = ingestor.run_once(report=lambda line: None)
+    assert [s['added'] for s in stats] == [500, 300]
+    assert [s['duplicates'] for s in stats] == [0, 500]
+    assert ingestor.run_once(report=lambda line: None) == []
@@ -0,0 +1,58 @@
+import json
+import numpy as np
+import pandas as pd
+import folium
+
+from fire_aggregation import aggregate_detections, coarsen_cells
+from fire_map_layers import FireCellsLayer, FirePointsLayer, add_fire_layers, fit_cell_budget
+
+
+def _detections(n, seed=0):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        'latitude': rng.uniform(8, 36, n).astype(np.float32),
+        'longitude': rng.uniform(68, 97, n).astype(np.float32),
+        'frp': rng.gamma(2, 10, n).astype(np.float32),
+        'brightness': rng.uniform(300, 400, n).astype(np.float32),
+    })
+
+
+def _cell_layer_sizes(fire_map):
+    return [
+        len(json.loads(child.columns)['count'])
+        for child in fire_map._children.values() if isinstance(child, FireCellsLayer)
+    ]
+
+
+def test_coarsen_cells_matches_direct_aggregation():
+    data = _detections(5_000)
+    coarsened = coarsen_cells(aggregate_detections(data, 6), 4)
+    direct = aggregate_detections(data, 4)
+    pd.testing.assert_frame_equal(coarsened.reset_index(drop=True), direct.reset_index(drop=True), check_dtype=False)
+
+
+def test_coarsest_level_over_budget_is_merged():
+    data = _detections(20_000)
+    cell_levels = {zoom: aggregate_detections(data, zoom) for zoom in (6, 7)}
+    max_cells = 50
+    assert len(cell_levels[6]) > max_cells
+
+    fire_map = add_fire_layers(folium.Map(), data, cell_levels, max_points=0, max_cells=max_cells)
+    sizes = _cell_layer_sizes(fire_map)
+    assert sizes and max(sizes) <= max_cells
+
+
+def test_budget_below_zoom_zero_keeps_busiest_cells():
+    cells = aggregate_detections(_detections(2_000), 0)
+    kept, zoom = fit_cell_budget(cells, 0, max_cells=2)
+    assert zoom == 0
+    assert len(kept) == 2
+    assert kept['count'].min() >= cells['count'].nlargest(2).min()
+
+
+def test_too_many_points_without_cell_levels_still_draws_cells():
+    data = _detections(3_000)
+    fire_map = add_fire_layers(folium.Map(), data, {}, max_points=1_000, max_cells=40)
+    sizes = _cell_layer_sizes(fire_map)
+    assert len(sizes) == 1 and 0 < sizes[0] <= 40
+    assert not [child for child in fire_map._children.values() if isinstance(child, FirePointsLayer)]
@@ -0,0 +1,73 @@
+import os
+from datetime import date, datetime
+import pandas as pd
+import pytest
+
+from fire_query import FireQueryEngine
+from fire_store import read_fire_csv
+
+NRT_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fire_nrt_M6_107977.csv')
+
+
+@pytest.fixture(scope='module')
+def nrt():
+    # Shuffled so the engine has to sort it
+    return read_fire_csv(NRT_PATH).sample(frac=1, random_state=7).reset_index(drop=True)
+
+
+def _expected(data, lo, hi, min_confidence=0, bbox=None):
+    keep = (data['acq_datetime'] >= lo) & (data['acq_datetime'] < hi) & (data['confidence'] >= min_confidence)
+    if bbox is not None:
+        south, west, north, east = bbox
+        keep &= data['latitude'].between(south, north) & data['longitude'].between(west, east)
+    return data[keep].sort_values('acq_datetime', kind='stable')
+
+
+def _same_rows(result, expected):
+    key = ['acq_datetime', 'latitude', 'longitude', 'satellite']
+    assert len(result) == len(expected)
+    pd.testing.assert_frame_equal(
+        result.sort_values(key).reset_index(drop=True),
+        expected.sort_values(key).reset_index(drop=True),
+    )
+
+
+def test_data_is_time_sorted(nrt):
+    times = FireQueryEngine(nrt).data['acq_datetime'].to_numpy()
+    assert len(times) == len(nrt)
+    assert (times[1:] >= times[:-1]).all()
+
+
+@pytest.mark.parametrize('start, end, min_confidence, bbox', [
+    (date(2020, 1, 5), date(2020, 1, 5), 0, None),
+    (date(2020, 1, 1), date(2020, 1, 20), 70, None),
+    (date(2020, 1, 10), date(2020, 2, 28), 0, (20.0, 75.0, 26.0, 85.0)),
+    (date(2019, 1, 1), date(2019, 12, 31), 0, None),
+])
+def test_date_queries_match_a_full_scan(nrt, start, end, min_confidence, bbox):
+    result = FireQueryEngine(nrt).query(start, end, min_confidence, bbox)
+    expected = _expected(nrt, pd.Timestamp(start), pd.Timestamp(end) + pd.Timedelta(days=1), min_confidence, bbox)
+    _same_rows(result, expected)
+    assert (result['acq_datetime'].diff().dropna() >= pd.Timedelta(0)).all()
+
+
+def test_datetime_end_is_inclusive(nrt):
+    engine = FireQueryEngine(nrt)
+    moment = engine.data['acq_datetime'].iloc[len(nrt) // 2]
+    result = engine.query(None, moment.to_pydatetime())
+    assert result['acq_datetime'].max() == moment
+    assert len(result) == int((nrt['acq_datetime'] <= moment).sum())
+
+
+def test_open_ended_query_returns_everything(nrt):
+    engine = FireQueryEngine(nrt)
+    assert len(engine.query(None, None)) == len(nrt)
+    lo, hi = engine.time_bounds(datetime(2030, 1, 1), date(2020, 1, 1))
+    assert lo == hi
+
+
+def test_min_and_max_time(nrt):
+    engine = FireQueryEngine(nrt)
+    assert engine.min_time == nrt['acq_datetime'].min()
+    assert engine.max_time == nrt['acq_datetime'].max()
+    assert len(engine.query(engine.min_time, engine.max_time)) == len(nrt)
@@ -0,0 +1,84 @@
+import numpy as np
+import pytest
+
+from fire_spatial import FireSpatialIndex, haversine_km
+
+
+@pytest.fixture(scope='module')
+def hotspots():
+    # Fire clusters around a few centres plus scattered background points
+    rng = np.random.default_rng(11)
+    centres = np.array([[23.3, 85.3], [11.0, 76.9], [27.1, 93.6], [19.9, 73.8]])
+    clustered = centres[rng.integers(len(centres), size=6_000)] + rng.normal(0, 0.4, (6_000, 2))
+    background = np.column_stack([rng.uniform(6, 37, 2_000), rng.uniform(68, 98, 2_000)])
+    points = np.vstack([clustered, background]).astype(np.float32)
+    return points[:, 0], points[:, 1]
+
+
+BOXES = [(22.0, 84.0, 24.5, 86.5), (5.0, 60.0, 40.0, 100.0), (30.0, 70.0, 30.01, 70.01), (-10.0, 0.0, 0.0, 10.0)]
+CENTRES = [(23.3, 85.3, 25.0), (11.0, 76.9, 5.0), (15.0, 80.0, 300.0), (-30.0, 20.0, 50.0)]
+
+
+def _in_box(latitude, longitude, south, west, north, east):
+    return np.flatnonzero((latitude >= south) & (latitude <= north) & (longitude >= west) & (longitude <= east))
+
+
+@pytest.mark.parametrize('box', BOXES)
+def test_bbox_matches_brute_force(hotspots, box):
+    latitude, longitude = hotspots
+    index = FireSpatialIndex(latitude, longitude)
+    np.testing.assert_array_equal(np.sort(index.query_bbox(*box)), _in_box(latitude, longitude, *box))
+
+
+@pytest.mark.parametrize('lat, lon, radius_km', CENTRES)
+def test_radius_matches_brute_force(hotspots, lat, lon, radius_km):
+    latitude, longitude = hotspots
+    index = FireSpatialIndex(latitude, longitude)
+    positions, distances = index.query_radius(lat, lon, radius_km, return_distance=True)
+
+    expected = np.flatnonzero(haversine_km(lat, lon, latitude, longitude) <= radius_km)
+    np.testing.assert_array_equal(np.sort(positions), expected)
+    assert (distances <= radius_km).all()
+
+
+@pytest.mark.parametrize('lat, lon, k', [(23.3, 85.3, 1), (20.0, 80.0, 25), (35.0, 97.0, 200), (0.0, 0.0, 10)])
+def test_knn_matches_brute_force(hotspots, lat, lon, k):
+    latitude, longitude = hotspots
+    index = FireSpatialIndex(latitude, longitude)
+    positions, distances = index.query_knn(lat, lon, k)
+
+    all_distances = haversine_km(lat, lon, latitude, longitude)
+    np.testing.assert_allclose(distances, np.sort(all_distances)[:k])
+    np.testing.assert_allclose(all_distances[positions], distances)
+    assert (np.diff(distances) >= 0).all()
+
+
+def test_inserted_points_are_found(hotspots):
+    latitude, longitude = hotspots
+    half = len(latitude) // 2
+    index = FireSpatialIndex(latitude[:half], longitude[:half])
+    # Small batches stay in the pending buffer, larger ones get merged into the grid
+    for start in range(half, len(latitude), 700):
+        stop = min(start + 700, len(latitude))
+        index.insert(latitude[start:stop], longitude[start:stop], np.arange(start, stop))
+    assert index.size == len(latitude)
+
+    for box in BOXES:
+        np.testing.assert_array_equal(np.sort(index.query_bbox(*box)), _in_box(latitude, longitude, *box))
+    positions, _ = index.query_knn(27.1, 93.6, 50)
+    assert len(positions) == 50
+
+
+def test_points_outside_the_built_extent(hotspots):
+    latitude, longitude = hotspots
+    index = FireSpatialIndex(latitude, longitude)
+    index.insert(np.array([45.0, -5.0]), np.array([110.0, 60.0]), np.array([len(latitude), len(latitude) + 1]))
+    assert list(index.query_bbox(44.0, 109.0, 46.0, 111.0)) == [len(latitude)]
+    positions, distances = index.query_knn(-5.0, 60.0, 1)
+    assert list(positions) == [len(latitude) + 1] and distances[0] == pytest.approx(0.0, abs=1e-6)
+
+
+def test_empty_index():
+    index = FireSpatialIndex(np.empty(0, dtype=np.float32), np.empty(0, dtype=np.float32))
+    assert len(index.query_bbox(-90, -180, 90, 180)) == 0
+    assert len(index.query_knn(10.0, 10.0, 5)[0]) == 0
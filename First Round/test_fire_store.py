@@ -0,0 +1,69 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from fire_aggregation import FireAggregationPyramid
+from fire_query import FireQueryEngine
+from fire_store import CONFIDENCE_CLASSES, concat_fire_frames, read_fire_csv
+
+VIIRS_CSV = """latitude,longitude,bright_ti4,scan,track,acq_date,acq_time,satellite,instrument,confidence,version,bright_ti5,frp,daynight
+21.51247,84.02215,331.2,0.39,0.36,2024-03-01,0742,N,VIIRS,n,2.0NRT,297.4,4.8,D
+21.51602,84.02588,367.0,0.39,0.36,2024-03-01,0742,N,VIIRS,h,2.0NRT,299.1,14.1,D
+19.02871,82.61037,301.9,0.51,0.41,2024-03-01,2006,N,VIIRS,l,2.0NRT,288.6,1.2,N
+26.70113,93.18904,340.5,0.45,0.39,2024-03-02,0724,1,VIIRS,n,2.0NRT,296.0,6.3,D
+"""
+
+MODIS_CSV = """latitude,longitude,brightness,scan,track,acq_date,acq_time,satellite,instrument,confidence,version,bright_t31,frp,daynight
+28.128,96.994,301.4,1.7,1.3,2024-03-01,355,Terra,MODIS,40,6.0NRT,278.8,15.3,D
+33.183,74.077,321.5,1.5,1.2,2024-03-02,530,Aqua,MODIS,85,6.0NRT,280.6,12.3,D
+"""
+
+
+@pytest.fixture
+def viirs_path(tmp_path):
+    path = tmp_path / 'J1_VIIRS_C2_South_Asia_24h.csv'
+    path.write_text(VIIRS_CSV)
+    return str(path)
+
+
+@pytest.fixture
+def modis_path(tmp_path):
+    path = tmp_path / 'MODIS_C6_1_South_Asia_24h.csv'
+    path.write_text(MODIS_CSV)
+    return str(path)
+
+
+def test_viirs_confidence_classes_become_numbers(viirs_path):
+    frame = read_fire_csv(viirs_path)
+    assert frame['confidence'].dtype == np.uint8
+    assert frame['confidence'].tolist() == [CONFIDENCE_CLASSES[c] for c in 'nhln']
+
+
+def test_viirs_columns_match_modis_layout(viirs_path, modis_path):
+    viirs, modis = read_fire_csv(viirs_path), read_fire_csv(modis_path)
+    assert list(viirs.columns) == list(modis.columns)
+    assert viirs['brightness'].tolist() == pytest.approx([331.2, 367.0, 301.9, 340.5])
+    assert viirs['acq_datetime'].iloc[0] == pd.Timestamp('2024-03-01 07:42')
+
+
+def test_viirs_chunks_are_typed(viirs_path):
+    chunks = list(read_fire_csv(viirs_path, chunksize=3))
+    assert [len(chunk) for chunk in chunks] == [3, 1]
+    assert concat_fire_frames(chunks)['confidence'].tolist() == [60, 90, 20, 60]
+
+
+def test_one_threshold_filters_both_instruments(viirs_path, modis_path):
+    engine = FireQueryEngine(concat_fire_frames([read_fire_csv(viirs_path), read_fire_csv(modis_path)]))
+    high = engine.query(None, None, min_confidence=80)
+    assert sorted(high['instrument'].astype(str)) == ['MODIS', 'VIIRS']
+
+    pyramid = FireAggregationPyramid(zooms=(5,))
+    pyramid.update(engine.data)
+    assert pyramid.cells(5)['count'].sum() == len(engine)
+
+
+def test_unknown_confidence_is_rejected(tmp_path):
+    path = tmp_path / 'bad.csv'
+    path.write_text(VIIRS_CSV.replace(',n,2.0NRT', ',maybe,2.0NRT', 1))
+    with pytest.raises(ValueError):
+        read_fire_csv(str(path))
@@ -0,0 +1,120 @@
+import json
+import os
+from datetime import date
+import numpy as np
+import pandas as pd
+import folium
+import pytest
+
+from fire_aggregation import FireAggregationPyramid
+from fire_map_layers import FireCellsLayer, FirePointsLayer
+from fire_query import FireQueryEngine
+from fire_spatial import FireSpatialIndex
+from fire_store import read_fire_csv
+from fire_viewport import (
+    DEFAULT_VIEWPORT, Viewport, add_viewport_layers, downsample_by_priority, parse_viewport,
+    point_priority, viewport_positions,
+)
+
+NRT_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fire_nrt_M6_107977.csv')
+
+CENTRAL_INDIA = Viewport(18.0, 74.0, 26.0, 86.0, 7, (22.0, 80.0))
+
+
+@pytest.fixture(scope='module')
+def indexes():
+    engine = FireQueryEngine(read_fire_csv(NRT_PATH))
+    data = engine.data
+    spatial_index = FireSpatialIndex(data['latitude'].to_numpy(), data['longitude'].to_numpy())
+    pyramid = FireAggregationPyramid()
+    pyramid.update(data)
+    return engine, spatial_index, pyramid
+
+
+def _layers(fire_map, kind):
+    return [json.loads(child.columns) for child in fire_map._children.values() if isinstance(child, kind)]
+
+
+def test_parse_viewport_reads_st_folium_state():
+    state = {
+        'bounds': {'_southWest': {'lat': 10.5, 'lng': 75.0}, '_northEast': {'lat': 14.0, 'lng': 80.5}},
+        'zoom': 8.0,
+        'center': {'lat': 12.2, 'lng': 77.7},
+    }
+    assert parse_viewport(state) == Viewport(10.5, 75.0, 14.0, 80.5, 8, (12.2, 77.7))
+
+    del state['center']
+    assert parse_viewport(state).center == (12.25, 77.75)
+
+
+@pytest.mark.parametrize('state', [
+    None,
+    {},
+    {'bounds': {}, 'zoom': 5},
+    {'bounds': {'_southWest': {'lat': None, 'lng': None}, '_northEast': {'lat': None, 'lng': None}}, 'zoom': 5},
+    {'bounds': {'_southWest': {'lat': 1, 'lng': 2}, '_northEast': {'lat': 3, 'lng': 4}}, 'zoom': None},
+])
+def test_parse_viewport_falls_back_before_bounds_arrive(state):
+    assert parse_viewport(state) == DEFAULT_VIEWPORT
+
+
+@pytest.mark.parametrize('start, end, min_confidence', [
+    (None, None, 0),
+    (date(2020, 1, 10), date(2020, 1, 20), 0),
+    (date(2020, 1, 1), date(2020, 2, 1), 80),
+])
+def test_viewport_positions_match_a_full_filter(indexes, start, end, min_confidence):
+    engine, spatial_index, _ = indexes
+    positions = viewport_positions(engine, spatial_index, start, end, min_confidence, CENTRAL_INDIA)
+
+    data = engine.data
+    day = data['acq_datetime'].dt.date
+    keep = (
+        data['latitude'].between(CENTRAL_INDIA.south, CENTRAL_INDIA.north) &
+        data['longitude'].between(CENTRAL_INDIA.west, CENTRAL_INDIA.east) &
+        (data['confidence'] >= min_confidence) &
+        (day >= (start or date.min)) & (day <= (end or date.max))
+    )
+    np.testing.assert_array_equal(np.sort(positions), np.flatnonzero(keep.to_numpy()))
+
+
+def test_downsample_keeps_highest_priority_in_order(indexes):
+    data = indexes[0].data.head(600)
+    kept = downsample_by_priority(data, 50)
+    assert len(kept) == 50
+    assert kept.index.is_monotonic_increasing
+
+    priority = pd.Series(point_priority(data), index=data.index)
+    assert priority[kept.index].min() >= priority.drop(kept.index).max()
+    assert downsample_by_priority(data, 600) is data
+
+
+def test_zoomed_out_view_draws_visible_cells(indexes):
+    engine, spatial_index, pyramid = indexes
+    fire_map = folium.Map()
+    drawn, in_view = add_viewport_layers(fire_map, engine, spatial_index, pyramid, None, None, 0, CENTRAL_INDIA)
+
+    (cells,) = _layers(fire_map, FireCellsLayer)
+    assert drawn == len(cells['count'])
+    assert sum(cells['count']) >= in_view == len(viewport_positions(engine, spatial_index, None, None, 0, CENTRAL_INDIA))
+    assert not _layers(fire_map, FirePointsLayer)
+
+
+def test_confidence_filter_recounts_cells(indexes):
+    engine, spatial_index, pyramid = indexes
+    fire_map = folium.Map()
+    _, in_view = add_viewport_layers(fire_map, engine, spatial_index, pyramid, None, None, 90, CENTRAL_INDIA)
+    (cells,) = _layers(fire_map, FireCellsLayer)
+    assert sum(cells['count']) == in_view
+
+
+def test_zoomed_in_view_draws_budgeted_points(indexes):
+    engine, spatial_index, pyramid = indexes
+    viewport = CENTRAL_INDIA._replace(zoom=max(pyramid.zooms) + 1)
+    fire_map = folium.Map()
+    drawn, in_view = add_viewport_layers(fire_map, engine, spatial_index, pyramid, None, None, 0, viewport, budget=100)
+
+    (points,) = _layers(fire_map, FirePointsLayer)
+    assert in_view > 100
+    assert drawn == 100 == len(points['latitude'])
+    assert not _layers(fire_map, FireCellsLayer)
@@ -0,0 +1,72 @@
+import itertools
+import numpy as np
+import pytest
+
+from scenario_sweep import EFFORT_WEIGHTS, LEVERS, RENEWABLE_FACTOR, lever_levels, pareto_frontier, sweep_scenarios
+
+# Monthly kWh, m3 of gas, car km, transit km and flight km, with made-up factors
+HOUSEHOLD = [320.0, 25.0, 900.0, 200.0, 150.0]
+FACTORS = [0.82, 2.0, 0.19, 0.05, 0.25]
+
+
+def _dominated(emissions, effort):
+    """Brute force: is each scenario matched or beaten on both axes and strictly beaten on one"""
+    no_worse = (effort[None, :] <= effort[:, None]) & (emissions[None, :] <= emissions[:, None])
+    better = (effort[None, :] < effort[:, None]) | (emissions[None, :] < emissions[:, None])
+    return (no_worse & better).any(axis=1)
+
+
+def _check_frontier(emissions, effort):
+    frontier = pareto_frontier(emissions, effort)
+    emissions, effort = np.ravel(emissions), np.ravel(effort)
+    dominated = _dominated(emissions, effort)
+
+    assert not dominated[frontier].any()
+    # Every non-dominated trade-off appears once, cheapest first
+    expected = sorted(set(zip(effort[~dominated].tolist(), emissions[~dominated].tolist())))
+    assert list(zip(effort[frontier].tolist(), emissions[frontier].tolist())) == expected
+
+
+def test_frontier_of_a_5_lever_grid_matches_brute_force():
+    sweep = sweep_scenarios(HOUSEHOLD, FACTORS, lever_levels(5))
+    assert sweep['emissions'].shape == (5,) * len(LEVERS)
+    _check_frontier(sweep['emissions'], sweep['effort'])
+
+
+@pytest.mark.parametrize('seed', range(4))
+def test_frontier_with_ties_matches_brute_force(seed):
+    rng = np.random.default_rng(seed)
+    emissions = rng.integers(0, 40, size=(5,) * 5).astype(np.float64)
+    effort = rng.integers(0, 40, size=(5,) * 5).astype(np.float64)
+    _check_frontier(emissions, effort)
+
+
+def test_sweep_matches_scenario_by_scenario_formula():
+    levels = lever_levels(4)
+    sweep = sweep_scenarios(HOUSEHOLD, FACTORS, levels)
+    electricity, gas, car, transit, flights = HOUSEHOLD
+    f_electricity, f_gas, f_car, f_transit, f_flights = FACTORS
+
+    for index in itertools.product(range(4), repeat=len(LEVERS)):
+        saved, renewable, gas_saved, car_shift, avoided = (values[i] for values, i in zip(levels, index))
+        electricity_used = electricity * (1 - saved)
+        expected = (
+            electricity_used * (1 - renewable) * f_electricity + electricity_used * renewable * RENEWABLE_FACTOR +
+            gas * (1 - gas_saved) * f_gas +
+            car * (1 - car_shift) * f_car + (car * car_shift + transit) * f_transit +
+            flights * (1 - avoided) * f_flights
+        )
+        effort = sum(weight * values[i] ** 2 for weight, values, i in zip(EFFORT_WEIGHTS, levels, index))
+        assert sweep['emissions'][index] == pytest.approx(expected)
+        assert sweep['effort'][index] == pytest.approx(effort)
+
+    assert sweep['baseline'] == pytest.approx(sweep['emissions'][(0,) * len(LEVERS)])
+
+
+def test_frontier_starts_at_no_effort_and_ends_at_lowest_emissions():
+    sweep = sweep_scenarios(HOUSEHOLD, FACTORS, lever_levels(6))
+    frontier = pareto_frontier(sweep['emissions'], sweep['effort'])
+    emissions = sweep['emissions'].reshape(-1)[frontier]
+    assert frontier[0] == 0
+    assert emissions[-1] == sweep['emissions'].min()
+    assert (np.diff(emissions) < 0).all()